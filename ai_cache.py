@@ -0,0 +1,173 @@
+import collections
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# ===================================
+# Cache for AI extraction results
+# ===================================
+# Results of get_ai_json are stored in a small SQLite file, keyed on a hash
+# of the model name, the prompt version and the normalized student text.
+# An in-process LRU sits in front of it so repeated inputs never touch disk.
+# Changing the prompt changes the prompt version, so old entries are simply
+# never looked up again (and age out through the TTL / size limit).
+# ===================================
+
+CACHE_PATH = os.environ.get(
+    "AI_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "ai_cache.sqlite3"),
+)
+MAX_ENTRIES = int(os.environ.get("AI_CACHE_MAX_ENTRIES", 100000))
+MEMORY_ENTRIES = int(os.environ.get("AI_CACHE_MEMORY_ENTRIES", 10000))
+TTL = int(os.environ.get("AI_CACHE_TTL", 30 * 24 * 3600))  # seconds
+
+# Run the size/TTL eviction every this many writes
+EVICT_EVERY = 500
+
+_lock = threading.Lock()
+_local = threading.local()
+_memory = collections.OrderedDict()     # key -> (stored_at, json text)
+_writes = 0
+_stats = {
+    "memory_hits": 0,
+    "disk_hits": 0,
+    "misses": 0,
+    "evictions": 0,
+}
+
+
+def make_key(model, prompt_version, *texts):
+    """
+    Build the cache key for a request.
+
+    Args:
+        model (str): LLM model name
+        prompt_version (str): Version/hash of the prompt template
+        *texts (str): Normalized input texts
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    for part in (model, prompt_version) + texts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _connection():
+    """SQLite connection for the current thread (created on first use)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(CACHE_PATH, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS ai_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ai_cache_created ON ai_cache (created_at)")
+        _local.conn = conn
+    return conn
+
+
+def _remember(key, stored_at, value):
+    """Put an entry in the in-memory LRU (caller holds _lock)."""
+    _memory[key] = (stored_at, value)
+    _memory.move_to_end(key)
+    while len(_memory) > MEMORY_ENTRIES:
+        _memory.popitem(last=False)
+
+
+def get(key):
+    """
+    Look up a cached result.
+
+    Args:
+        key (str): Key from make_key
+
+    Returns:
+        The cached value (a fresh copy), or None on a miss
+    """
+    now = time.time()
+    with _lock:
+        entry = _memory.get(key)
+        if entry is not None:
+            if now - entry[0] <= TTL:
+                _memory.move_to_end(key)
+                _stats["memory_hits"] += 1
+                return json.loads(entry[1])
+            del _memory[key]
+
+    row = _connection().execute(
+        "SELECT value, created_at FROM ai_cache WHERE key = ? AND created_at >= ?",
+        (key, now - TTL),
+    ).fetchone()
+
+    with _lock:
+        if row is None:
+            _stats["misses"] += 1
+            return None
+        _stats["disk_hits"] += 1
+        _remember(key, row[1], row[0])
+    return json.loads(row[0])
+
+
+def put(key, value):
+    """
+    Store a result in memory and on disk.
+
+    Args:
+        key (str): Key from make_key
+        value: JSON-serializable result
+    """
+    global _writes
+
+    now = time.time()
+    text = json.dumps(value)
+    conn = _connection()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO ai_cache (key, value, created_at) VALUES (?, ?, ?)",
+            (key, text, now),
+        )
+
+    with _lock:
+        _remember(key, now, text)
+        _writes += 1
+        evict = _writes % EVICT_EVERY == 0
+    if evict:
+        _evict(conn, now)
+
+
+def _evict(conn, now):
+    """Drop expired entries and the oldest ones beyond MAX_ENTRIES."""
+    with conn:
+        expired = conn.execute("DELETE FROM ai_cache WHERE created_at < ?", (now - TTL,)).rowcount
+        overflow = conn.execute("""
+            DELETE FROM ai_cache WHERE key IN (
+                SELECT key FROM ai_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (MAX_ENTRIES,)).rowcount
+    with _lock:
+        _stats["evictions"] += expired + overflow
+
+
+def stats():
+    """
+    Hit/miss counters of the cache.
+
+    Returns:
+        dict: memory_hits, disk_hits, misses, evictions, hit_rate and memory_entries
+    """
+    with _lock:
+        result = dict(_stats)
+        result["memory_entries"] = len(_memory)
+    lookups = result["memory_hits"] + result["disk_hits"] + result["misses"]
+    result["hit_rate"] = round((result["memory_hits"] + result["disk_hits"]) / lookups, 4) if lookups else None
+    return result
@@ -1,77 +1,372 @@
-from ollama import chat
-from ollama import ChatResponse
+import hashlib
 import json
+import os
 import random
+import threading
+
+import ai_cache     # cache for get_ai_json results
+import lexicon      # rule-based extraction of plain skill/interest lists
+import llm_backend  # concurrency limit, deadlines, retries and circuit breakers around Ollama
 
 # ===================================
 # TROUBLESHOOTING: If you get connection errors
 # ===================================
 # If you see errors like "ConnectionError" or "Connection refused",
-# uncomment the lines below and use explicit client connection:
+# point the backend at the Ollama server(s) explicitly:
 #
-# client = Client(host="http://127.0.0.1:11434")
-# 
-# Then replace all instances of:
-#   chat(model='gemma3:4b', messages=[...])
-# With:
-#   client.chat(model='gemma3:4b', messages=[...])
+#   OLLAMA_HOSTS=http://127.0.0.1:11434
 #
-# This explicitly tells Ollama where to connect.
+# Several comma-separated hosts are load balanced (see llm_backend.py).
 # ===================================
 
+MODEL = 'gemma3:4b'
+
+# Extraction rules shared by the single and the batch prompt. The answer's
+# shape, lowercasing and duplicates are handled by the schemas below and
+# validate_extraction, so the prompts only say what to extract.
+EXTRACTION_RULES = '''Rules:
+1. skills: only technical skills, academic subjects and project-related capabilities
+2. interests: only project-related interests (e.g. "web development", "machine learning", "game design")
+3. Leave out personal hobbies unrelated to projects (e.g. "hiking", "cooking", "sports"), even next to technical items
+4. Use empty lists if nothing is project-related
+'''
+
+# Prompt used by get_ai_json ({skills} / {interests} are filled in per student)
+JSON_PROMPT = '''Extract the project-relevant skills and interests from a student's answers for a project team-matching system.
+''' + EXTRACTION_RULES + '''
+Student skills input: {skills}
+Student interests input: {interests}
+'''
+
+# Prompt used by get_ai_json_batch ({students} is the numbered list of answers)
+BATCH_PROMPT = '''Extract the project-relevant skills and interests of each of {count} students for a project team-matching system, one object per student in the same order.
+''' + EXTRACTION_RULES + '''
+{students}
+'''
+
+# Prompt used by time_ai
+TIME_PROMPT = '''You are a university student. Generate your weekly availability for project work: zero or more of "morning", "afternoon", "evening" per day, 2-5 slots across the week like a real student.'''
+
+# Ollama constrains the answers to these JSON schemas (structured outputs),
+# so they come back without fences or prose around them
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+EXTRACTION_SCHEMA = {
+  "type": "object",
+  "properties": {"skills": _STRING_LIST, "interests": _STRING_LIST},
+  "required": ["skills", "interests"],
+}
+AVAILABILITY_SCHEMA = {
+  "type": "object",
+  "properties": {day: {"type": "array", "items": {"enum": ["morning", "afternoon", "evening"]}}
+                 for day in ("mon", "tue", "wed", "thu", "fri", "weekend")},
+  "required": ["mon", "tue", "wed", "thu", "fri", "weekend"],
+}
+
+
+def batch_schema(count):
+  """JSON schema of a batch answer: exactly count numbered extraction objects."""
+  item = {
+    "type": "object",
+    "properties": dict(EXTRACTION_SCHEMA["properties"], student={"type": "integer"}),
+    "required": ["student", "skills", "interests"],
+  }
+  return {"type": "array", "items": item, "minItems": count, "maxItems": count}
+
+
+# Students per batch prompt
+BATCH_SIZE = 8
+
+# Cached results are tied to this hash: editing either prompt invalidates them
+# (single and batch results share the cache, batch_schema derives from EXTRACTION_SCHEMA)
+PROMPT_VERSION = hashlib.sha256(
+  (JSON_PROMPT + BATCH_PROMPT + json.dumps(EXTRACTION_SCHEMA, sort_keys=True)).encode("utf-8")).hexdigest()[:12]
+
+# Extraction tiers, cheapest first: "rules" (lexicon.py, answers it fully
+# understands), "cache" (ai_cache.py), "llm". The rules are off unless
+# AI_RULE_TIER=1: turn them on once benchmarks/bench_rule_tier.py shows
+# they agree with the model's recorded answers.
+RULE_TIER = os.environ.get("AI_RULE_TIER", "0") == "1"
+TIERS = ("rules", "cache", "llm")
+
+_tier_lock = threading.Lock()
+_tier_counts = {tier: 0 for tier in TIERS}
+
+
+def _count_tier(tier):
+  with _tier_lock:
+    _tier_counts[tier] += 1
+
+
+def tier_stats():
+  """
+  How many extractions each tier answered since the process started.
+
+  Returns:
+    dict: Count and share ("<tier>_rate") of every tier, plus the total
+  """
+  with _tier_lock:
+    counts = dict(_tier_counts)
+  total = sum(counts.values())
+  result = dict(counts, total=total)
+  for tier in TIERS:
+    result[f"{tier}_rate"] = round(counts[tier] / total, 4) if total else None
+  return result
+
+
+def _chat(call, parse=None, **kwargs):
+  """
+  Send a chat request through the shared LLM backend (see llm_backend.py).
+
+  Args:
+    call (str): Name of the calling function (metric label)
+    parse (callable, optional): Turns the answer text into the result;
+      answers it rejects with a ValueError are retried
+    **kwargs: model, messages, options, read_stream (see Backend.complete)
+
+  Returns:
+    The parsed answer, or the answer text without parse
+
+  Raises:
+    llm_backend.LLMError: If no valid answer came back in time
+  """
+  return llm_backend.get_backend().complete(call, parse=parse, **kwargs)
+
+
+def parse_json(response_text):
+  """
+  Parse a model answer that should be JSON (a ```json fence is removed).
+
+  Raises:
+    ValueError: If the answer isn't valid JSON
+  """
+  return json.loads(_strip_fences(response_text))
+
+
 def clean_and_validate_response(skills_text, interests_text):
     """
     Clean and validate student responses before sending to Gemini
     """
-    # Convert to lowercase
-    skills_text = skills_text.lower().strip()
-    interests_text = interests_text.lower().strip()
+    # Convert to lowercase and collapse repeated whitespace
+    skills_text = " ".join(skills_text.lower().split())
+    interests_text = " ".join(interests_text.lower().split())
     
     return skills_text, interests_text
 
 
-def get_ai_json(skills, interests):
+def read_json_object(pieces, on_progress=None):
+  """
+  Read streamed text until the first top-level JSON object is complete.
+  Anything before the opening brace (e.g. a ```json fence) is skipped and
+  nothing after the closing brace is waited for.
+
+  Args:
+    pieces (iterable): Text chunks as they arrive
+    on_progress (callable, optional): Called with the number of characters received so far
+
+  Returns:
+    tuple: (text, complete) - the JSON object text and True, or all the
+           text received and False if no object was closed
+  """
+  text = ""
+  start = None
+  depth = 0
+  in_string = False
+  escaped = False
+
+  for piece in pieces:
+    offset = len(text)
+    text += piece
+    if on_progress is not None:
+      on_progress(len(text))
+
+    for i in range(offset, len(text)):
+      ch = text[i]
+      if in_string:
+        if escaped:
+          escaped = False
+        elif ch == "\\":
+          escaped = True
+        elif ch == '"':
+          in_string = False
+      elif ch == '"' and start is not None:
+        in_string = True
+      elif ch == "{":
+        if start is None:
+          start = i
+        depth += 1
+      elif ch == "}" and start is not None:
+        depth -= 1
+        if depth == 0:
+          return text[start:i + 1], True
+
+  return text, False
+
+
+def get_ai_json(skills, interests, on_progress=None):
   skills, interests = clean_and_validate_response(skills, interests)
-  response: ChatResponse = chat(model='gemma3:4b', messages=[
+
+  # Plain lists of known skills/interests don't need the model
+  if RULE_TIER:
+    matched = lexicon.extract(skills, interests)
+    if matched is not None:
+      _count_tier("rules")
+      return matched
+
+  # Identical (normalized) answers were already extracted - skip the LLM call
+  cache_key = ai_cache.make_key(MODEL, PROMPT_VERSION, skills, interests)
+  cached = validate_extraction(ai_cache.get(cache_key))
+  if cached is not None:
+    _count_tier("cache")
+    return cached
+  _count_tier("llm")
+
+  def read_stream(pieces):
+    # Stop reading as soon as the JSON object is closed
+    response_text, complete = read_json_object(pieces, on_progress)
+    return response_text if complete else _strip_fences(response_text)
+
+  def parse(response_text):
+    # Lowercased and de-duplicated here, not by the prompt; off-schema answers count as malformed
+    data = validate_extraction(json.loads(response_text))
+    if data is None:
+      raise ValueError("answer doesn't match the extraction schema")
+    return data
+
+  # Malformed answers are asked again (see llm_backend.py)
+  data = _chat("get_ai_json", parse=parse, read_stream=read_stream, format=EXTRACTION_SCHEMA,
+               model=MODEL, messages=[
     {
       'role': 'user',
-      'content': f'''
-  You are analyzing student responses for a project team-matching system. Your task is to extract ONLY project-relevant skills and interests.
-
-STRICT RULES:
-1. Extract only technical skills, academic subjects, and project-related capabilities from skills
-2. Extract only project-related interests (e.g., "web development", "machine learning", "game design")
-3. IGNORE personal hobbies unrelated to projects (e.g., "hiking", "cooking", "sports")
-4. Convert all items to lowercase
-5. Remove duplicates
-6. If a student mentions many technical items but adds 1-2 unrelated hobbies, exclude those hobbies
-7. Focus on what indicates PROJECT preferences, not lifestyle preferences
-
-Student skills input: {skills}
-Student interests input: {interests}
-
-Respond ONLY with valid JSON in this exact format:
-{{"skills": ["skill1", "skill2"], "interests": ["interest1", "interest2"]}}
-
-If no valid project-related information exists, return: {{}}
-
-DO NOT include explanations, markdown, or any text outside the JSON object.
-      ''',
+      'content': JSON_PROMPT.format(skills=skills, interests=interests),
     },
   ])
-  response_text = response.message.content
+  ai_cache.put(cache_key, data)
+  return data
 
+def validate_extraction(data):
+  """
+  Check one extraction result against the per-student schema.
+
+  Args:
+    data: Parsed JSON for one student
+
+  Returns:
+    dict: {"skills": [...], "interests": [...]} (lowercased strings),
+          or None if the data doesn't fit the schema
+  """
+  if not isinstance(data, dict):
+    return None
+  result = {}
+  for field in ("skills", "interests"):
+    items = data.get(field, [])
+    if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+      return None
+    # Lowercase without duplicates or blanks, in first-seen order
+    result[field] = list(dict.fromkeys(item.lower().strip() for item in items if item.strip()))
+  return result
+
+
+def _strip_fences(response_text):
+  """Remove a ```json ... ``` fence around a model answer."""
+  response_text = response_text.strip()
   if response_text.startswith("```json"):
     response_text = response_text[len("```json"):]
   if response_text.endswith("```"):
     response_text = response_text[:-len("```")]
-
-  response_text = response_text.strip() 
-
-  data = json.loads(response_text)
-  return data
-
-#TODO add error handling
+  return response_text.strip()
+
+
+def _extract_batch(students):
+  """
+  One LLM call for several students.
+
+  Args:
+    students (list): Normalized (skills, interests) pairs
+
+  Returns:
+    list: Validated result per student, None where the answer was missing or invalid
+  """
+  listing = "\n".join(
+    f"Student {i}:\n  Skills input: {skills}\n  Interests input: {interests}"
+    for i, (skills, interests) in enumerate(students, start=1))
+
+  def parse_array(response_text):
+    data = parse_json(response_text)
+    if not isinstance(data, list):
+      raise ValueError(f"expected a JSON array, got {type(data).__name__}")
+    return data
+
+  results = [None] * len(students)
+  try:
+    data = _chat("get_ai_json_batch", parse=parse_array, format=batch_schema(len(students)),
+                 model=MODEL, messages=[
+      {
+        'role': 'user',
+        'content': BATCH_PROMPT.format(count=len(students), students=listing),
+      },
+    ])
+  except llm_backend.LLMError as e:
+    # The students are retried one by one by get_ai_json_batch
+    print(f"Batch extraction of {len(students)} students failed: {e}")
+    return results
+
+  for position, item in enumerate(data):
+    # Prefer the student number the model echoed back, fall back to the order
+    index = position
+    if isinstance(item, dict) and isinstance(item.get("student"), int):
+      index = item["student"] - 1
+    if 0 <= index < len(students) and results[index] is None:
+      results[index] = validate_extraction(item)
+  return results
+
+
+def get_ai_json_batch(answers, batch_size=BATCH_SIZE):
+  """
+  Extract skills and interests for many students with few LLM calls.
+  Sends batch_size students per prompt and asks for a JSON array back;
+  students whose element is missing or invalid fall back to get_ai_json.
+  Answers the rules understand and cached answers are not sent to the model at all.
+
+  Args:
+    answers (list): (skills_text, interests_text) per student
+    batch_size (int): Students per prompt
+
+  Returns:
+    list: {"skills": [...], "interests": [...]} per student, in input order
+  """
+  normalized = [clean_and_validate_response(skills, interests) for skills, interests in answers]
+  results = [None] * len(normalized)
+
+  pending = []
+  for i, (skills, interests) in enumerate(normalized):
+    if RULE_TIER:
+      results[i] = lexicon.extract(skills, interests)
+      if results[i] is not None:
+        _count_tier("rules")
+        continue
+    cached = ai_cache.get(ai_cache.make_key(MODEL, PROMPT_VERSION, skills, interests))
+    if cached is not None:
+      results[i] = validate_extraction(cached)
+    if results[i] is None:
+      pending.append(i)
+    else:
+      _count_tier("cache")
+
+  for start in range(0, len(pending), batch_size):
+    chunk = pending[start:start + batch_size]
+    batch_results = _extract_batch([normalized[i] for i in chunk])
+    for i, result in zip(chunk, batch_results):
+      if result is not None:
+        ai_cache.put(ai_cache.make_key(MODEL, PROMPT_VERSION, *normalized[i]), result)
+        results[i] = result
+        _count_tier("llm")
+
+  # Single calls only for the students the batches didn't cover
+  for i, result in enumerate(results):
+    if result is None:
+      skills, interests = answers[i]
+      results[i] = validate_extraction(get_ai_json(skills, interests)) or {"skills": [], "interests": []}
+  return results
 
 interest_levels = ["beginner", "enthusiastic", "passionate", "curious"]
 interest_fields = [
@@ -98,7 +393,7 @@ def interests_ai():
   num_interests = random.randint(2, 4)
   chosen_interests = random.sample(interest_fields, k=num_interests)
   interests_str = ", ".join(chosen_interests[:-1]) + " and " + chosen_interests[-1] if num_interests > 1 else chosen_interests[0]
-  response: ChatResponse = chat(model='gemma3:4b', messages=[
+  response_text = _chat("interests_ai", model=MODEL, messages=[
 
     {
       'role': 'user',
@@ -115,7 +410,6 @@ def interests_ai():
     },
   ])
 
-  response_text = response.message.content
   return response_text 
 
 level = ["medium", "high", "low"]
@@ -135,7 +429,7 @@ talents = [
 
 
 def skills_ai():
-  response: ChatResponse = chat(model='gemma3:4b', messages=[
+  response_text = _chat("skills_ai", model=MODEL, messages=[
     {
       'role': 'user',
     'content': f'''
@@ -155,36 +449,17 @@ def skills_ai():
     }
   )
 
-  response_text = response.message.content
   return response_text 
 
 
 
 def time_ai():
-  response: ChatResponse = chat(model='gemma3:4b', messages=[
+  # Answers that aren't valid JSON are asked again (see llm_backend.py)
+  data = _chat("time_ai", parse=parse_json, format=AVAILABILITY_SCHEMA, model=MODEL, messages=[
     {
       'role': 'user',
-      'content': f'''
-      You are a university student. Generate your weekly availability for project work as a JSON object.
-      Use this exact format: {{"mon": [], "tue": [], "wed": [], "thu": [], "fri": [], "weekend": []}}
-
-      For each day, include zero or more time slots from: "morning", "afternoon", "evening"
-      Make it realistic - students typically have 2-5 available slots across the week.
-
-      IMPORTANT: Return ONLY the JSON object, no explanations, no labels, no additional text.
-      Student availability:''',
+      'content': TIME_PROMPT,
     },
   ])
-
-  response_text = response.message.content
-
-  if response_text.startswith("```json"):
-    response_text = response_text[len("```json"):]
-  if response_text.endswith("```"):
-    response_text = response_text[:-len("```")]
-
-  response_text = response_text.strip() 
-
-  data = json.loads(response_text)
   return data
 
@@ -1,5 +1,6 @@
 from flask import (
     Flask,
+    Response,
     render_template,
     request,
     flash,
@@ -12,24 +13,71 @@ from flask import (
 
 import os
 import sys
-import random
 import json
-import secrets
-import string
+import time
 
+import click
 import mysql.connector
-from faker import Faker
 
 # Local / custom modules
 import ai_micro     # inserting data with AI
-import sort_alg     # sorting/clustering algorithm
+import llm_backend  # bounded, retried calls to the model servers
+import embeddings   # shared GloVe model
+import jobs         # background jobs (group generation)
+import extraction   # queued AI extraction of student forms
+import ai_cache     # cache for AI extraction results
+import db_pool      # pooled MySQL connections
+import metrics      # Prometheus metrics (off unless METRICS_ENABLED is set)
+
+# ===================================
+# Deferred imports
+# ===================================
+# The modules below pull in numpy, scipy and scikit-learn (and the GloVe
+# model through gensim). They are imported inside the functions that use
+# them, so starting the app (and every worker boot) only pays for Flask and
+# the database driver. The first group generation / extraction imports them.
+# With APP_PRELOAD=1 they are imported (and the model mapped) when the app is
+# imported instead, so a pre-fork server (e.g. gunicorn --preload) pays for
+# them once in the master and every forked worker starts with them in memory.
+#
+#   sort_alg      sorting/clustering algorithm
+#   clustering    clustering engine settings per class
+#   features      precomputed student feature vectors
+#   phrase_cache  cache of skill phrase embeddings
+#   group_store   class loading and bulk write-back of generated groups
+#   incremental   placing late students into existing groups
+#   similarity    "find teammates like me" vector index
+# ===================================
+
+HEAVY_MODULES = ("sort_alg", "clustering", "features", "phrase_cache", "group_store", "incremental", "similarity")
+
+
+def preload():
+    """
+    Import the deferred modules and map the GloVe model now instead of on
+    first use (call it once in a pre-fork server's master process).
+
+    Returns:
+        float: Seconds it took
+    """
+    import importlib
+
+    start = time.perf_counter()
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+    embeddings.get_model()
+    seconds = time.perf_counter() - start
+    print(f"Preloaded {', '.join(HEAVY_MODULES)} and the GloVe model in {seconds:.2f}s")
+    return seconds
 
 
 # Create the Flask app instance
 app = Flask(__name__)
 app.secret_key = os.environ.get("SECRET_KEY")
 
-DATABASE = 'Collab_DB'
+# A form claimed for extraction this many seconds ago without finishing was
+# left behind by a process that stopped; it is extracted again
+EXTRACTION_STALE_AFTER = int(os.environ.get("EXTRACTION_STALE_AFTER", 600))
 
 app.config.update({
     "SESSION_PERMANENT": False,     # session ends when browser is closed
@@ -37,28 +85,32 @@ app.config.update({
     "PERMANENT_SESSION_LIFETIME": 3600  # 1 hour session lifetime
 })
 
+# The GloVe model is memory-mapped on first use; every request reuses the
+# same handle (shared between workers through the page cache)
+PRELOAD = os.environ.get("APP_PRELOAD", "0") == "1"
+if PRELOAD:
+    preload()
+
 
 def get_db():
     """
     Get database connection and cursor.
     Uses Flask's g object to store connection per request context.
-    Connection is reused within the same request.
+    Connection is reused within the same request and comes from a pool
+    shared by all requests.
     
     Returns:
         cursor: MySQL cursor with dictionary=True for dict-based results
     """
     if 'db' not in g:
-        conn = mysql.connector.connect(
-            user=os.environ.get("USER"),
-            password=os.environ.get("PASSWORD"),
-            host="127.0.0.1",
-            port=3306,
-            database=DATABASE,
-            autocommit=True
-        )
+        # Borrow a connection from the pool (see db_pool.py)
+        conn = db_pool.checkout()
 
         g.conn = conn
         g.db = conn.cursor(dictionary=True)
+        if metrics.ENABLED:
+            # Time every query made through this cursor
+            g.db = metrics.TimedCursor(g.db)
     return g.db
 
 
@@ -71,107 +123,260 @@ def generate_secure_code():
     Returns:
         str: A unique 4-character code
     """
-    characters = string.ascii_uppercase + string.digits
-    db = get_db()
-    # Keep generating until we find a unique code
-    while True:
-        # Generate random 4-character code
-        code = ''.join(secrets.choice(characters) for _ in range(4))
+    import group_store
 
-        # Check if code already exists in database
-        row = db.execute("SELECT 1 FROM teacher_group WHERE group_code = %s", (code,))
-        row = db.fetchone()
+    return group_store.new_group_code(get_db())
 
-        # If code doesn't exist, return it
-        if not row:
-            return code
 
-
-def insert_test_data(total_students, min_students_per_group, max_students_per_group):
+def process_extraction(form_id):
     """
-    Insert test data into database for testing.
-    Creates one teacher and multiple students with AI-generated form data.
+    Extract project-relevant skills and interests for a submitted form
+    (runs on the extraction worker threads, see extraction.py).
+    Stores the AI result and the precomputed feature vector, then marks
+    the form as done so it counts towards group generation.
     
     Args:
-        total_students (int): Number of students to create
-        min_students_per_group (int): Minimum students per group
-        max_students_per_group (int): Maximum students per group
-        
+        form_id (int): ID of the student_form row
+    
     Returns:
-        tuple: (group_code, teacher_id) for the created test group
-        
+        str: extraction.SKIPPED if another worker (or process) already took the form
+    
     Raises:
-        Exception: If database insertion fails
+        Exception: If the extraction fails after the form was claimed (the form is marked as failed)
     """
+    import features
+
+    with app.app_context():
+        db = get_db()
+        # Claim the form; every process re-queues pending forms at startup,
+        # so only the one whose update matches extracts it. A claim older
+        # than EXTRACTION_STALE_AFTER belonged to a process that died.
+        db.execute("""
+            UPDATE student_form
+            SET extraction_status = 'extracting', extraction_started_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+                AND (extraction_status = 'pending'
+                     OR (extraction_status = 'extracting'
+                         AND extraction_started_at < NOW() - INTERVAL %s SECOND))
+        """, (form_id, EXTRACTION_STALE_AFTER))
+        if db.rowcount == 0:
+            return extraction.SKIPPED
 
-    # Initialize Faker for generating test data
-    fake = Faker()
+        db.execute("""
+            SELECT student_id, raw_skills, raw_interests, availability, hours_per_week
+            FROM student_form
+            WHERE id = %s
+        """, (form_id,))
+        form = db.fetchone()
+
+        # Anything failing after the claim marks the form failed, so it shows
+        # up on the teacher dashboard for a retry instead of staying claimed
+        try:
+            # Streamed: the loading screen sees how much of the answer has arrived
+            inter_skills_json = ai_micro.get_ai_json(
+                form['raw_skills'] or "", form['raw_interests'] or "",
+                on_progress=lambda received: extraction.set_progress(form_id, "extracting", received))
+            skills = inter_skills_json.get("skills", [])
+            interests = inter_skills_json.get("interests", [])
+
+            # Precompute the feature vector so group generation doesn't have to
+            features.save_features(db, form['student_id'], features.encode_student(
+                skills, json.loads(form['availability']), json.loads(form['hours_per_week'])))
+
+            db.execute("""
+                UPDATE student_form
+                SET skills = %s, interests = %s, extraction_status = 'done'
+                WHERE id = %s
+            """, (json.dumps(skills), json.dumps(interests), form_id))
+        except Exception:
+            db.execute("UPDATE student_form SET extraction_status = 'failed' WHERE id = %s", (form_id,))
+            raise
+
+        place_late_student(form['student_id'])
+
+
+def place_late_student(student_id):
+    """
+    Put a student whose form was done after their class's groups were
+    generated into the existing groups (see incremental.py). Falls back to
+    regenerating the whole class in the background when that isn't possible.
+    
+    Args:
+        student_id (int): The student's user ID
+    """
+    import incremental
 
-    # Available hours per week options
-    hours_list = ["5-10", "10-15", "15-20", "20+"]
     db = get_db()
+    db.execute("""
+        SELECT g.group_code
+        FROM student_group g
+        JOIN group_run r
+            ON r.group_code = g.group_code
+        WHERE g.student_id = %s AND g.group_number IS NULL
+    """, (student_id,))
+    for row in db.fetchall():
+        group_code = row['group_code']
+        try:
+            result = incremental.place_student(g.conn, group_code, student_id)
+        except Exception as e:
+            print(f"Incremental placement failed for {group_code}: {e}")
+            result = {"status": "fallback"}
+        if result["status"] == "fallback":
+            jobs.submit(group_code, generate_groups, group_code)
+
+
+def reextract_backlog(statuses=("failed",), group_code=None, batch_size=ai_micro.BATCH_SIZE):
+    """
+    Re-run the AI extraction for a backlog of forms in batches
+    (e.g. after Ollama was down and forms were marked failed), then place
+    the recovered students into their class's groups if those exist.
+    Run it with `flask --app app reextract`.
+    
+    Args:
+        statuses (tuple): Extraction statuses to pick up
+        group_code (str, optional): Only forms of this class
+        batch_size (int): Students per AI extraction call
+    
+    Returns:
+        int: Number of forms extracted
+    """
+    import features
 
+    with app.app_context():
+        db = get_db()
+        sql = f"""
+            SELECT f.id, f.student_id, f.raw_skills, f.raw_interests, f.availability, f.hours_per_week
+            FROM student_form f
+            {"JOIN student_group g ON g.student_id = f.student_id AND g.group_code = %s" if group_code else ""}
+            WHERE f.extraction_status IN ({", ".join(["%s"] * len(statuses))})
+                AND f.raw_skills IS NOT NULL
+        """
+        db.execute(sql, ((group_code,) if group_code else ()) + tuple(statuses))
+
+        # Claim the forms the same way the extraction workers do (see process_extraction)
+        forms = []
+        for form in db.fetchall():
+            db.execute(f"""
+                UPDATE student_form
+                SET extraction_status = 'extracting', extraction_started_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND extraction_status IN ({", ".join(["%s"] * len(statuses))})
+            """, (form['id'],) + tuple(statuses))
+            if db.rowcount:
+                forms.append(form)
+
+        try:
+            extracted = ai_micro.get_ai_json_batch(
+                [(form['raw_skills'], form['raw_interests'] or "") for form in forms], batch_size)
+        except Exception:
+            # Give the claimed forms back so they can be retried
+            for form in forms:
+                db.execute("UPDATE student_form SET extraction_status = 'failed' WHERE id = %s", (form['id'],))
+            raise
+
+        for form, data in zip(forms, extracted):
+            features.save_features(db, form['student_id'], features.encode_student(
+                data["skills"], json.loads(form['availability']), json.loads(form['hours_per_week'])))
+            db.execute("""
+                UPDATE student_form
+                SET skills = %s, interests = %s, extraction_status = 'done'
+                WHERE id = %s
+            """, (json.dumps(data["skills"]), json.dumps(data["interests"]), form['id']))
+
+            place_late_student(form['student_id'])
+
+    print(f"Re-extracted {len(forms)} forms")
+    return len(forms)
+
+
+@app.cli.command("reextract")
+@click.option("--status", "statuses", multiple=True, default=("failed",), show_default=True,
+              help="Extraction status to pick up (repeatable)")
+@click.option("--group-code", default=None, help="Only forms of this class")
+@click.option("--batch-size", type=int, default=ai_micro.BATCH_SIZE, show_default=True,
+              help="Students per AI extraction call")
+def reextract_command(statuses, group_code, batch_size):
+    """Re-run the AI extraction for failed forms in batches."""
+    reextract_backlog(statuses, group_code, batch_size)
+
+
+def start_extraction_workers():
+    """
+    Start the extraction worker pool and re-queue forms that were still
+    pending (or whose extraction was cut off) when the app last stopped.
+    Runs before every request; only the first one in each process does anything.
+    """
+    if not extraction.start(process_extraction):
+        return
     try:
-        # Create a fake teacher
-        teacher_firstname = fake.first_name()
-        teacher_lastname = fake.last_name()
-        group_code = generate_secure_code()
-
-        # Insert teacher into users table
-        db.execute("INSERT INTO users (user_firstname, user_lastname, user_type) VALUES (%s, %s, %s)", (teacher_firstname, teacher_lastname, 1))
-        teacher_id = db.lastrowid
-
-        # Create teacher's group with specified parameters
-        db.execute("INSERT INTO teacher_group (teacher_id, total_students, group_code, min_students_per_group, max_students_per_group) VALUES (%s, %s, %s, %s, %s)",
-                            (teacher_id, total_students, group_code, min_students_per_group, max_students_per_group))
-        
-        # Create specified number of students
-        for i in range(total_students):
-            student_firstname = fake.first_name()
-            student_lastname = fake.last_name()
-
-            # Insert student into users table (user_type=0 for student)
-            db.execute("INSERT INTO users (user_firstname, user_lastname, user_type) VALUES (%s, %s, %s)", (student_firstname, student_lastname, 0))
-            student_id = db.lastrowid
-
-            # Generate random data
-            hours_per_week = random.choice(hours_list)
-            hours_per_week_json = json.dumps(hours_per_week)
-
-            # Generate availability using AI
-            avb = ai_micro.time_ai()
-            avb_json = json.dumps(avb)
-
-            # Generate skills and interests using AI
-            skills = ai_micro.skills_ai()
-            interests = ai_micro.interests_ai()
-            data = ai_micro.get_ai_json(skills, interests)
-            
-            # Extract and serialize skills and interests
-            skills_d = data["skills"]
-            interests_d = data["interests"]
-            skills_j = json.dumps(skills_d)
-            interests_j = json.dumps(interests_d)
-
-            # Add student to the group
-            db.execute("INSERT INTO student_group (student_id, group_code) VALUES (%s, %s)", (student_id, group_code))
-
-            # Insert student's form data
-            sql = "INSERT INTO student_form (student_id, skills, interests, availability, hours_per_week) VALUES (%s, %s, %s, %s, %s)"
-            db.execute(sql, (student_id, skills_j, interests_j, avb_json, hours_per_week_json))
-        
-        return group_code, teacher_id
+        with app.app_context():
+            db = get_db()
+            db.execute("""
+                SELECT id FROM student_form
+                WHERE extraction_status = 'pending'
+                    OR (extraction_status = 'extracting'
+                        AND extraction_started_at < NOW() - INTERVAL %s SECOND)
+            """, (EXTRACTION_STALE_AFTER,))
+            for row in db.fetchall():
+                extraction.enqueue(row['id'])
+    except mysql.connector.Error as e:
+        print(f"Could not re-queue pending extractions: {e}")
+
+
+# The background AI extraction workers start with the first request of each
+# process, not at import: importing the app needs no database, a pre-fork
+# server's master (APP_PRELOAD) never starts threads that wouldn't survive
+# the fork, and with the debug reloader only the serving process runs them
+app.before_request(start_extraction_workers)
+
+
+def generate_groups(set_progress, group_code):
+    """
+    Generate groups for a class (runs as a background job, see jobs.py).
+    Fetches the students' data, runs the clustering algorithm and
+    stores the assigned group numbers.
     
-    except Exception as e:
-        db.rollback()
-        print(f"Error inserting test data: {e}")
-        raise
+    Args:
+        set_progress (callable): Records the current stage and progress (0-1)
+        group_code (str): The group code for this class
+    """
+    import clustering
+    import features
+    import group_store
+    import sort_alg
+
+    with app.app_context():
+        db = get_db()
+
+        set_progress("loading", 0.0)
+
+        # Recompute feature vectors that are missing or from an older model version
+        features.refresh_stale_features(db, group_code)
+
+        # Get the group settings and all student data (with precomputed feature vectors),
+        # decoded into columns for sort_groups
+        group, data = group_store.fetch_class(g.conn, group_code)
+        min_students = group["min_students_per_group"]
+        max_students = group["max_students_per_group"]
+        
+        # Run clustering algorithm to sort students into groups
+        # Uses min/max group size from group settings
+        # (sort_groups reports its own progress, mapped into 10%-90% of the job)
+        report = {}
+        sorted_groups = sort_alg.sort_groups(
+            min_students, max_students, data, report=report,
+            engine_options=clustering.options_from_row(group),
+            progress=lambda stage, fraction: set_progress(stage, 0.1 + 0.8 * fraction))
+
+        # Store the assigned group numbers for this class in one transaction,
+        # together with the centers used to place late students (see incremental.py)
+        set_progress("saving", 0.9)
+        group_store.write_assignments(g.conn, group_code, sorted_groups, run=report)
 
 
 @app.teardown_appcontext
 def close_db(exception):
     """
-    Close database connection after each request.
+    Release database connection after each request.
     This is called automatically by Flask at the end of each request.
     
     Args:
@@ -180,13 +385,15 @@ def close_db(exception):
     db = g.pop('db', None)
     conn = g.pop('conn', None)
 
-    # Close cursor if it exists
-    if db is not None:
-        db.close()
-
-    # Close connection if it exists
-    if conn is not None:
-        conn.close()
+    try:
+        # Close cursor if it exists
+        if db is not None:
+            db.close()
+    finally:
+        # Return connection to the pool if it exists, even if closing the
+        # cursor failed (e.g. an unread result), so its slot isn't lost
+        if conn is not None:
+            db_pool.release(conn)
 
 
 @app.after_request
@@ -198,6 +405,71 @@ def after_request(response):
     return response
 
 
+if metrics.ENABLED:
+    @app.before_request
+    def start_request_timer():
+        """Remember when the request started (for the latency histogram)."""
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        """Record request latency and count by route template and status."""
+        started = g.get('request_started')
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        if started is not None:
+            metrics.observe("metrocollab_http_request_duration_seconds",
+                            time.perf_counter() - started, route=route, method=request.method)
+        metrics.inc("metrocollab_http_requests_total", route=route, method=request.method,
+                    status=response.status_code)
+        return response
+
+    @app.route("/metrics")
+    def metrics_page():
+        """
+        All metrics in Prometheus text format.
+        Only registered when METRICS_ENABLED is set.
+        """
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    # Current state of the connection pool and the extraction queue, and
+    # the running totals kept by the modules (exported as counters)
+    metrics.register_gauge("metrocollab_db_pool_connections", "Database connections by state",
+                           lambda: {(("state", "in_use"),): db_pool.stats()["in_use"],
+                                    (("state", "idle"),): db_pool.stats()["idle"]})
+    metrics.register_counter("metrocollab_db_pool_exhausted_total", "Checkouts that timed out waiting for a connection",
+                             lambda: db_pool.stats()["exhausted"])
+    metrics.register_gauge("metrocollab_extraction_queue_depth", "Forms waiting for AI extraction",
+                           lambda: extraction.stats()["queue_depth"])
+    metrics.register_counter("metrocollab_extraction_items_total", "Finished AI extractions by outcome",
+                             lambda: {(("outcome", "processed"),): extraction.stats()["processed"],
+                                      (("outcome", "failed"),): extraction.stats()["failed"],
+                                      (("outcome", "skipped"),): extraction.stats()["skipped"]})
+    metrics.register_counter("metrocollab_ai_cache_lookups_total", "AI result cache lookups by outcome",
+                             lambda: {(("outcome", outcome),): ai_cache.stats()[outcome]
+                                      for outcome in ("memory_hits", "disk_hits", "misses")})
+    metrics.register_counter("metrocollab_extraction_tier_answers_total", "Skill/interest extractions by answering tier",
+                             lambda: {(("tier", tier),): ai_micro.tier_stats()[tier] for tier in ai_micro.TIERS})
+    metrics.register_counter("metrocollab_phrase_cache_lookups_total", "Skill phrase embedding cache lookups by outcome",
+                             lambda: {(("outcome", outcome),): _phrase_cache_stats()[outcome]
+                                      for outcome in ("memory_hits", "disk_hits", "misses")})
+    metrics.register_counter("metrocollab_phrase_cache_seconds_saved_total", "Estimated embedding time saved by the phrase cache",
+                             lambda: _phrase_cache_stats()["seconds_saved"])
+    metrics.register_gauge("metrocollab_llm_in_flight", "Model requests in flight per host",
+                           lambda: {(("host", name),): host["in_flight"]
+                                    for name, host in llm_backend.get_backend().stats()["hosts"].items()})
+    metrics.register_gauge("metrocollab_llm_breaker_open", "Model hosts whose circuit breaker is open (1) or half-open (0.5)",
+                           lambda: {(("host", name),): {"closed": 0, "half_open": 0.5, "open": 1}[host["state"]]
+                                    for name, host in llm_backend.get_backend().stats()["hosts"].items()})
+
+
+def _phrase_cache_stats():
+    """Phrase cache counters; all zero while nothing in this process has used the cache (not imported yet)."""
+    phrase_cache = sys.modules.get("phrase_cache")
+    if phrase_cache is None:
+        return {"memory_hits": 0, "disk_hits": 0, "misses": 0, "seconds_saved": 0.0}
+    return phrase_cache.stats()
+
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     """
@@ -344,8 +616,11 @@ def student_form(user_id):
     
     Returns:
         GET: Rendered form template
-        POST: JSON response indicating success
+        POST: JSON response indicating success, with the URL of the
+              extraction progress stream
     """
+    import features
+
     if request.method == "POST":
 
         # Get form data
@@ -389,27 +664,64 @@ def student_form(user_id):
         INSERT INTO student_interests (user_id, interest_id) VALUES (%s, %s)
         """, (user_id, interests_id))
 
-        # Process skills and interests through AI to get embeddings/vectors
-        inter_skills_json = ai_micro.get_ai_json(form_skills, form_interests)
-        interests_json = json.dumps(inter_skills_json["interests"])
-        skills_json = json.dumps(inter_skills_json["skills"])
         availability_json = json.dumps(availability)
         hours_per_week_json = json.dumps(hours_per_week)
 
-        # Insert all form data into student_form table
+        # Insert form data with the raw skills/interests text; the AI extraction
+        # runs in the background and fills in skills/interests (see process_extraction)
         # TODO: if availability empty - delete it from the row
         db.execute("""
-            INSERT INTO student_form (student_id, email, skills, interests, availability, hours_per_week)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (user_id, email, skills_json, interests_json, availability_json, hours_per_week_json))
+            INSERT INTO student_form (student_id, email, skills, interests, availability, availability_mask,
+                                      hours_per_week, raw_skills, raw_interests, extraction_status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 'pending')
+        """, (user_id, email, "[]", "[]", availability_json, features.availability_mask(availability),
+              hours_per_week_json, form_skills, form_interests))
+        form_id = db.lastrowid
+        extraction.enqueue(form_id)
 
         print("Form submitted successfully")
-        return jsonify({"success": True, "message": "Form submitted successfully"})
+        return jsonify({
+            "success": True,
+            "message": "Form submitted successfully",
+            "form_id": form_id,
+            "progress_url": url_for('student_form_progress', user_id=user_id, form_id=form_id),
+        })
 
     # GET request - display form
     return render_template("student_form.html", user=session['user_id'])
 
 
+@app.route("/student_form/<int:user_id>/progress/<int:form_id>")
+def student_form_progress(user_id, form_id):
+    """
+    Progress of a form's AI extraction, polled by the student form
+    loading screen (about once a second; each poll is a quick lookup, so
+    no worker is held while the extraction runs).
+    
+    Args:
+        user_id (int): The student's user ID
+        form_id (int): ID of the submitted student_form row
+    
+    Returns:
+        JSON with stage (queued/extracting/done/failed) and received
+        (characters of the model's answer so far, 0 if not known)
+    """
+    # Live progress if the extraction runs in this process
+    progress = extraction.get_progress(form_id)
+
+    db = get_db()
+    db.execute("SELECT extraction_status FROM student_form WHERE id = %s AND student_id = %s", (form_id, user_id))
+    row = db.fetchone()
+    if not row:
+        return jsonify({"error": "Unknown form"}), 404
+
+    if progress is None:
+        # Extraction may run in another worker process: fall back to the table
+        status = row['extraction_status']
+        progress = {"stage": "queued" if status == "pending" else status, "received": 0}
+    return jsonify({"stage": progress['stage'], "received": progress['received']})
+
+
 @app.route("/teacher/<int:user_id>/<string:group_code>", methods=["GET", "POST"])
 def teacher_page(user_id, group_code):
     """
@@ -429,7 +741,7 @@ def teacher_page(user_id, group_code):
     
     Returns:
         GET: Rendered teacher dashboard
-        POST: Redirect to results page after generating groups
+        POST: JSON with the id and status URL of the group generation job
     """
     # Ensure user_id is in session
     if 'user_id' not in session:
@@ -444,18 +756,20 @@ def teacher_page(user_id, group_code):
     # Get group information
     db.execute("SELECT * FROM teacher_group WHERE group_code = %s", (group_code,))
     group = db.fetchone()
-    min_students = group["min_students_per_group"]
-    max_students = group["max_students_per_group"]
 
-    # Count how many students have submitted their forms
+    # Count how many students have submitted their forms, and the forms
+    # whose AI extraction failed or got stuck (they don't count until retried)
     querySubmitted = """
-    SELECT COUNT(sf.student_id) as submitted
+    SELECT COUNT(CASE WHEN sf.extraction_status = 'done' THEN 1 END) as submitted,
+           COUNT(CASE WHEN sf.extraction_status = 'failed'
+                        OR (sf.extraction_status = 'extracting'
+                            AND sf.extraction_started_at < NOW() - INTERVAL %s SECOND) THEN 1 END) as failed
     FROM student_form sf 
     JOIN student_group sg 
         ON sf.student_id = sg.student_id
     WHERE sg.group_code = %s
     """
-    db.execute(querySubmitted, (group_code,))
+    db.execute(querySubmitted, (EXTRACTION_STALE_AFTER, group_code))
     submitted = db.fetchone()
     
     total_students = group['total_students']
@@ -467,49 +781,177 @@ def teacher_page(user_id, group_code):
     
         # POST request - Generate groups using clustering algorithm
         if request.method == "POST":
-            # Get all student data for clustering
-            sql = '''
-                SELECT 
-                    u.id,
-                    u.user_firstname,
-                    u.user_lastname,
-                    f.skills,
-                    f.interests,
-                    f.availability,
-                    f.hours_per_week
-                FROM 
-                    users AS u
-                JOIN 
-                    student_form AS f 
-                    ON u.id = f.student_id
-                JOIN 
-                    student_group g
-                    ON g.student_id = u.id
-                WHERE g.group_code = %s'''
-            
-            db.execute(sql, (group['group_code'],))
-            results = db.fetchall()
-            
-            # Convert to JSON for processing
-            data_json = json.dumps(results)
-            data = json.loads(data_json)
-            
-            # Run clustering algorithm to sort students into groups
-            # Uses min/max group size from group settings
-            sorted_groups = sort_alg.sort_groups(min_students, max_students, data)
+            # Run the clustering in the background; clicking again while it
+            # runs returns the same job instead of starting another one
+            job = jobs.submit(group_code, generate_groups, group_code)
+            status_url = url_for('generation_status', user_id=user_id, group_code=group_code, job_id=job['id'])
+            return jsonify({"job_id": job['id'], "status_url": status_url}), 202
 
-            # Update database with assigned group numbers
-            for group_num, student_ids in sorted_groups.items():
-                for student_id in student_ids:
-        
-                    # Assign group number to each student
-                    db.execute("UPDATE student_group SET group_number = %s WHERE student_id = %s", (group_num, student_id))
+    # GET request - display teacher dashboard
+    return render_template("teacher.html", user_id=user_id, group_code=group_code, generate=generate,
+                           failed=submitted['failed'])
 
-            # Redirect to results page to view generated groups        
-            return redirect(url_for('show_results', user_id=session['user_id'], group_code=group_code, generate=generate))
 
-    # GET request - display teacher dashboard
-    return render_template("teacher.html", user_id=user_id, group_code=group_code, generate=generate)
+@app.route("/teacher/<int:user_id>/<string:group_code>/retry_extractions", methods=["POST"])
+def retry_extractions(user_id, group_code):
+    """
+    Queue the class's forms whose AI extraction failed (e.g. while Ollama
+    was down), or whose claim went stale, for another attempt, so they can
+    count towards group generation.
+    
+    Args:
+        user_id (int): Teacher's user ID
+        group_code (str): The group code for this class
+    
+    Returns:
+        Redirect to the teacher dashboard
+    """
+    db = get_db()
+    db.execute("""
+        SELECT sf.id
+        FROM student_form sf
+        JOIN student_group sg
+            ON sf.student_id = sg.student_id
+        WHERE sg.group_code = %s
+            AND (sf.extraction_status = 'failed'
+                 OR (sf.extraction_status = 'extracting'
+                     AND sf.extraction_started_at < NOW() - INTERVAL %s SECOND))
+    """, (group_code, EXTRACTION_STALE_AFTER))
+    for row in db.fetchall():
+        # Back to pending; skipped if another request or a worker got there first
+        db.execute("""
+            UPDATE student_form SET extraction_status = 'pending'
+            WHERE id = %s
+                AND (extraction_status = 'failed'
+                     OR (extraction_status = 'extracting'
+                         AND extraction_started_at < NOW() - INTERVAL %s SECOND))
+        """, (row['id'], EXTRACTION_STALE_AFTER))
+        if db.rowcount:
+            extraction.enqueue(row['id'])
+
+    return redirect(url_for('teacher_page', user_id=user_id, group_code=group_code))
+
+
+@app.route("/teacher/<int:user_id>/<string:group_code>/jobs/<string:job_id>")
+def generation_status(user_id, group_code, job_id):
+    """
+    Status of a group generation job, polled by the teacher dashboard.
+    
+    Args:
+        user_id (int): Teacher's user ID
+        group_code (str): The group code for this class
+        job_id (str): ID returned when generation was started
+    
+    Returns:
+        JSON with status (queued/running/done/failed), stage and progress (0-1);
+        includes the results page URL once the job is done
+    """
+    job = jobs.get(job_id)
+    if job is None or job['key'] != group_code:
+        return jsonify({"error": "Unknown job"}), 404
+
+    response = {
+        "job_id": job['id'],
+        "status": job['status'],
+        "stage": job['stage'],
+        "progress": job['progress'],
+        "error": job['error'],
+    }
+    if job['status'] == "done":
+        response["redirect"] = url_for('show_results', user_id=user_id, group_code=group_code, generate=True)
+    return jsonify(response)
+
+
+@app.route("/teacher/<int:user_id>/<string:group_code>/similar")
+def similar_students(user_id, group_code):
+    """
+    Classmates closest to one or more students' feature profile, so a teacher
+    can hand-adjust teams without rerunning the clustering.
+    Several students can be asked for at once (?student_id=12&student_id=15)
+    and are answered in one batched query.
+    
+    Args:
+        user_id (int): Teacher's user ID
+        group_code (str): The group code for this class
+    
+    Query parameters:
+        student_id (int): Student(s) to find teammates for
+        k (int): Results per student (default 5, at most similarity.MAX_K)
+    
+    Returns:
+        JSON with, per student ID, the most similar classmates (ID, name,
+        current group number, cosine similarity), best first
+    """
+    import similarity
+
+    try:
+        student_ids = [int(value) for value in request.args.getlist("student_id")]
+        k = int(request.args.get("k", similarity.DEFAULT_K))
+    except ValueError:
+        return jsonify({"error": "student_id and k must be integers"}), 400
+    if not student_ids or k < 1:
+        return jsonify({"error": "Give at least one student_id and k >= 1"}), 400
+
+    db = get_db()
+    try:
+        results = similarity.similar_students(g.conn, group_code, student_ids, k)
+    except KeyError as e:
+        return jsonify({"error": "Students without extracted data in this class", "student_ids": e.args[0]}), 404
+
+    # Names and current groups of everyone in the results, in one query
+    found = sorted({student_id for matches in results.values() for student_id, _ in matches})
+    people = {}
+    if found:
+        db.execute(f"""
+            SELECT u.id, u.user_firstname, u.user_lastname, g.group_number
+            FROM users u
+            JOIN student_group g
+                ON g.student_id = u.id
+            WHERE g.group_code = %s AND u.id IN ({", ".join(["%s"] * len(found))})
+        """, [group_code] + found)
+        people = {row['id']: row for row in db.fetchall()}
+
+    return jsonify({
+        "group_code": group_code,
+        "k": min(k, similarity.MAX_K),
+        "results": {
+            str(student_id): [{
+                "student_id": match,
+                "name": f"{people[match]['user_firstname']} {people[match]['user_lastname']}" if match in people else None,
+                "group_number": people[match]['group_number'] if match in people else None,
+                "similarity": round(score, 4),
+            } for match, score in matches]
+            for student_id, matches in results.items()
+        },
+    })
+
+
+@app.route("/extraction/stats")
+def extraction_stats():
+    """
+    Extraction queue statistics (queue depth, counters, latency).
+    
+    Returns:
+        JSON: see extraction.stats(), plus the AI result cache counters and
+        how many extractions each tier (rules / cache / llm) answered and the
+        model backend's counters and breaker state per host
+    """
+    stats = extraction.stats()
+    stats["cache"] = ai_cache.stats()
+    stats["tiers"] = ai_micro.tier_stats()
+    stats["llm"] = llm_backend.get_backend().stats()
+    return jsonify(stats)
+
+
+@app.route("/db/stats")
+def db_stats():
+    """
+    Connection pool statistics (wait time, exhaustion events), for sizing the pool.
+    
+    Returns:
+        JSON: see db_pool.stats()
+    """
+    return jsonify(db_pool.stats())
 
 
 @app.route("/teacher/<int:user_id>/<string:group_code>/results", methods=["GET", "POST"])
@@ -0,0 +1,209 @@
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linear_sum_assignment
+
+# ===================================
+# Size-constrained assignment of students to cluster centers
+# ===================================
+# "exact"  - Hungarian algorithm on slot-expanded centers: every center j is
+#            repeated target_sizes[j] times, so a one-to-one matching of
+#            students to slots is exactly an assignment that honours the
+#            group sizes with the minimum total distance.
+# "greedy" - the original approach: walk all (student, center) pairs from
+#            closest to farthest and fill groups until they are full.
+# "auto"   - exact up to EXACT_MAX_STUDENTS, greedy above it (the slot matrix
+#            is n x n, so the exact solver gets too slow for huge cohorts).
+# ===================================
+
+METHODS = ("auto", "exact", "greedy")
+EXACT_MAX_STUDENTS = 3000
+
+
+def distance_matrix(features, centers):
+    """
+    Euclidean distance from every student to every center in one pass.
+    Uses |x - c|^2 = |x|^2 - 2 x.c + |c|^2 instead of a Python double loop.
+    Sparse features are never densified (only the result is dense).
+
+    Args:
+        features (ndarray or sparse matrix): (n_students, n_features) matrix
+        centers (ndarray): (n_clusters, n_features) matrix
+
+    Returns:
+        ndarray: (n_students, n_clusters) distance matrix
+    """
+    if sparse.issparse(features):
+        sq_features = np.asarray(features.multiply(features).sum(axis=1))
+    else:
+        sq_features = np.einsum("ij,ij->i", features, features)[:, None]
+    sq_centers = np.einsum("ij,ij->i", centers, centers)[None, :]
+    sq_dist = sq_features - 2.0 * (features @ centers.T) + sq_centers
+    # Rounding can leave tiny negative values for points sitting on a center
+    np.maximum(sq_dist, 0.0, out=sq_dist)
+    return np.sqrt(sq_dist)
+
+
+def greedy_assignment(distances, target_sizes):
+    """
+    Assign students greedily: best (student, center) pairs first.
+
+    Args:
+        distances (ndarray): (n_students, n_clusters) distance matrix
+        target_sizes (list): Required size of each group
+
+    Returns:
+        ndarray: Cluster index for each student
+    """
+    n_samples, n_clusters = distances.shape
+    assignments = np.full(n_samples, -1, dtype=int)
+    cluster_counts = np.zeros(n_clusters, dtype=int)
+    capacity = np.asarray(target_sizes, dtype=int)
+
+    # Stable sort keeps the original (student, center) order for ties
+    order = np.argsort(distances, axis=None, kind="stable")
+    remaining = n_samples
+    for user_idx, cluster_idx in zip(*np.unravel_index(order, distances.shape)):
+        # Skip users that already have a group and clusters that are full
+        if assignments[user_idx] >= 0 or cluster_counts[cluster_idx] >= capacity[cluster_idx]:
+            continue
+        assignments[user_idx] = cluster_idx
+        cluster_counts[cluster_idx] += 1
+        remaining -= 1
+        if remaining == 0:
+            break
+
+    # Only happens if the target sizes don't add up to the number of users
+    unassigned = np.where(assignments == -1)[0]
+    if len(unassigned) > 0:
+        print(f"Warning: {len(unassigned)} users unassigned, forcing assignment")
+        for user_idx in unassigned:
+            for cluster_idx in range(n_clusters):
+                if cluster_counts[cluster_idx] < capacity[cluster_idx]:
+                    assignments[user_idx] = cluster_idx
+                    cluster_counts[cluster_idx] += 1
+                    break
+
+    return assignments
+
+
+def exact_assignment(distances, target_sizes):
+    """
+    Minimum total distance assignment that fills every group to its size.
+
+    Args:
+        distances (ndarray): (n_students, n_clusters) distance matrix
+        target_sizes (list): Required size of each group
+
+    Returns:
+        ndarray: Cluster index for each student
+
+    Raises:
+        ValueError: If the groups don't have room for every student
+    """
+    sizes = np.asarray(target_sizes, dtype=int)
+    if sizes.sum() < distances.shape[0]:
+        raise ValueError(
+            f"Target sizes hold {sizes.sum()} students, need {distances.shape[0]}"
+        )
+
+    # One column per seat: center j appears target_sizes[j] times
+    slot_owner = np.repeat(np.arange(len(sizes)), sizes)
+    slot_costs = distances[:, slot_owner]
+
+    rows, cols = linear_sum_assignment(slot_costs)
+    assignments = np.empty(distances.shape[0], dtype=int)
+    assignments[rows] = slot_owner[cols]
+    return assignments
+
+
+def total_distance(distances, assignments):
+    """
+    Sum of distances from every student to their assigned center.
+
+    Args:
+        distances (ndarray): (n_students, n_clusters) distance matrix
+        assignments (ndarray): Cluster index for each student
+
+    Returns:
+        float: Total distance
+    """
+    return float(distances[np.arange(len(assignments)), assignments].sum())
+
+
+def resolve_method(method, n_samples):
+    """
+    Pick the concrete solver for a method name.
+
+    Args:
+        method (str): One of METHODS
+        n_samples (int): Number of students
+
+    Returns:
+        str: "exact" or "greedy"
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown assignment method {method!r}, expected one of {METHODS}")
+    if method == "auto":
+        return "exact" if n_samples <= EXACT_MAX_STUDENTS else "greedy"
+    return method
+
+
+def balanced_assignment(features, centers, target_sizes, method="auto", penalty=None):
+    """
+    Assign users to groups while respecting size constraints.
+
+    Args:
+        features (ndarray or sparse matrix): (n_students, n_features) matrix
+        centers (ndarray): (n_clusters, n_features) matrix
+        target_sizes (list): Required size of each group
+        method (str): "auto", "exact" or "greedy"
+        penalty (ndarray, optional): (n_students, n_clusters) extra cost of each
+            placement, in units of the median student-center distance
+
+    Returns:
+        tuple: (assignments, report) where report holds the method used,
+               the total distance (without penalty), the total penalty
+               and the runtime in seconds
+    """
+    start = time.perf_counter()
+    distances = distance_matrix(features, centers)
+    used = resolve_method(method, len(distances))
+
+    costs = distances
+    if penalty is not None:
+        # Scaled to the distances so a weight means the same for every class
+        costs = distances + np.median(distances) * penalty
+
+    if used == "exact":
+        assignments = exact_assignment(costs, target_sizes)
+    else:
+        assignments = greedy_assignment(costs, target_sizes)
+
+    distance = total_distance(distances, assignments)
+    report = {
+        "method": used,
+        "total_distance": distance,
+        "total_penalty": total_distance(costs, assignments) - distance,
+        "runtime": time.perf_counter() - start,
+    }
+    return assignments, report
+
+
+def compare_methods(features, centers, target_sizes):
+    """
+    Run both solvers on the same input so their results can be compared.
+
+    Args:
+        features (ndarray): (n_students, n_features) matrix
+        centers (ndarray): (n_clusters, n_features) matrix
+        target_sizes (list): Required size of each group
+
+    Returns:
+        dict: Report of each method keyed by method name
+    """
+    return {
+        method: balanced_assignment(features, centers, target_sizes, method)[1]
+        for method in ("greedy", "exact")
+    }
@@ -0,0 +1,87 @@
+"""
+Throughput of batched skill/interest extraction (ai_micro.get_ai_json_batch)
+per batch size, against the stub Ollama server (no model needed).
+
+The stub answers batch prompts with a JSON array (one element per student)
+and single prompts with one object, so every student goes through the
+same parsing and validation as with a real model.
+
+Usage:
+    python benchmarks/bench_batch_extraction.py [--students 64] [--batch-sizes 1 4 8 16]
+                                                [--output results.json]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stub_ollama   # noqa: E402
+
+STUDENT_RESULT = {"skills": ["python", "sql"], "interests": ["machine learning"]}
+
+
+def stub_reply(body):
+    """Answer like the model would: an array for batch prompts, an object otherwise."""
+    prompt = body["messages"][-1]["content"]
+    count = len(re.findall(r"^Student \d+:", prompt, flags=re.MULTILINE))
+    if count:
+        items = [dict(STUDENT_RESULT, student=i) for i in range(1, count + 1)]
+        return "```json\n" + json.dumps(items) + "\n```"
+    return "```json\n" + json.dumps(STUDENT_RESULT) + "\n```"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched LLM extraction")
+    parser.add_argument("--students", type=int, default=64)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    server, host = stub_ollama.start_in_thread(reply=stub_reply, token_delay=args.token_delay,
+                                                first_token_delay=args.first_token_delay)
+    os.environ["OLLAMA_HOST"] = host
+    cache_dir = tempfile.mkdtemp()
+
+    import ai_cache
+    import ai_micro
+
+    results = []
+    for run, batch_size in enumerate(args.batch_sizes):
+        # Fresh cache file and unique answers so nothing is served from the cache
+        ai_cache.CACHE_PATH = os.path.join(cache_dir, f"cache{run}.sqlite3")
+        ai_cache._local.conn = None
+        ai_cache._memory.clear()
+        answers = [(f"python and sql {run}-{i}", f"machine learning {run}-{i}") for i in range(args.students)]
+
+        calls_before = len(server.RequestHandlerClass.requests)
+        start = time.perf_counter()
+        ai_micro.get_ai_json_batch(answers, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        calls = len(server.RequestHandlerClass.requests) - calls_before
+
+        result = {
+            "batch_size": batch_size,
+            "students": args.students,
+            "llm_calls": calls,
+            "seconds": round(elapsed, 4),
+            "students_per_second": round(args.students / elapsed, 2),
+        }
+        print(f"batch size {batch_size:>3}: {calls} calls, {elapsed:.2f}s, "
+              f"{result['students_per_second']:.1f} students/s")
+        results.append(result)
+
+    server.shutdown()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
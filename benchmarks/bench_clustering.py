@@ -0,0 +1,172 @@
+"""
+Benchmark of the clustering pipeline (sort_alg.sort_groups) across cohort sizes.
+
+Runs fully offline: cohorts are synthetic and a stub embedding table
+replaces GloVe (pass --glove to use the real model). Every stage of
+sort_groups is timed separately and peak memory is measured in a second,
+traced pass (tracemalloc slows Python code down, so it is kept out of the
+timed run). Results are written as JSON so runs can be diffed between commits.
+
+Usage:
+    python benchmarks/bench_clustering.py [--sizes 50 1000 5000] [--groups 2-4 3-5]
+                                          [--repeat 3] [--output results.json]
+    python benchmarks/bench_clustering.py --full     # 50 ... 100k students
+    python benchmarks/bench_clustering.py --sizes 20000 --engines kmeans kmeans++ minibatch
+    python benchmarks/bench_clustering.py --sizes 50000 --groups 900-1000 --vocabulary 2000 --repeat 1
+"""
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np        # noqa: E402
+import sklearn            # noqa: E402
+
+import sort_alg           # noqa: E402
+import synthetic          # noqa: E402
+
+DEFAULT_SIZES = [50, 1000, 5000]
+FULL_SIZES = [50, 1000, 5000, 20000, 100000]
+DEFAULT_GROUPS = ["2-4", "3-5", "4-6"]
+
+
+def git_commit():
+    """Current commit hash (None outside a git checkout)."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_once(users, min_group, max_group, model, options):
+    """Run sort_groups on a copy of the cohort; returns (report, wall seconds)."""
+    data = copy.deepcopy(users)
+    report = {}
+    start = time.perf_counter()
+    # sort_groups prints its configuration - keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        sort_alg.sort_groups(min_group, max_group, data, report=report, model=model, **options)
+    return report, time.perf_counter() - start
+
+
+def peak_memory(users, min_group, max_group, model, options):
+    """Peak bytes allocated during one traced run."""
+    data = copy.deepcopy(users)
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            sort_alg.sort_groups(min_group, max_group, data, model=model, **options)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark(sizes, group_settings, repeat, model, precomputed, measure_memory, options, engines=("auto",),
+              vocabulary=None):
+    runs = []
+    for n_students in sizes:
+        users = synthetic.make_cohort(n_students, precomputed=precomputed, model=model,
+                                      interest_vocabulary=vocabulary)
+        for setting, engine in [(setting, engine) for setting in group_settings for engine in engines]:
+            min_group, max_group = (int(x) for x in setting.split("-"))
+            options = dict(options, engine_options=dict(options.get("engine_options") or {}, engine=engine))
+
+            reports, walls = [], []
+            for _ in range(repeat):
+                report, wall = run_once(users, min_group, max_group, model, options)
+                reports.append(report)
+                walls.append(wall)
+
+            # Median over repeats for every stage
+            timings = {stage: statistics.median(r["timings"][stage] for r in reports)
+                       for stage in reports[0]["timings"]}
+            run = {
+                "students": n_students,
+                "min_group": min_group,
+                "max_group": max_group,
+                "n_groups": reports[0]["n_groups"],
+                "timings": {stage: round(seconds, 6) for stage, seconds in timings.items()},
+                "total": round(statistics.median(walls), 6),
+                "assignment_method": reports[0]["assignment"]["method"],
+                "total_distance": round(reports[0]["assignment"]["total_distance"], 4),
+                "engine": reports[0]["clustering"]["engine"],
+                "inertia": round(reports[0]["clustering"]["inertia"], 4),
+            }
+            if measure_memory:
+                run["peak_memory_bytes"] = peak_memory(users, min_group, max_group, model, options)
+
+            stages = ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in timings.items())
+            memory = f", peak {run['peak_memory_bytes'] / 2**20:.1f} MiB" if measure_memory else ""
+            print(f"{n_students:>7} students {setting} {run['engine']}: total {run['total']:.3f}s "
+                  f"({stages}), inertia {run['inertia']:.1f}{memory}")
+            runs.append(run)
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the clustering pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None,
+                        help=f"Cohort sizes (default {DEFAULT_SIZES})")
+    parser.add_argument("--full", action="store_true", help=f"Use sizes {FULL_SIZES}")
+    parser.add_argument("--groups", nargs="+", default=DEFAULT_GROUPS,
+                        help="min-max group size settings, e.g. 3-5")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per setting (median is reported)")
+    parser.add_argument("--precomputed", action="store_true",
+                        help="Rows carry stored feature vectors (skips parsing/embedding of skills)")
+    parser.add_argument("--assignment", default="auto", help="Assignment method: auto, exact or greedy")
+    parser.add_argument("--engines", nargs="+", default=["auto"],
+                        help="Clustering engines to compare: auto, kmeans, kmeans++, minibatch")
+    parser.add_argument("--threads", type=int, help="Thread limit for the clustering engine")
+    parser.add_argument("--vocabulary", type=int,
+                        help="Distinct interest phrases to draw from (default: the 15 base phrases)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory pass")
+    parser.add_argument("--glove", action="store_true", help="Use the real GloVe model instead of the stub")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    sizes = args.sizes or (FULL_SIZES if args.full else DEFAULT_SIZES)
+    if args.glove:
+        import embeddings
+        model = embeddings.get_model()
+    else:
+        model = synthetic.StubKeyedVectors()
+    options = {"assignment_method": args.assignment}
+    if args.threads:
+        options["engine_options"] = {"threads": args.threads}
+
+    runs = benchmark(sizes, args.groups, args.repeat, model, args.precomputed,
+                     not args.no_memory, options, args.engines,
+                     synthetic.interest_vocabulary(args.vocabulary) if args.vocabulary else None)
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "embedding": "glove" if args.glove else "stub",
+        "precomputed": args.precomputed,
+        "vocabulary": args.vocabulary,
+        "options": options,
+        "runs": runs,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Startup import cost of the app (python -X importtime), checked against a
+budget. Exits with status 1 when the import takes longer than --budget-ms
+or pulls in one of the --forbid modules (numpy, scipy, scikit-learn,
+gensim, the ollama client), which app.py defers until first use (see
+preload() in app.py). Run it in CI or before merging changes to the
+imports of app.py.
+
+Each run is a fresh interpreter importing --module; the median of --repeat
+runs is compared with the budget (the first run also compiles .pyc files
+and warms the disk cache, so it is reported separately). The breakdown
+lists the modules --module imports directly, by cumulative time.
+
+Usage:
+    python benchmarks/bench_import_time.py [--module app] [--repeat 5] [--budget-ms 500]
+                                           [--forbid numpy scipy ...] [--top 10] [--output results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FORBIDDEN = ["numpy", "scipy", "sklearn", "gensim", "ollama"]
+
+
+def import_tree(module):
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        list: (depth, name, self_us, cumulative_us) of the module and everything
+              it imported, in import order (the module itself last, depth 0)
+    """
+    env = dict(os.environ, APP_PRELOAD="0")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    tree = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        tree.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+
+    # Children are listed before their parent: the module's subtree starts
+    # after the previous top-level entry (interpreter startup imports come first)
+    end = max(i for i, (depth, name, _, _) in enumerate(tree) if depth == 0 and name == module)
+    start = max((i + 1 for i, (depth, _, _, _) in enumerate(tree[:end]) if depth == 0), default=0)
+    return tree[start:end + 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the app's import time against a budget")
+    parser.add_argument("--module", default="app", help="Module to import (default: app)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=500.0, help="Median import time allowed")
+    parser.add_argument("--forbid", nargs="*", default=FORBIDDEN, help="Top-level packages that must not be imported")
+    parser.add_argument("--top", type=int, default=10, help="Direct imports listed in the breakdown")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    runs = [import_tree(args.module) for _ in range(max(1, args.repeat))]
+    totals = [tree[-1][3] / 1000 for tree in runs]
+    median_ms = statistics.median(totals)
+
+    # Breakdown of the last run: what the module itself imports, heaviest first
+    tree = runs[-1]
+    direct = sorted(((name, cumulative / 1000) for depth, name, _, cumulative in tree if depth == 1),
+                    key=lambda item: -item[1])
+    own_ms = tree[-1][2] / 1000
+    imported = {name.split(".")[0] for _, name, _, _ in tree}
+    forbidden = sorted(imported & set(args.forbid))
+
+    print(f"import {args.module}: median {median_ms:.1f}ms over {len(totals)} runs "
+          f"(first {totals[0]:.1f}ms), budget {args.budget_ms:.0f}ms")
+    print(f"  {args.module} itself (module-level code): {own_ms:.1f}ms")
+    for name, ms in direct[:args.top]:
+        print(f"  {name:30s} {ms:8.1f}ms")
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f"median import time {median_ms:.1f}ms is over the {args.budget_ms:.0f}ms budget")
+    if forbidden:
+        failures.append(f"imports deferred modules at startup: {', '.join(forbidden)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"module": args.module, "median_ms": round(median_ms, 1),
+                       "runs_ms": [round(total, 1) for total in totals], "budget_ms": args.budget_ms,
+                       "module_level_ms": round(own_ms, 1),
+                       "direct_imports_ms": {name: round(ms, 1) for name, ms in direct},
+                       "forbidden_imported": forbidden, "failures": failures}, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
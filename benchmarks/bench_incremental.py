@@ -0,0 +1,93 @@
+"""
+Late-student placement (incremental.py) vs a full sort_groups rerun,
+offline on a synthetic class with stub embeddings.
+
+A class of --students is grouped once; then --late students arrive one by
+one. Each is placed against the stored centers (no database: the same
+class_vectors + plan_placement steps place_student runs inside its
+transaction) and, for comparison, the whole class is regrouped. When no
+group has room the benchmark continues from the full run, like the app.
+
+Usage:
+    python benchmarks/bench_incremental.py [--students 200] [--late 20]
+                                           [--min 3] [--max 6] [--output results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import incremental   # noqa: E402
+import sort_alg      # noqa: E402
+import synthetic     # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark late-student placement")
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--late", type=int, default=20)
+    parser.add_argument("--min", type=int, default=3)
+    parser.add_argument("--max", type=int, default=6)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    model = synthetic.StubKeyedVectors()
+    cohort = synthetic.make_cohort(args.students + args.late, precomputed=True, model=model)
+    members, late = cohort[:args.students], cohort[args.students:]
+
+    report = {}
+    groups = sort_alg.sort_groups(args.min, args.max, [dict(row) for row in members], report=report, model=model)
+    centers, vocabulary = report["centers"], report["interest_vocabulary"]
+    group_of = {student_id: number - 1 for number, ids in groups.items() for student_id in ids}
+
+    incremental_times, full_times, statuses = [], [], []
+    for newcomer in late:
+        start = time.perf_counter()
+        plan = incremental.plan_placement(
+            incremental.class_vectors([newcomer], vocabulary)[0], centers,
+            incremental.class_vectors(members, vocabulary),
+            np.array([group_of[row["id"]] for row in members], dtype=int),
+            np.bincount(list(group_of.values()), minlength=len(centers)), args.max)
+        incremental_times.append(time.perf_counter() - start)
+
+        if plan is not None:
+            statuses.append("repaired" if len(plan) > 1 else "placed")
+            for member, group in plan:
+                student_id = newcomer["id"] if member == incremental.NEWCOMER else members[member]["id"]
+                group_of[student_id] = int(group)
+        members.append(newcomer)
+
+        start = time.perf_counter()
+        report = {}
+        groups = sort_alg.sort_groups(args.min, args.max, [dict(row) for row in members], report=report, model=model)
+        full_times.append(time.perf_counter() - start)
+
+        if plan is None:
+            # No group had room: the app regenerates the class, so continue from that run
+            statuses.append("fallback")
+            centers, vocabulary = report["centers"], report["interest_vocabulary"]
+            group_of = {student_id: number - 1 for number, ids in groups.items() for student_id in ids}
+
+    results = {
+        "students": args.students,
+        "late": args.late,
+        "incremental_median_ms": round(statistics.median(incremental_times) * 1000, 3),
+        "full_median_ms": round(statistics.median(full_times) * 1000, 3),
+        "statuses": {status: statuses.count(status) for status in sorted(set(statuses))},
+    }
+    print(f"incremental placement: {results['incremental_median_ms']:.2f}ms median, "
+          f"full rerun: {results['full_median_ms']:.2f}ms median")
+    print(f"outcomes: {results['statuses']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+A submission spike against one slow model server, with and without the
+backend's limits (llm_backend.py), fully in-process with FakeBackend.
+
+--callers threads each extract one student at once. The fake server works
+on --server-parallel requests at a time (like a single Ollama) and every
+request takes --latency seconds; --malformed of the answers are cut-off
+JSON. Two setups are compared:
+
+    unbounded  - every caller goes straight to the server and malformed
+                 answers are not retried (the old ai_micro behaviour)
+    bounded    - at most --concurrency requests in flight, a --deadline per
+                 call, and malformed answers retried
+
+Reported per setup: answered / failed callers, latency percentiles of the
+answered ones, and server seconds spent on answers nobody used (requests
+finished after their caller's deadline).
+
+Usage:
+    python benchmarks/bench_llm_backend.py [--callers 64] [--latency 0.05] [--deadline 2]
+                                           [--concurrency 4] [--malformed 0.1] [--output results.json]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_backend   # noqa: E402
+
+PROMPT = "Student skills input: python, sql {i}\nStudent interests input: machine learning"
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run(backend, callers, deadline):
+    """Start every caller at once; returns per-caller (seconds, ok, finished after deadline)."""
+    results = [None] * callers
+    barrier = threading.Barrier(callers)
+
+    def caller(i):
+        barrier.wait()
+        start = time.perf_counter()
+        ok = True
+        try:
+            backend.complete("bench", "fake", [{"role": "user", "content": PROMPT.format(i=i)}],
+                             parse=json.loads)
+        except (llm_backend.LLMError, ValueError):
+            ok = False
+        seconds = time.perf_counter() - start
+        results[i] = (seconds, ok and seconds <= deadline)
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LLM backend under a spike")
+    parser.add_argument("--callers", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per request on the server")
+    parser.add_argument("--server-parallel", type=int, default=1)
+    parser.add_argument("--deadline", type=float, default=2.0, help="Seconds a caller waits for an answer")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--malformed", type=float, default=0.1)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    setups = {
+        # No client-side limit and no retries; the deadline is only checked by the caller
+        "unbounded": dict(max_concurrency=args.callers, retries=0, timeout=3600),
+        "bounded": dict(max_concurrency=args.concurrency, timeout=args.deadline, backoff=0.01),
+    }
+    output = {"callers": args.callers, "latency": args.latency, "deadline": args.deadline, "setups": {}}
+    for name, options in setups.items():
+        backend = llm_backend.FakeBackend(latency=args.latency, malformed_rate=args.malformed,
+                                          server_parallel=args.server_parallel, seed=1, **options)
+        start = time.perf_counter()
+        results = run(backend, args.callers, args.deadline)
+        elapsed = time.perf_counter() - start
+
+        answered = [seconds for seconds, ok in results if ok]
+        server_seconds = len(backend.requests) * args.latency
+        useful_seconds = len(answered) * args.latency
+        stats = backend.stats()
+        entry = {
+            "answered": len(answered),
+            "failed": args.callers - len(answered),
+            "requests": len(backend.requests),
+            "retries": stats["retries"],
+            "rejected_busy": stats["rejected_busy"],
+            "p50_ms": round(percentile(answered, 0.5) * 1000, 1) if answered else None,
+            "p99_ms": round(percentile(answered, 0.99) * 1000, 1) if answered else None,
+            # Server work on requests whose answer was late, malformed or retried
+            "wasted_server_seconds": round(server_seconds - useful_seconds, 3),
+            "seconds": round(elapsed, 3),
+        }
+        output["setups"][name] = entry
+        print(f"{name:9s}: {entry['answered']}/{args.callers} answered in time, "
+              f"p50 {entry['p50_ms']}ms, p99 {entry['p99_ms']}ms, {entry['requests']} requests "
+              f"({entry['retries']} retries, {entry['rejected_busy']} rejected), "
+              f"{entry['wasted_server_seconds']}s server time wasted")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
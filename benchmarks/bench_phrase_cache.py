@@ -0,0 +1,104 @@
+"""
+Skill embedding of a class through the phrase cache (phrase_cache.py) vs
+the old per-student loop, offline with a stub embedding table.
+
+Every student of a synthetic class is embedded (as if none had a stored
+vector) four ways:
+
+    uncached     - the old loop: tokenize and look up every phrase of every student
+    cold         - empty cache: every distinct phrase is embedded once, in one gather
+    warm disk    - in-memory LRU cleared, vectors read back from the SQLite table
+                   (a new worker process)
+    warm memory  - everything in the LRU (a later run in the same process)
+
+Usage:
+    python benchmarks/bench_phrase_cache.py [--students 5000] [--repeat 5] [--output results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["PHRASE_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "phrase_cache.sqlite3")
+
+import features       # noqa: E402
+import phrase_cache   # noqa: E402
+import synthetic      # noqa: E402
+
+
+def uncached_embedding(words, model):
+    """The pre-cache features.average_embedding, for comparison."""
+    vecs = []
+    for w in words:
+        parts = w.lower().split()
+        part_vecs = [model[word] for word in parts if word in model]
+        if part_vecs:
+            vecs.append(np.mean(part_vecs, axis=0))
+    if vecs:
+        return np.mean(vecs, axis=0)
+    return np.zeros(model.vector_size)
+
+
+def reset(disk):
+    """Empty the in-memory LRU (and the SQLite table if disk is set)."""
+    phrase_cache._memory.clear()
+    if disk:
+        with phrase_cache._connection() as conn:
+            conn.execute("DELETE FROM phrase_vectors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the phrase embedding cache")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    model = synthetic.StubKeyedVectors()
+    skill_lists = [json.loads(row["skills"]) for row in synthetic.make_cohort(args.students)]
+
+    def uncached():
+        return np.array([uncached_embedding(skills, model) for skills in skill_lists])
+
+    def cached():
+        report = {}
+        return features.average_embeddings(skill_lists, model, report=report), report
+
+    scenarios = {
+        "uncached": (lambda: None, uncached),
+        "cold": (lambda: reset(disk=True), cached),
+        "warm_disk": (lambda: reset(disk=False), cached),
+        "warm_memory": (lambda: None, cached),
+    }
+    expected = uncached()
+    results = {"students": args.students, "scenarios": {}}
+    for name, (prepare, run) in scenarios.items():
+        times = []
+        for _ in range(args.repeat):
+            prepare()
+            start = time.perf_counter()
+            output = run()
+            times.append(time.perf_counter() - start)
+        entry = {"median_ms": round(statistics.median(times) * 1000, 3)}
+        if name != "uncached":
+            matrix, report = output
+            entry["max_abs_diff"] = float(np.abs(matrix - expected).max())
+            entry["cache"] = {key: report[key] for key in ("phrases", "memory_hits", "disk_hits", "misses")}
+        results["scenarios"][name] = entry
+        print(f"{name:12s} {entry['median_ms']:9.2f}ms  {entry.get('cache', '')}")
+
+    print(f"overall: {phrase_cache.stats()}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Accuracy and latency of the rule-based extraction tier (lexicon.py)
+against what the model answers for the same students.
+
+data/extraction_inputs.jsonl holds the student answers (skills_text,
+interests_text). The reference is the model's own output for them,
+recorded once with Ollama running:
+
+    python benchmarks/bench_rule_tier.py --record
+
+which runs every input through ai_micro.get_ai_json (rules off, empty
+cache) and writes data/extraction_recorded.jsonl, one line per student:
+    {"skills_text": ..., "interests_text": ..., "skills": [...], "interests": [...],
+     "llm_seconds": ..., "model": ..., "prompt_version": ...}
+
+Commit the recording next to the inputs and record again after changing
+the model or the prompt (the benchmark warns when they don't match).
+Without a recording only coverage and latency are reported. The app keeps
+the rule tier off (AI_RULE_TIER) until this shows it agrees with the model.
+
+For every answer the rules accept, the items are compared with the
+reference as sets (precision / recall / exact match). Answers the rules
+pass on go to the LLM in the app, so they count towards coverage only.
+
+Usage:
+    python benchmarks/bench_rule_tier.py [--inputs FILE] [--reference FILE] [--repeat 200] [--output results.json]
+    python benchmarks/bench_rule_tier.py --record [--reference FILE]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lexicon   # noqa: E402
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+INPUTS = os.path.join(DATA, "extraction_inputs.jsonl")
+RECORDED = os.path.join(DATA, "extraction_recorded.jsonl")
+
+
+def load(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record(samples, path):
+    """Run every input through the LLM (no rules, empty cache) and store its answers."""
+    os.environ["AI_RULE_TIER"] = "0"
+    os.environ["AI_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "ai_cache.sqlite3")
+    import ai_micro
+
+    with open(path, "w") as f:
+        for sample in samples:
+            start = time.perf_counter()
+            data = ai_micro.get_ai_json(sample["skills_text"], sample["interests_text"])
+            seconds = time.perf_counter() - start
+            data = ai_micro.validate_extraction(data) or {"skills": [], "interests": []}
+            f.write(json.dumps({"skills_text": sample["skills_text"], "interests_text": sample["interests_text"],
+                                "skills": data["skills"], "interests": data["interests"],
+                                "llm_seconds": round(seconds, 4), "model": ai_micro.MODEL,
+                                "prompt_version": ai_micro.PROMPT_VERSION}) + "\n")
+            print(f"recorded in {seconds:.2f}s: {data}")
+    print(f"Wrote {len(samples)} model answers to {path}")
+
+
+def load_reference(path):
+    """
+    Recorded model answers keyed by input, or None if there is no recording.
+    Warns when it was recorded with another model or prompt than the current ones.
+    """
+    if not os.path.exists(path):
+        return None
+    import ai_micro
+
+    reference = load(path)
+    versions = {(row.get("model"), row.get("prompt_version")) for row in reference}
+    if versions != {(ai_micro.MODEL, ai_micro.PROMPT_VERSION)}:
+        print(f"WARNING: {os.path.basename(path)} was recorded with {sorted(versions, key=str)}, "
+              f"current is {(ai_micro.MODEL, ai_micro.PROMPT_VERSION)}; record it again with --record")
+    return {(row["skills_text"], row["interests_text"]): row for row in reference}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rule-based extraction tier")
+    parser.add_argument("--inputs", default=INPUTS, help="Student answers (JSONL)")
+    parser.add_argument("--reference", default=RECORDED, help="Recorded model answers (JSONL)")
+    parser.add_argument("--record", action="store_true", help="Record live model answers for the inputs as the reference")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    samples = load(args.inputs)
+    if args.record:
+        record(samples, args.reference)
+        return
+
+    reference = load_reference(args.reference)
+    if reference is None:
+        print(f"No recorded model answers in {args.reference}: reporting coverage and latency only "
+              f"(record them with --record while Ollama is running)")
+    else:
+        missing = [sample["skills_text"] for sample in samples
+                   if (sample["skills_text"], sample["interests_text"]) not in reference]
+        if missing:
+            sys.exit(f"{len(missing)} inputs have no recorded answer (e.g. {missing[0]!r}); record again with --record")
+
+    accepted = exact = 0
+    true_positives = predicted = expected = 0
+    deferred = []
+    for sample in samples:
+        result = lexicon.extract(sample["skills_text"].lower(), sample["interests_text"].lower())
+        if result is None:
+            deferred.append(sample["skills_text"])
+            continue
+        accepted += 1
+        if reference is None:
+            continue
+        answer = reference[(sample["skills_text"], sample["interests_text"])]
+        same = True
+        for field in ("skills", "interests"):
+            got, want = set(result[field]), set(answer[field])
+            true_positives += len(got & want)
+            predicted += len(got)
+            expected += len(want)
+            same = same and got == want
+        exact += same
+
+    # Time per student of the rules tier, over every sample
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for sample in samples:
+            lexicon.extract(sample["skills_text"].lower(), sample["interests_text"].lower())
+    rules_ms = (time.perf_counter() - start) / (args.repeat * len(samples)) * 1000
+
+    llm_seconds = [row["llm_seconds"] for row in reference.values()] if reference else []
+    results = {
+        "inputs": os.path.basename(args.inputs),
+        "reference": os.path.basename(args.reference) if reference is not None else None,
+        "samples": len(samples),
+        "rules_coverage": round(accepted / len(samples), 4),
+        "rules_exact_match": round(exact / accepted, 4) if reference and accepted else None,
+        "rules_precision": round(true_positives / predicted, 4) if predicted else None,
+        "rules_recall": round(true_positives / expected, 4) if expected else None,
+        "rules_ms_per_student": round(rules_ms, 4),
+        "llm_ms_per_student": round(statistics.median(llm_seconds) * 1000, 1) if llm_seconds else None,
+        "deferred_to_llm": deferred,
+    }
+    print(f"{results['samples']} students ({results['inputs']}): rules answered "
+          f"{accepted} ({results['rules_coverage']:.0%})")
+    if reference is not None:
+        print(f"against the model's answers ({results['reference']}): exact match {results['rules_exact_match']}, "
+              f"precision {results['rules_precision']}, recall {results['rules_recall']}")
+    print(f"rules: {rules_ms:.4f}ms per student"
+          + (f", LLM: {results['llm_ms_per_student']}ms median" if llm_seconds else ""))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
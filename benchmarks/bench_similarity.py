@@ -0,0 +1,92 @@
+"""
+Latency of the "find teammates like me" index (similarity.py), offline on
+synthetic classes with stub embeddings.
+
+For each class size the index is built from the stored vectors, then
+timed for single queries, a batch of --batch queries and the incremental
+upsert of one new student. Results are checked against a float64
+brute-force ranking.
+
+Usage:
+    python benchmarks/bench_similarity.py [--sizes 1000 10000] [--k 5] [--batch 32]
+                                          [--repeat 50] [--output results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import features     # noqa: E402
+import similarity   # noqa: E402
+import synthetic    # noqa: E402
+
+
+def median_ms(run, repeat):
+    """Median wall time of run() in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return round(statistics.median(times) * 1000, 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the similarity index")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    model = synthetic.StubKeyedVectors()
+    results = []
+    for size in args.sizes:
+        cohort = synthetic.make_cohort(size + 1, precomputed=True, model=model)
+        ids = [row["id"] for row in cohort]
+        vectors = features.from_blobs([row["feature_vector"] for row in cohort])
+
+        start = time.perf_counter()
+        index = similarity.VectorIndex(size)
+        index.upsert(ids[:size], vectors[:size])
+        build_ms = round((time.perf_counter() - start) * 1000, 4)
+
+        rng = np.random.default_rng(0)
+        batch = rng.choice(ids[:size], args.batch, replace=False).tolist()
+        single_ms = median_ms(lambda: index.query(batch[:1], args.k), args.repeat)
+        batch_ms = median_ms(lambda: index.query(batch, args.k), args.repeat)
+        upsert_ms = median_ms(lambda: index.upsert(ids[size:], vectors[size:]), args.repeat)
+
+        # Brute force in float64 over the same students
+        normalized = vectors.astype(np.float64)
+        normalized /= np.linalg.norm(normalized, axis=1, keepdims=True)
+        agree = 0
+        for student_id, matches in zip(batch, index.query(batch, args.k)):
+            row = ids.index(student_id)
+            scores = normalized @ normalized[row]
+            scores[row] = -np.inf
+            best = np.argsort(-scores, kind="stable")[:args.k]
+            agree += np.allclose(sorted(scores[best]), sorted(score for _, score in matches), atol=1e-5)
+
+        result = {"students": size, "build_ms": build_ms, "single_query_ms": single_ms,
+                  f"batch_{args.batch}_ms": batch_ms, "upsert_one_ms": upsert_ms,
+                  "matches_brute_force": f"{agree}/{len(batch)}"}
+        results.append(result)
+        print(f"{size:6d} students: build {build_ms:.2f}ms, 1 query {single_ms:.3f}ms, "
+              f"{args.batch} queries {batch_ms:.3f}ms, upsert {upsert_ms:.3f}ms, "
+              f"brute-force agreement {result['matches_brute_force']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
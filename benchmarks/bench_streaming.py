@@ -0,0 +1,95 @@
+"""
+Benchmark of streamed vs buffered skill/interest extraction against the
+stub Ollama server (no model needed).
+
+Buffered is the old path: wait for the whole completion, strip the fences,
+parse. Streamed is ai_micro.get_ai_json: the first progress callback is the
+time-to-first-feedback and the call returns as soon as the JSON object closes.
+
+Usage:
+    python benchmarks/bench_streaming.py [--runs 10] [--token-delay 0.02] [--output results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stub_ollama   # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streamed LLM extraction")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    server, host = stub_ollama.start_in_thread(token_delay=args.token_delay,
+                                                first_token_delay=args.first_token_delay)
+    # Must be set before the ollama client is created (on import of ai_micro)
+    os.environ["OLLAMA_HOST"] = host
+    os.environ["AI_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "ai_cache.sqlite3")
+
+    import ollama
+    import ai_micro
+
+    buffered_total, streamed_first, streamed_total = [], [], []
+    for run in range(args.runs):
+        # Unique text per run so the result cache never answers
+        skills, interests = f"python and sql {run}", f"machine learning {run}"
+        prompt = ai_micro.JSON_PROMPT.format(skills=skills, interests=interests)
+
+        start = time.perf_counter()
+        response = ollama.chat(model=ai_micro.MODEL, messages=[{'role': 'user', 'content': prompt}])
+        text = response.message.content
+        if text.startswith("```json"):
+            text = text[len("```json"):]
+        text = text.strip()
+        if text.endswith("```"):
+            text = text[:-len("```")]
+        # The old path fails on trailing prose; the stub always sends some
+        try:
+            json.loads(text.strip())
+        except json.JSONDecodeError:
+            pass
+        buffered_total.append(time.perf_counter() - start)
+
+        first = []
+        start = time.perf_counter()
+        ai_micro.get_ai_json(skills, interests,
+                             on_progress=lambda received: first or first.append(time.perf_counter() - start))
+        streamed_total.append(time.perf_counter() - start)
+        streamed_first.append(first[0])
+
+    results = {
+        "runs": args.runs,
+        "token_delay": args.token_delay,
+        "first_token_delay": args.first_token_delay,
+        "buffered": {
+            "first_feedback_median": round(statistics.median(buffered_total), 4),
+            "total_median": round(statistics.median(buffered_total), 4),
+        },
+        "streamed": {
+            "first_feedback_median": round(statistics.median(streamed_first), 4),
+            "total_median": round(statistics.median(streamed_total), 4),
+        },
+    }
+    server.shutdown()
+
+    print(f"buffered: first feedback {results['buffered']['first_feedback_median']:.3f}s, "
+          f"total {results['buffered']['total_median']:.3f}s")
+    print(f"streamed: first feedback {results['streamed']['first_feedback_median']:.3f}s, "
+          f"total {results['streamed']['total_median']:.3f}s")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Prompt size, latency and parse failures of the JSON-producing LLM calls
+before and after structured outputs and keep_alive, against the stub
+Ollama server (no model needed).
+
+    before  - the old free-form prompts (format spelled out in the prompt,
+              "no markdown" instructions), no format, no keep_alive
+    after   - ai_micro's trimmed prompts with its JSON schemas as format
+              and llm_backend.KEEP_ALIVE
+
+Submissions arrive --gap seconds apart. The stub unloads an idle model after
+--stub-keep-alive seconds (Ollama's 5 minute default, scaled down) and
+loading it again takes --load-delay seconds. Without format, --chatty of
+the stub's answers come wrapped in a fence and prose like a chatty model's;
+with format the stub returns only the JSON, as constrained decoding does.
+
+Each submission runs both calls the way ai_micro does: the extraction
+streamed and read up to the closing brace (get_ai_json), the availability
+buffered and parsed whole (time_ai). A parse failure is an answer the call
+would have had to ask for again.
+
+Usage:
+    python benchmarks/bench_structured_output.py [--runs 20] [--gap 0.3] [--chatty 0.3] [--output results.json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stub_ollama   # noqa: E402
+
+# The prompts before structured outputs, verbatim
+LEGACY_JSON_PROMPT = '''
+  You are analyzing student responses for a project team-matching system. Your task is to extract ONLY project-relevant skills and interests.
+
+STRICT RULES:
+1. Extract only technical skills, academic subjects, and project-related capabilities from skills
+2. Extract only project-related interests (e.g., "web development", "machine learning", "game design")
+3. IGNORE personal hobbies unrelated to projects (e.g., "hiking", "cooking", "sports")
+4. Convert all items to lowercase
+5. Remove duplicates
+6. If a student mentions many technical items but adds 1-2 unrelated hobbies, exclude those hobbies
+7. Focus on what indicates PROJECT preferences, not lifestyle preferences
+
+Student skills input: {skills}
+Student interests input: {interests}
+
+Respond ONLY with valid JSON in this exact format:
+{{"skills": ["skill1", "skill2"], "interests": ["interest1", "interest2"]}}
+
+If no valid project-related information exists, return: {{}}
+
+DO NOT include explanations, markdown, or any text outside the JSON object.
+      '''
+
+LEGACY_TIME_PROMPT = '''
+      You are a university student. Generate your weekly availability for project work as a JSON object.
+      Use this exact format: {"mon": [], "tue": [], "wed": [], "thu": [], "fri": [], "weekend": []}
+
+      For each day, include zero or more time slots from: "morning", "afternoon", "evening"
+      Make it realistic - students typically have 2-5 available slots across the week.
+
+      IMPORTANT: Return ONLY the JSON object, no explanations, no labels, no additional text.
+      Student availability:'''
+
+SKILLS = ["python, sql and some react", "java spring boot, docker", "c++ and unity game dev",
+          "pandas numpy and statistics", "html css javascript"]
+INTERESTS = ["machine learning", "web development, hiking", "game design", "data science", "cybersecurity"]
+
+
+def make_reply(chatty, seed):
+    """Stub reply function: the right JSON for the prompt, sometimes wrapped like a chatty model."""
+    import llm_backend
+
+    rng = random.Random(seed)
+
+    def reply(body):
+        prompt = body["messages"][-1]["content"]
+        # Same answers as the in-process fake backend
+        answer = llm_backend._fake_answer(prompt, rng.random())
+        if rng.random() < chatty:
+            answer = rng.choice([
+                "```json\n{}\n```\nI excluded personal hobbies as requested.",
+                "Here is the JSON you asked for:\n```json\n{}\n```",
+                "{}\n\nNote: every slot above is a typical student schedule.",
+            ]).format(answer)
+        return answer
+    return reply
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark structured outputs and keep_alive")
+    parser.add_argument("--runs", type=int, default=20, help="Submissions per setup")
+    parser.add_argument("--gap", type=float, default=0.3, help="Seconds between submissions")
+    parser.add_argument("--chatty", type=float, default=0.3, help="Share of free-form answers with prose")
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--prompt-token-delay", type=float, default=0.0005)
+    parser.add_argument("--load-delay", type=float, default=0.5)
+    parser.add_argument("--stub-keep-alive", type=float, default=0.2)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    server, host = stub_ollama.start_in_thread(
+        reply=make_reply(args.chatty, seed=1), token_delay=args.token_delay, first_token_delay=0.02,
+        prompt_token_delay=args.prompt_token_delay, load_delay=args.load_delay, keep_alive=args.stub_keep_alive)
+    os.environ["AI_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "ai_cache.sqlite3")
+
+    from ollama import Client
+    import ai_micro
+    import llm_backend
+
+    client = Client(host=host)
+    setups = {
+        "before": dict(json_prompt=LEGACY_JSON_PROMPT, time_prompt=LEGACY_TIME_PROMPT,
+                       extraction_format=None, time_format=None, keep_alive=None),
+        "after": dict(json_prompt=ai_micro.JSON_PROMPT, time_prompt=ai_micro.TIME_PROMPT,
+                      extraction_format=ai_micro.EXTRACTION_SCHEMA, time_format=ai_micro.AVAILABILITY_SCHEMA,
+                      keep_alive=llm_backend._keep_alive(llm_backend.KEEP_ALIVE)),
+    }
+
+    output = {"runs": args.runs, "gap": args.gap, "chatty": args.chatty, "setups": {}}
+    for name, setup in setups.items():
+        # Start every setup with the model unloaded
+        server.RequestHandlerClass.loaded.clear()
+        calls = {"extraction": [], "availability": []}
+        for run in range(args.runs):
+            time.sleep(args.gap)
+            prompt = setup["json_prompt"].format(skills=SKILLS[run % len(SKILLS)],
+                                                 interests=INTERESTS[run % len(INTERESTS)])
+
+            # get_ai_json: streamed, read up to the end of the JSON object
+            start = time.perf_counter()
+            stream = client.chat(model=ai_micro.MODEL, messages=[{"role": "user", "content": prompt}],
+                                 stream=True, format=setup["extraction_format"], keep_alive=setup["keep_alive"])
+            chunks = []
+
+            def pieces():
+                for chunk in stream:
+                    chunks.append(chunk)
+                    yield chunk.message.content or ""
+
+            text, complete = ai_micro.read_json_object(pieces())
+            try:
+                json.loads(text if complete else ai_micro._strip_fences(text))
+                ok = True
+            except ValueError:
+                ok = False
+            seconds = time.perf_counter() - start
+            # The token counts come with the last chunk
+            for chunk in stream:
+                chunks.append(chunk)
+            calls["extraction"].append((seconds, chunks[-1].prompt_eval_count, ok))
+
+            # time_ai: buffered, parsed whole
+            start = time.perf_counter()
+            response = client.chat(model=ai_micro.MODEL, messages=[{"role": "user", "content": setup["time_prompt"]}],
+                                   format=setup["time_format"], keep_alive=setup["keep_alive"])
+            try:
+                ai_micro.parse_json(response.message.content)
+                ok = True
+            except ValueError:
+                ok = False
+            calls["availability"].append((time.perf_counter() - start, response.prompt_eval_count, ok))
+
+        output["setups"][name] = {}
+        for call, results in calls.items():
+            entry = {
+                "prompt_tokens": statistics.median(tokens for _, tokens, _ in results),
+                "latency_median_ms": round(statistics.median(seconds for seconds, _, _ in results) * 1000, 1),
+                "latency_max_ms": round(max(seconds for seconds, _, _ in results) * 1000, 1),
+                "parse_failure_rate": round(sum(not ok for _, _, ok in results) / len(results), 3),
+            }
+            output["setups"][name][call] = entry
+            print(f"{name:6s} {call:12s}: {entry['prompt_tokens']:5.0f} prompt tokens, "
+                  f"median {entry['latency_median_ms']}ms, max {entry['latency_max_ms']}ms, "
+                  f"parse failures {entry['parse_failure_rate']:.0%}")
+
+    server.shutdown()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
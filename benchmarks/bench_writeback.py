@@ -0,0 +1,121 @@
+"""
+Benchmark of the group write-back: one UPDATE per student (old path)
+against group_store.write_assignments (one transaction, chunked UPDATEs).
+
+Needs the MySQL database from schema.sql and the usual .env settings.
+Creates throwaway students for each cohort size and deletes them afterwards.
+
+Usage:
+    python benchmarks/bench_writeback.py [--sizes 50 1000 10000] [--output results.json]
+"""
+import argparse
+import json
+import os
+import random
+import secrets
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import db_pool       # noqa: E402
+import group_store   # noqa: E402
+
+
+def create_cohort(conn, n_students):
+    """Insert a teacher, a class and n_students students; returns (group_code, teacher_id, student_ids)."""
+    cursor = conn.cursor()
+    group_code = "B" + "".join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(3))
+
+    cursor.execute("INSERT INTO users (user_firstname, user_lastname, user_type) VALUES ('Bench', 'Teacher', 1)")
+    teacher_id = cursor.lastrowid
+    cursor.execute("INSERT INTO teacher_group (teacher_id, total_students, group_code, min_students_per_group, max_students_per_group) VALUES (%s, %s, %s, 3, 5)",
+                   (teacher_id, n_students, group_code))
+
+    cursor.executemany("INSERT INTO users (user_firstname, user_lastname, user_type) VALUES (%s, %s, 0)",
+                       [("Bench", f"Student{i}") for i in range(n_students)])
+    cursor.execute("SELECT id FROM users WHERE user_firstname = 'Bench' AND user_type = 0 ORDER BY id DESC LIMIT %s", (n_students,))
+    student_ids = [row[0] for row in cursor.fetchall()]
+    cursor.executemany("INSERT INTO student_group (student_id, group_code) VALUES (%s, %s)",
+                       [(student_id, group_code) for student_id in student_ids])
+    cursor.close()
+    return group_code, teacher_id, student_ids
+
+
+def delete_cohort(conn, teacher_id, student_ids):
+    """Remove the throwaway users (student_group rows cascade)."""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM teacher_group WHERE teacher_id = %s", (teacher_id,))
+    for start in range(0, len(student_ids), 1000):
+        chunk = student_ids[start:start + 1000]
+        cursor.execute(f"DELETE FROM users WHERE id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+    cursor.execute("DELETE FROM users WHERE id = %s", (teacher_id,))
+    cursor.close()
+
+
+def random_groups(student_ids, group_size=4):
+    """Random assignment in the shape sort_groups returns."""
+    shuffled = random.sample(student_ids, len(student_ids))
+    groups = {}
+    for i, student_id in enumerate(shuffled):
+        groups.setdefault(i // group_size + 1, []).append(student_id)
+    return groups
+
+
+def per_row_writeback(conn, groups):
+    """The old write-back: one autocommitted UPDATE per student. Returns round trips."""
+    cursor = conn.cursor()
+    round_trips = 0
+    for group_num, student_ids in groups.items():
+        for student_id in student_ids:
+            cursor.execute("UPDATE student_group SET group_number = %s WHERE student_id = %s", (group_num, student_id))
+            round_trips += 1
+    cursor.close()
+    return round_trips
+
+
+def run(sizes):
+    conn = db_pool.connect()
+    results = []
+    for n_students in sizes:
+        group_code, teacher_id, student_ids = create_cohort(conn, n_students)
+        groups = random_groups(student_ids)
+        try:
+            start = time.perf_counter()
+            per_row_trips = per_row_writeback(conn, groups)
+            per_row_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            # +2 for START TRANSACTION and COMMIT
+            bulk_trips = group_store.write_assignments(conn, group_code, groups) + 2
+            bulk_time = time.perf_counter() - start
+        finally:
+            delete_cohort(conn, teacher_id, student_ids)
+
+        result = {
+            "students": n_students,
+            "per_row": {"round_trips": per_row_trips, "seconds": round(per_row_time, 4)},
+            "bulk": {"round_trips": bulk_trips, "seconds": round(bulk_time, 4)},
+        }
+        print(f"{n_students:>6} students: per-row {per_row_trips} round trips / {per_row_time:.3f}s, "
+              f"bulk {bulk_trips} round trips / {bulk_time:.3f}s")
+        results.append(result)
+    conn.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark group write-back strategies")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 1000, 10000])
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.sizes)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
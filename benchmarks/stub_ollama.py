@@ -0,0 +1,210 @@
+"""
+Local stand-in for the Ollama HTTP API, for benchmarks and manual testing
+without a model.
+
+Answers POST /api/chat with a canned reply, streamed as NDJSON chunks
+(stream=true) or as one JSON body after the whole reply is "generated"
+(stream=false). Every token takes --token-delay seconds and the reply ends
+with a closing fence and some trailing prose, like a chatty model would.
+
+Requests with a "format" (structured outputs) get only the JSON part of the
+reply, as constrained decoding would produce. The final message reports
+prompt_eval_count / eval_count in stub tokens (words and punctuation), every
+prompt token adds --prompt-token-delay seconds, and a model that hasn't been
+used for its keep_alive (default --keep-alive) is "loaded" again first,
+taking --load-delay seconds.
+
+Point the app at it with OLLAMA_HOST:
+    python benchmarks/stub_ollama.py --port 11500 &
+    OLLAMA_HOST=http://127.0.0.1:11500 python app.py
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = (
+    '```json\n'
+    '{"skills": ["python", "sql", "web development"], "interests": ["machine learning", "game design"]}\n'
+    '```\n'
+    'These are the project-relevant skills and interests I found in the student\'s answers. '
+    'Personal hobbies were excluded as requested.'
+)
+
+
+def tokenize(text):
+    """Split a reply into token-sized pieces (words, punctuation and whitespace)."""
+    return re.findall(r"\s+|\w+|[^\w\s]", text)
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    # Set by make_server
+    reply = DEFAULT_REPLY
+    token_delay = 0.02
+    first_token_delay = 0.2
+    prompt_token_delay = 0.0
+    load_delay = 0.0
+    keep_alive = 300.0
+    requests = None
+    loaded = None           # model -> monotonic time it gets unloaded
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle_one_request(self):
+        # Clients drop streamed connections early on purpose; that's not an error
+        try:
+            super().handle_one_request()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.requests.append(body)
+
+        if self.path != "/api/chat":
+            self.send_error(404)
+            return
+
+        reply = self.reply(body) if callable(self.reply) else self.reply
+        if body.get("format"):
+            reply = json_only(reply)
+        tokens = tokenize(reply)
+        model = body.get("model", "stub")
+        prompt_tokens = sum(len(tokenize(message.get("content", ""))) for message in body.get("messages", []))
+        counts = {"prompt_eval_count": prompt_tokens, "eval_count": len(tokens)}
+
+        # Prompt processing, after loading the model if it was unloaded
+        now = time.monotonic()
+        delay = self.first_token_delay + self.prompt_token_delay * prompt_tokens
+        if self.loaded.get(model, 0) < now:
+            delay += self.load_delay
+        keep_alive = parse_duration(body.get("keep_alive"), self.keep_alive)
+        self.loaded[model] = now + delay + self.token_delay * len(tokens) + keep_alive
+
+        if body.get("stream", True):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            time.sleep(delay)
+            try:
+                for token in tokens:
+                    self._write_chunk(self._message(model, token, done=False))
+                    time.sleep(self.token_delay)
+                self._write_chunk(self._message(model, "", done=True, **counts))
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # The client stopped reading early (e.g. JSON object complete)
+                self.close_connection = True
+        else:
+            time.sleep(delay + self.token_delay * len(tokens))
+            payload = json.dumps(self._message(model, reply, done=True, **counts)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    def _message(self, model, content, done, **counts):
+        return dict({
+            "model": model,
+            "created_at": "2024-01-01T00:00:00Z",
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+        }, **counts)
+
+    def _write_chunk(self, message):
+        data = (json.dumps(message) + "\n").encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def json_only(reply):
+    """The first JSON object or array in a reply, without fences or prose around it."""
+    starts = [i for i in (reply.find("{"), reply.find("[")) if i >= 0]
+    if not starts:
+        return reply
+    try:
+        _, end = json.JSONDecoder().raw_decode(reply, min(starts))
+    except json.JSONDecodeError:
+        return reply
+    return reply[min(starts):end]
+
+
+def parse_duration(value, default):
+    """Seconds of an Ollama keep_alive (number of seconds or "300ms" / "10s" / "5m" / "1h"; negative = forever)."""
+    if value is None:
+        return default
+    if isinstance(value, str):
+        match = re.fullmatch(r"(-?[\d.]+)(ms|s|m|h)?", value.strip())
+        if match is None:
+            return default
+        value = float(match.group(1)) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}[match.group(2)]
+    return float("inf") if value < 0 else float(value)
+
+
+def make_server(port=0, reply=DEFAULT_REPLY, token_delay=0.02, first_token_delay=0.2,
+                prompt_token_delay=0.0, load_delay=0.0, keep_alive=300.0):
+    """
+    Create a stub server (not started).
+
+    Args:
+        port (int): Port to listen on (0 picks a free one)
+        reply (str or callable): Reply text, or a function of the request body returning it
+        token_delay (float): Seconds per streamed token
+        first_token_delay (float): Seconds before the first token (prompt processing)
+        prompt_token_delay (float): Extra seconds before the first token per prompt token
+        load_delay (float): Seconds to load an unloaded model
+        keep_alive (float): Seconds a model stays loaded when the request has no keep_alive
+
+    Returns:
+        ThreadingHTTPServer: Server; its handler's `requests` list records every request body
+    """
+    handler = type("Handler", (StubOllamaHandler,), {
+        "reply": staticmethod(reply) if callable(reply) else reply,
+        "token_delay": token_delay,
+        "first_token_delay": first_token_delay,
+        "prompt_token_delay": prompt_token_delay,
+        "load_delay": load_delay,
+        "keep_alive": keep_alive,
+        "requests": [],
+        "loaded": {},
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(**kwargs):
+    """
+    Start a stub server on a background thread.
+
+    Returns:
+        tuple: (server, host URL for OLLAMA_HOST)
+    """
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Ollama server")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    parser.add_argument("--prompt-token-delay", type=float, default=0.0)
+    parser.add_argument("--load-delay", type=float, default=0.0)
+    parser.add_argument("--keep-alive", type=float, default=300.0)
+    args = parser.parse_args()
+
+    server = make_server(args.port, token_delay=args.token_delay, first_token_delay=args.first_token_delay,
+                         prompt_token_delay=args.prompt_token_delay, load_delay=args.load_delay,
+                         keep_alive=args.keep_alive)
+    print(f"Stub Ollama listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,129 @@
+"""
+Synthetic cohorts and a stub embedding table for offline benchmarks.
+
+Records have the same shape as the rows the clustering query in app.py
+returns, so they can be passed straight to sort_alg.sort_groups.
+"""
+import json
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import features   # noqa: E402
+
+SKILL_WORDS = [
+    "python", "java", "javascript", "sql", "react", "html", "css", "c++", "docker",
+    "kubernetes", "linux", "git", "statistics", "pandas", "excel", "networking",
+    "security", "android", "swift", "design", "testing", "cloud", "aws", "databases",
+    "machine", "learning", "web", "development", "data", "analysis", "mobile", "game",
+]
+SKILL_PHRASES = [
+    "python", "java", "javascript", "sql", "react", "html", "css", "c++", "docker",
+    "kubernetes", "linux", "git", "statistics", "pandas", "excel", "networking",
+    "web development", "machine learning", "data analysis", "mobile development",
+    "game development", "cloud computing", "aws", "database design", "unit testing",
+]
+INTEREST_PHRASES = [
+    "artificial intelligence", "open source projects", "cloud technologies",
+    "cybersecurity", "mobile app development", "game development", "data science",
+    "machine learning", "devops practices", "web development", "internet of things",
+    "virtual reality", "blockchain technology", "robotics", "computer vision",
+]
+HOURS = ["5-10", "10-15", "15-20", "20+"]
+
+
+class StubKeyedVectors:
+    """
+    Minimal stand-in for gensim's KeyedVectors: a fixed random vector per word.
+    Lets the benchmarks run without downloading GloVe.
+    """
+
+    def __init__(self, words=SKILL_WORDS, vector_size=features.EMBEDDING_SIZE, seed=0):
+        rng = np.random.default_rng(seed)
+        self.vector_size = vector_size
+        self.index_to_key = list(words)
+        self.key_to_index = {word: i for i, word in enumerate(self.index_to_key)}
+        self.vectors = rng.normal(size=(len(self.index_to_key), vector_size)).astype(np.float32)
+        # Keeps its vectors apart from GloVe's in the phrase cache (see phrase_cache.py)
+        self.cache_version = f"stub:{seed}:{len(self.index_to_key)}:{vector_size}"
+
+    def __contains__(self, word):
+        return word in self.key_to_index
+
+    def __getitem__(self, word):
+        return self.vectors[self.key_to_index[word]]
+
+
+def make_cohort(n_students, seed=0, interest_vocabulary=None, precomputed=False, model=None):
+    """
+    Generate a synthetic class.
+
+    Args:
+        n_students (int): Number of students
+        seed (int): Random seed (same seed -> same cohort)
+        interest_vocabulary (list, optional): Interest phrases to draw from; a larger
+            list mimics the free-text interest vocabulary growing with the class
+        precomputed (bool): Fill in feature_vector/feature_version like rows
+            whose vectors were stored at submission time
+        model (optional): Word vectors used for precomputed vectors
+
+    Returns:
+        list: Records with id, names, skills, interests, availability and
+              hours_per_week as JSON strings
+    """
+    rng = random.Random(seed)
+    vocabulary = interest_vocabulary or INTEREST_PHRASES
+    if precomputed and model is None:
+        model = StubKeyedVectors()
+
+    users = []
+    for i in range(n_students):
+        skills = rng.sample(SKILL_PHRASES, rng.randint(2, 6))
+        interests = rng.sample(vocabulary, rng.randint(1, 4))
+        availability = {day: [] for day in features.AVAILABILITY_DAYS}
+        for _ in range(rng.randint(2, 5)):
+            day = rng.choice(features.AVAILABILITY_DAYS)
+            period = rng.choice(features.AVAILABILITY_PERIODS)
+            if period not in availability[day]:
+                availability[day].append(period)
+        hours = rng.choice(HOURS)
+
+        record = {
+            "id": i + 1,
+            "user_firstname": f"Student{i + 1}",
+            "user_lastname": "Synthetic",
+            "skills": json.dumps(skills),
+            "interests": json.dumps(interests),
+            "availability": json.dumps(availability),
+            "hours_per_week": json.dumps(hours),
+            "feature_vector": None,
+            "feature_version": None,
+        }
+        if precomputed:
+            vector = features.encode_student(skills, availability, hours, model)
+            record["feature_vector"] = features.to_bytes(vector)
+            record["feature_version"] = features.FEATURE_VERSION
+        users.append(record)
+    return users
+
+
+def interest_vocabulary(size, seed=0):
+    """
+    A larger interest vocabulary: the base phrases plus made-up variants,
+    like the free-text output of the LLM for a big class.
+
+    Args:
+        size (int): Number of distinct interest phrases
+
+    Returns:
+        list: Interest phrases
+    """
+    rng = random.Random(seed)
+    vocabulary = list(INTEREST_PHRASES)
+    while len(vocabulary) < size:
+        vocabulary.append(f"{rng.choice(INTEREST_PHRASES)} {len(vocabulary)}")
+    return vocabulary[:size]
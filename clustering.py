@@ -0,0 +1,161 @@
+import contextlib
+import time
+
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import KMeans, MiniBatchKMeans
+
+# ===================================
+# Clustering engines
+# ===================================
+# "kmeans"    - full Lloyd KMeans with N_INIT restarts (the original
+#               setting, best quality, slowest).
+# "kmeans++"  - the same KMeans with a single k-means++ seeded init: about
+#               N_INIT times less work, usually a little worse inertia.
+# "minibatch" - MiniBatchKMeans: updates centers from random batches of
+#               students, for very large cohorts / thousands of groups.
+# "auto"      - picks one of the above from the size of the problem (see
+#               resolve_engine).
+#
+# Engine, n_init, batch size and thread count can be set per class in
+# teacher_group (clustering_* columns, NULL = default).
+# ===================================
+
+ENGINES = ("auto", "kmeans", "kmeans++", "minibatch")
+
+N_INIT = 10
+# MiniBatchKMeans batch size; raised to BATCH_PER_CLUSTER x groups for very
+# many groups, so a batch still touches most centers
+MINIBATCH_BATCH_SIZE = 4096
+BATCH_PER_CLUSTER = 3
+RANDOM_STATE = 42
+
+# "auto" policy: full KMeans while students x groups stays below the first
+# limit, a single seeded init below the second, MiniBatchKMeans above it
+AUTO_KMEANS_MAX_WORK = 2_000_000
+AUTO_SINGLE_INIT_MAX_WORK = 500_000_000
+
+
+def resolve_engine(engine, n_samples, n_clusters):
+    """
+    Pick the concrete engine for an engine name.
+
+    Args:
+        engine (str): One of ENGINES
+        n_samples (int): Number of students
+        n_clusters (int): Number of groups
+
+    Returns:
+        str: "kmeans", "kmeans++" or "minibatch"
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown clustering engine {engine!r}, expected one of {ENGINES}")
+    if engine != "auto":
+        return engine
+
+    # Cost of one Lloyd iteration grows with students x centers
+    work = n_samples * n_clusters
+    if work <= AUTO_KMEANS_MAX_WORK:
+        return "kmeans"
+    if work <= AUTO_SINGLE_INIT_MAX_WORK:
+        return "kmeans++"
+    return "minibatch"
+
+
+def options_from_row(group):
+    """
+    Clustering settings of a class from its teacher_group row.
+
+    Args:
+        group (dict): teacher_group row
+
+    Returns:
+        dict: Keyword arguments for cluster() (unset columns are left out)
+    """
+    options = {
+        "engine": group.get("clustering_engine"),
+        "n_init": group.get("clustering_n_init"),
+        "batch_size": group.get("clustering_batch_size"),
+        "threads": group.get("clustering_threads"),
+    }
+    return {name: value for name, value in options.items() if value is not None}
+
+
+def inertia(features, centers, labels, chunk_size=4096):
+    """
+    Sum of squared distances from every student to their cluster center
+    (the KMeans objective, lower is better). Works through the students in
+    chunks so a sparse matrix is only ever densified chunk_size rows at a time.
+
+    Args:
+        features (ndarray or sparse matrix): (n_students, n_features) matrix
+        centers (ndarray): (n_clusters, n_features) matrix
+        labels (ndarray): Cluster index for each student
+        chunk_size (int): Students per chunk
+
+    Returns:
+        float: Inertia
+    """
+    total = 0.0
+    for start in range(0, features.shape[0], chunk_size):
+        rows = features[start:start + chunk_size]
+        if sparse.issparse(rows):
+            rows = rows.toarray()
+        diff = rows - centers[labels[start:start + chunk_size]]
+        total += float(np.einsum("ij,ij->", diff, diff))
+    return total
+
+
+def cluster(features, n_clusters, engine="auto", n_init=None, batch_size=None, threads=None,
+            random_state=RANDOM_STATE):
+    """
+    Cluster students with the selected engine.
+
+    Args:
+        features (ndarray or sparse matrix): (n_students, n_features) matrix
+        n_clusters (int): Number of groups
+        engine (str): "auto", "kmeans", "kmeans++" or "minibatch"
+        n_init (int, optional): Number of initializations (engine default if None)
+        batch_size (int, optional): MiniBatchKMeans batch size (default: see MINIBATCH_BATCH_SIZE)
+        threads (int, optional): Limit for the BLAS/OpenMP thread pools while clustering
+        random_state (int): Seed
+
+    Returns:
+        tuple: (centers, labels, report) where report holds the engine used,
+               its settings, the number of iterations, the inertia and the runtime
+    """
+    start = time.perf_counter()
+    used = resolve_engine(engine, features.shape[0], n_clusters)
+
+    if used == "kmeans":
+        n_init = n_init or N_INIT
+        model = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=n_init)
+    elif used == "kmeans++":
+        n_init = n_init or 1
+        model = KMeans(n_clusters=n_clusters, init="k-means++", random_state=random_state, n_init=n_init)
+    else:
+        n_init = n_init or 1
+        batch_size = batch_size or max(MINIBATCH_BATCH_SIZE, BATCH_PER_CLUSTER * n_clusters)
+        model = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, n_init=n_init,
+                                batch_size=batch_size)
+
+    limits = contextlib.nullcontext()
+    if threads:
+        from threadpoolctl import threadpool_limits
+        limits = threadpool_limits(limits=threads)
+
+    with limits:
+        labels = model.fit_predict(features)
+    centers = model.cluster_centers_
+
+    report = {
+        "engine": used,
+        "n_init": n_init,
+        "batch_size": batch_size if used == "minibatch" else None,
+        "threads": threads,
+        "iterations": int(model.n_iter_),
+        # Computed the same way for every engine so the numbers compare
+        "inertia": inertia(features, centers, labels),
+        "runtime": time.perf_counter() - start,
+    }
+    return centers, labels, report
@@ -0,0 +1,171 @@
+import json
+
+import numpy as np
+from scipy import sparse
+
+import features   # feature layout, availability bitmask, hours code
+
+# ===================================
+# Columnar student data
+# ===================================
+# A class's students as sort_groups consumes them: one preallocated array
+# per column instead of a dict per student. Rows are decoded as they come
+# off the database cursor (see group_store.fetch_class):
+#
+#   ids           int64 user IDs
+#   vectors       float32 precomputed feature vectors (see features.py)
+#   fresh         True where vectors holds a current stored vector
+#   skills        skill phrase lists, only kept for rows without a current vector
+#   availability  uint32 bitmask over features.AVAILABILITY_SLOTS
+#   hours         int8 hours code (features.HOURS_MAP)
+#   interests     interest ids of every student in CSR layout, plus the
+#                 class's vocabulary (id -> phrase, in first-seen order)
+# ===================================
+
+
+class Cohort:
+    """Columnar student data of a class."""
+
+    def __init__(self, capacity=256):
+        """
+        Args:
+            capacity (int): Expected number of students (arrays grow if exceeded)
+        """
+        capacity = max(1, capacity)
+        self.size = 0
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._vectors = np.zeros((capacity, features.VECTOR_SIZE), dtype=features.DTYPE)
+        self._fresh = np.zeros(capacity, dtype=bool)
+        self._availability = np.zeros(capacity, dtype=np.uint32)
+        self._hours = np.zeros(capacity, dtype=np.int8)
+        self._offsets = np.zeros(capacity + 1, dtype=np.int64)
+        self._interest_ids = []
+        self.skills = []
+        self.vocabulary = []
+        self._vocabulary_index = {}
+        self._unpacked = True   # availability/hours of fresh rows copied from their vectors
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        """Double the capacity of every array."""
+        capacity = 2 * len(self._ids)
+        self._ids = np.resize(self._ids, capacity)
+        self._vectors = np.resize(self._vectors, (capacity, features.VECTOR_SIZE))
+        self._fresh = np.resize(self._fresh, capacity)
+        self._availability = np.resize(self._availability, capacity)
+        self._hours = np.resize(self._hours, capacity)
+        self._offsets = np.resize(self._offsets, capacity + 1)
+
+    def append(self, student_id, skills, interests, availability, hours_per_week,
+               feature_vector=None, feature_version=None, availability_mask=None):
+        """
+        Decode one database row into the columns.
+
+        Args:
+            student_id (int): User ID
+            skills (str): Skills JSON
+            interests (str): Interests JSON
+            availability (str): Availability JSON
+            hours_per_week (str): Hours-per-week JSON
+            feature_vector (bytes, optional): Stored feature vector
+            feature_version (str, optional): Version of the stored vector
+            availability_mask (int, optional): Stored availability bitmask
+                (decoded from the availability JSON when missing)
+        """
+        if self.size == len(self._ids):
+            self._grow()
+        i = self.size
+
+        self._ids[i] = student_id
+        if feature_version == features.FEATURE_VERSION:
+            # Stored vector already holds the skill embedding, availability and
+            # hours; the availability/hours columns are filled from it in bulk
+            self._vectors[i] = np.frombuffer(feature_vector, dtype=features.DTYPE)
+            self._fresh[i] = True
+            self.skills.append(None)
+        else:
+            self._fresh[i] = False
+            self.skills.append(json.loads(skills))
+            if availability_mask is None:
+                availability_mask = features.availability_mask(json.loads(availability))
+            self._availability[i] = availability_mask
+            self._hours[i] = features.encode_hours(json.loads(hours_per_week) if hours_per_week is not None else None)
+        self._unpacked = False
+
+        for interest in json.loads(interests):
+            interest_id = self._vocabulary_index.get(interest)
+            if interest_id is None:
+                interest_id = self._vocabulary_index[interest] = len(self.vocabulary)
+                self.vocabulary.append(interest)
+            self._interest_ids.append(interest_id)
+        self._offsets[i + 1] = len(self._interest_ids)
+        self.size += 1
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build a cohort from student dicts (rows of a dictionary cursor).
+
+        Args:
+            records (list): Dicts with id, skills, interests, availability,
+                hours_per_week and optionally feature_vector/feature_version/availability_mask
+
+        Returns:
+            Cohort: Columnar copy of the records
+        """
+        cohort = cls(len(records))
+        for rec in records:
+            cohort.append(rec['id'], rec['skills'], rec['interests'], rec['availability'],
+                          rec['hours_per_week'], rec.get('feature_vector'), rec.get('feature_version'),
+                          rec.get('availability_mask'))
+        return cohort
+
+    @property
+    def ids(self):
+        return self._ids[:self.size]
+
+    @property
+    def vectors(self):
+        return self._vectors[:self.size]
+
+    @property
+    def fresh(self):
+        return self._fresh[:self.size]
+
+    def _unpack_fresh(self):
+        """Fill the availability and hours columns of fresh rows from their stored vectors."""
+        if self._unpacked:
+            return
+        fresh = np.flatnonzero(self.fresh)
+        vectors = self._vectors[fresh]
+        self._availability[fresh] = features.pack_availability(vectors[:, features.EMBEDDING_SIZE:-1])
+        self._hours[fresh] = vectors[:, -1]
+        self._unpacked = True
+
+    @property
+    def availability(self):
+        self._unpack_fresh()
+        return self._availability[:self.size]
+
+    @property
+    def hours(self):
+        self._unpack_fresh()
+        return self._hours[:self.size]
+
+    def interest_matrix(self):
+        """
+        One-hot interests of every student over the class's vocabulary.
+
+        Returns:
+            csr_matrix: (students, len(vocabulary)) float32 matrix
+        """
+        indices = np.asarray(self._interest_ids, dtype=np.int32)
+        data = np.ones(len(indices), dtype=features.DTYPE)
+        matrix = sparse.csr_matrix((data, indices, self._offsets[:self.size + 1]),
+                                   shape=(self.size, len(self.vocabulary)))
+        # A student may list the same interest twice; count it once
+        matrix.sum_duplicates()
+        matrix.data[:] = 1.0
+        return matrix
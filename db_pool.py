@@ -0,0 +1,177 @@
+import os
+import queue
+import threading
+import time
+
+import mysql.connector
+from mysql.connector import errors
+
+# ===================================
+# MySQL connection pool
+# ===================================
+# Requests borrow an open connection instead of paying the TCP + auth
+# handshake every time. Connections are opened lazily up to POOL_SIZE;
+# when all of them are busy a checkout waits up to CHECKOUT_TIMEOUT
+# seconds and then fails. Connections that sat idle for longer than
+# HEALTH_CHECK_AFTER seconds are pinged (and reconnected) before reuse.
+# ===================================
+
+DATABASE = 'Collab_DB'
+
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+CHECKOUT_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 5))
+HEALTH_CHECK_AFTER = float(os.environ.get("DB_POOL_HEALTH_CHECK_AFTER", 30))
+
+
+class PoolExhaustedError(errors.PoolError):
+    """No connection became free within CHECKOUT_TIMEOUT."""
+
+
+_idle = queue.LifoQueue()   # (connection, returned_at); LIFO keeps hot connections hot
+_lock = threading.Lock()
+_created = 0
+_stats = {
+    "checkouts": 0,
+    "waits": 0,                 # checkouts that had to wait for a free connection
+    "wait_time_total": 0.0,
+    "wait_time_max": 0.0,
+    "exhausted": 0,             # checkouts that timed out
+    "health_check_failures": 0,
+    "in_use": 0,
+}
+
+
+def connect():
+    """
+    Open a new database connection.
+
+    Returns:
+        MySQLConnection: Connection with autocommit enabled
+    """
+    return mysql.connector.connect(
+        user=os.environ.get("USER"),
+        password=os.environ.get("PASSWORD"),
+        host="127.0.0.1",
+        port=3306,
+        database=DATABASE,
+        autocommit=True
+    )
+
+
+def _healthy(conn, returned_at):
+    """Check a connection that has been idle for a while (reconnects if needed)."""
+    if time.monotonic() - returned_at < HEALTH_CHECK_AFTER:
+        return True
+    try:
+        conn.ping(reconnect=True, attempts=1)
+        return True
+    except errors.Error:
+        with _lock:
+            _stats["health_check_failures"] += 1
+        return False
+
+
+def checkout():
+    """
+    Borrow a connection from the pool.
+
+    Returns:
+        MySQLConnection: Open connection; give it back with release()
+
+    Raises:
+        PoolExhaustedError: If no connection is free within CHECKOUT_TIMEOUT
+    """
+    global _created
+
+    start = time.monotonic()
+    waited = False
+    while True:
+        try:
+            conn, returned_at = _idle.get_nowait()
+        except queue.Empty:
+            # Open another connection if the pool isn't full yet
+            with _lock:
+                can_create = _created < POOL_SIZE
+                if can_create:
+                    _created += 1
+            if can_create:
+                try:
+                    conn = connect()
+                except Exception:
+                    with _lock:
+                        _created -= 1
+                    raise
+                break
+
+            # Pool is full: wait for a connection to come back
+            waited = True
+            remaining = CHECKOUT_TIMEOUT - (time.monotonic() - start)
+            try:
+                conn, returned_at = _idle.get(timeout=max(remaining, 0))
+            except queue.Empty:
+                with _lock:
+                    _stats["exhausted"] += 1
+                raise PoolExhaustedError(
+                    f"No database connection free after {CHECKOUT_TIMEOUT}s (pool size {POOL_SIZE})")
+
+        if _healthy(conn, returned_at):
+            break
+        _discard(conn)
+
+    wait_time = time.monotonic() - start
+    with _lock:
+        _stats["checkouts"] += 1
+        _stats["in_use"] += 1
+        if waited:
+            _stats["waits"] += 1
+            _stats["wait_time_total"] += wait_time
+            _stats["wait_time_max"] = max(_stats["wait_time_max"], wait_time)
+    return conn
+
+
+def release(conn):
+    """
+    Return a borrowed connection to the pool.
+    An unfinished transaction is rolled back first.
+
+    Args:
+        conn (MySQLConnection): Connection from checkout()
+    """
+    with _lock:
+        _stats["in_use"] -= 1
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+    except errors.Error:
+        _discard(conn)
+        return
+    _idle.put((conn, time.monotonic()))
+
+
+def _discard(conn):
+    """Close a broken connection and free its slot in the pool."""
+    global _created
+
+    with _lock:
+        _created -= 1
+    try:
+        conn.close()
+    except errors.Error:
+        pass
+
+
+def stats():
+    """
+    Pool usage counters, for sizing the pool.
+
+    Returns:
+        dict: size, open/idle/in-use connections, checkout and wait counters,
+              average/max wait time (seconds) and exhaustion events
+    """
+    with _lock:
+        result = dict(_stats)
+        result["open"] = _created
+    result["size"] = POOL_SIZE
+    result["idle"] = _idle.qsize()
+    result["wait_time_avg"] = result["wait_time_total"] / result["waits"] if result["waits"] else 0.0
+    return result
@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+
+import metrics   # model load timings for /metrics
+
+# ===================================
+# GloVe model provider
+# ===================================
+# The first process to start downloads the GloVe vectors through gensim and
+# re-saves them in gensim's native KeyedVectors format (the vectors end up in
+# a plain .npy file next to the .kv file). Every process then opens that copy
+# with mmap='r', so all workers read the same page-cache pages instead of
+# each holding its own ~128MB copy.
+# ===================================
+
+MODEL_NAME = "glove-wiki-gigaword-100"
+
+# Where the native copy of the model is stored (override with GLOVE_CACHE_DIR)
+CACHE_DIR = os.environ.get(
+    "GLOVE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_cache"),
+)
+
+_model = None
+_lock = threading.Lock()
+
+
+def model_path():
+    """
+    Path of the native KeyedVectors copy of the model.
+
+    Returns:
+        str: Path to the .kv file inside CACHE_DIR
+    """
+    return os.path.join(CACHE_DIR, f"{MODEL_NAME}.kv")
+
+
+def _convert_model(path):
+    """
+    Download the model through gensim and save it in native format.
+    Saves to a temporary name first so a crash never leaves a half-written
+    file where other workers would try to mmap it.
+
+    Args:
+        path (str): Destination .kv path
+    """
+    import gensim.downloader as api
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    model = api.load(MODEL_NAME)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    # sep_limit=0 forces the vectors into a separate .npy file that can be mmapped
+    model.save(tmp_path, sep_limit=0)
+    os.replace(f"{tmp_path}.vectors.npy", f"{path}.vectors.npy")
+    os.replace(tmp_path, path)
+
+
+def get_model():
+    """
+    Get the shared, memory-mapped GloVe model.
+    Loads the model on first use and returns the same handle afterwards.
+    A "cold" load has to download/convert the model, a "warm" load just
+    maps the existing native copy.
+
+    Returns:
+        KeyedVectors: Read-only, memory-mapped word vectors
+    """
+    global _model
+
+    if _model is not None:
+        return _model
+
+    with _lock:
+        if _model is None:
+            from gensim.models import KeyedVectors
+
+            path = model_path()
+            start = time.perf_counter()
+            cold = not os.path.exists(path)
+            if cold:
+                _convert_model(path)
+            convert_time = time.perf_counter() - start
+
+            _model = KeyedVectors.load(path, mmap='r')
+            total_time = time.perf_counter() - start
+
+            kind = "cold" if cold else "warm"
+            metrics.observe("metrocollab_model_load_duration_seconds", total_time, kind=kind)
+            print(f"GloVe model ready ({kind} load): {total_time:.2f}s total, "
+                  f"{convert_time:.2f}s download/convert, pid {os.getpid()}")
+    return _model
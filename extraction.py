@@ -0,0 +1,180 @@
+import collections
+import os
+import queue
+import threading
+import time
+
+# ===================================
+# Skill/interest extraction queue
+# ===================================
+# Student form submissions are stored right away with their raw text and
+# the slow LLM extraction is queued here. A fixed number of worker threads
+# (EXTRACTION_WORKERS) take items off the queue and pass them to the
+# handler registered with start(); the handler does the Ollama call and
+# writes the result back. A handler returns SKIPPED when the item was
+# already taken (e.g. by another app process), so its progress isn't
+# reported from this one.
+# ===================================
+
+WORKERS = int(os.environ.get("EXTRACTION_WORKERS", 2))
+
+# Number of recent latencies kept for the percentile stats
+LATENCY_WINDOW = 500
+
+# How long the progress of finished items is kept for the loading screen
+PROGRESS_TTL = 600
+
+# Returned by a handler that left the item alone
+SKIPPED = "skipped"
+
+_queue = queue.Queue()
+_lock = threading.Lock()
+_threads = []
+_pid = None     # process the threads were started in
+_stats = {
+    "enqueued": 0,
+    "processed": 0,
+    "failed": 0,
+    "skipped": 0,
+    "in_progress": 0,
+}
+_latencies = collections.deque(maxlen=LATENCY_WINDOW)   # enqueue -> finished, seconds
+_work_times = collections.deque(maxlen=LATENCY_WINDOW)  # handler time only, seconds
+_progress = {}  # item -> {"stage": queued/extracting/done/failed, "received": chars, "updated_at": ...}
+
+
+def start(handler, workers=WORKERS):
+    """
+    Start the worker threads (only the first call in a process has an effect;
+    threads don't survive a fork, so a forked child starts its own).
+
+    Args:
+        handler (callable): Called with each queued item; raising marks the item failed,
+                            returning SKIPPED forgets it
+        workers (int): Number of worker threads
+
+    Returns:
+        bool: True if this call started the threads
+    """
+    global _pid
+
+    if _pid == os.getpid():
+        return False
+    with _lock:
+        if _pid == os.getpid():
+            return False
+        _pid = os.getpid()
+        del _threads[:]
+        for i in range(workers):
+            thread = threading.Thread(target=_worker, args=(handler,),
+                                      name=f"extraction-{i}", daemon=True)
+            thread.start()
+            _threads.append(thread)
+    return True
+
+
+def enqueue(item):
+    """
+    Queue an item for extraction.
+
+    Args:
+        item: Passed unchanged to the handler (e.g. a student_form row ID)
+    """
+    with _lock:
+        _stats["enqueued"] += 1
+    set_progress(item, "queued")
+    _queue.put((item, time.perf_counter()))
+
+
+def set_progress(item, stage, received=0):
+    """
+    Record how far the extraction of an item got (read by the loading screen).
+
+    Args:
+        item: Queued item
+        stage (str): "queued", "extracting", "done" or "failed"
+        received (int): Characters of the LLM answer received so far
+    """
+    now = time.time()
+    with _lock:
+        _progress[item] = {"stage": stage, "received": received, "updated_at": now}
+        if stage in ("done", "failed"):
+            expired = [key for key, value in _progress.items()
+                       if value["stage"] in ("done", "failed") and now - value["updated_at"] > PROGRESS_TTL]
+            for key in expired:
+                del _progress[key]
+
+
+def get_progress(item):
+    """
+    Progress of an item queued in this process.
+
+    Args:
+        item: Queued item
+
+    Returns:
+        dict: stage, received and updated_at, or None if this process doesn't know the item
+    """
+    with _lock:
+        progress = _progress.get(item)
+        return dict(progress) if progress is not None else None
+
+
+def _worker(handler):
+    """Process queued items forever."""
+    while True:
+        item, enqueued_at = _queue.get()
+        with _lock:
+            _stats["in_progress"] += 1
+
+        set_progress(item, "extracting")
+        started_at = time.perf_counter()
+        try:
+            outcome = "skipped" if handler(item) == SKIPPED else "processed"
+        except Exception as e:
+            print(f"Extraction failed for {item}: {e}")
+            outcome = "failed"
+        finished_at = time.perf_counter()
+        if outcome == "skipped":
+            with _lock:
+                _progress.pop(item, None)
+        else:
+            set_progress(item, "done" if outcome == "processed" else "failed")
+
+        with _lock:
+            _stats["in_progress"] -= 1
+            _stats[outcome] += 1
+            _latencies.append(finished_at - enqueued_at)
+            _work_times.append(finished_at - started_at)
+        _queue.task_done()
+
+
+def _percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (None if empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 4)
+
+
+def stats():
+    """
+    Queue depth, counters and latency of recent items.
+
+    Returns:
+        dict: Counters plus p50/p95/max latency (seconds) from enqueue to finish
+              and the average time spent in the handler
+    """
+    with _lock:
+        latencies = list(_latencies)
+        work_times = list(_work_times)
+        result = dict(_stats)
+
+    result["workers"] = len(_threads)
+    result["queue_depth"] = _queue.qsize()
+    result["latency_p50"] = _percentile(latencies, 50)
+    result["latency_p95"] = _percentile(latencies, 95)
+    result["latency_max"] = round(max(latencies), 4) if latencies else None
+    result["work_time_avg"] = round(sum(work_times) / len(work_times), 4) if work_times else None
+    return result
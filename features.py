@@ -0,0 +1,380 @@
+import json
+
+import numpy as np
+from scipy import sparse
+
+import embeddings     # shared GloVe model
+import phrase_cache   # cached skill phrase embeddings
+
+# ===================================
+# Precomputed student feature vectors
+# ===================================
+# The parts of a student's feature vector that don't depend on the rest of
+# the class are computed once, when the form is submitted, and stored in
+# the student_features table as raw float32 bytes:
+#
+#   [ skill embedding (100) | availability slots (18) | hours code (1) ]
+#
+# Availability is also stored on its own as an 18-bit mask in
+# student_form.availability_mask (bit i = AVAILABILITY_SLOTS[i]), so shared
+# slots between students are a bitwise AND + popcount (see overlap_matrix).
+#
+# Interests are still one-hot encoded per run because their vocabulary
+# depends on the whole class.
+# ===================================
+
+# Bump the suffix whenever the layout or the encoding below changes;
+# rows with a different version are recomputed on the next run
+FEATURE_VERSION = f"{embeddings.MODEL_NAME}:v1"
+
+AVAILABILITY_DAYS = ["mon", "tue", "wed", "thu", "fri", "weekend"]
+AVAILABILITY_PERIODS = ["morning", "afternoon", "evening"]
+AVAILABILITY_SLOTS = [f"{day}_{period}" for day in AVAILABILITY_DAYS for period in AVAILABILITY_PERIODS]
+_SLOT_INDEX = {slot: i for i, slot in enumerate(AVAILABILITY_SLOTS)}
+
+HOURS_MAP = {"5-10": 1, "10-15": 2, "15-20": 3, "20+": 4}
+
+EMBEDDING_SIZE = 100
+VECTOR_SIZE = EMBEDDING_SIZE + len(AVAILABILITY_SLOTS) + 1
+DTYPE = np.float32
+
+
+def average_embeddings(skill_lists, model, report=None):
+    """
+    Average GloVe embedding of every student's skill phrases.
+    Each phrase is the mean of its known words (cached, see phrase_cache.py),
+    a student's embedding is the mean of their phrases that have a vector.
+
+    Args:
+        skill_lists (list): Skill phrases of each student, e.g. [["python", "web development"]]
+        model (KeyedVectors): Word vectors
+        report (dict, optional): Filled with the phrase cache statistics of this call
+
+    Returns:
+        ndarray: (len(skill_lists), model.vector_size) float32 matrix (zeros where nothing is known)
+    """
+    # Every phrase of every student, normalized once; student_of[k] owns phrases[k]
+    phrases = [phrase_cache.normalize(phrase) for skills in skill_lists for phrase in skills]
+    student_of = np.repeat(np.arange(len(skill_lists)), [len(skills) for skills in skill_lists])
+
+    vectors, cache_report = phrase_cache.lookup(phrases, model, normalized=True)
+    if report is not None:
+        report.update(cache_report)
+
+    # Distinct phrases with a vector as rows of one matrix (row 0 = no vector)
+    row_of = {}
+    for phrase, vector in vectors.items():
+        if vector is not None:
+            row_of[phrase] = len(row_of) + 1
+    phrase_matrix = np.zeros((len(row_of) + 1, model.vector_size), dtype=DTYPE)
+    for phrase, row in row_of.items():
+        phrase_matrix[row] = vectors[phrase]
+
+    # Students as a sparse averaging matrix over their phrases that have a vector
+    rows = np.fromiter((row_of.get(phrase, 0) for phrase in phrases), dtype=np.int64, count=len(phrases))
+    known = rows > 0
+    students, rows = student_of[known], rows[known]
+    counts = np.bincount(students, minlength=len(skill_lists))
+    averaging = sparse.csr_matrix(((1.0 / counts[students]).astype(DTYPE), (students, rows)),
+                                  shape=(len(skill_lists), len(phrase_matrix)))
+    return np.asarray(averaging @ phrase_matrix, dtype=DTYPE)
+
+
+def average_embedding(words, model):
+    """
+    Average GloVe embedding of a list of skill phrases (one student, see average_embeddings).
+
+    Args:
+        words (list): Skill phrases, e.g. ["python", "web development"]
+        model (KeyedVectors): Word vectors
+
+    Returns:
+        ndarray: Embedding of size model.vector_size (zeros if nothing is known)
+    """
+    return average_embeddings([words], model)[0]
+
+
+def encode_availability(availability):
+    """
+    One-hot encode availability over the fixed 18 day/period slots.
+
+    Args:
+        availability (dict): Day -> list of periods, e.g. {"mon": ["morning"]}
+
+    Returns:
+        ndarray: float32 vector with 1.0 for every available slot
+    """
+    encoded = np.zeros(len(AVAILABILITY_SLOTS), dtype=DTYPE)
+    for day, periods in availability.items():
+        for period in periods:
+            index = _SLOT_INDEX.get(f"{day}_{period}")
+            if index is not None:
+                encoded[index] = 1.0
+    return encoded
+
+
+def availability_mask(availability):
+    """
+    Pack availability into a bitmask over the 18 slots (bit i = AVAILABILITY_SLOTS[i]).
+
+    Args:
+        availability (dict): Day -> list of periods, e.g. {"mon": ["morning"]}
+
+    Returns:
+        int: Bitmask
+    """
+    mask = 0
+    for day, periods in availability.items():
+        for period in periods:
+            index = _SLOT_INDEX.get(f"{day}_{period}")
+            if index is not None:
+                mask |= 1 << index
+    return mask
+
+
+def pack_availability(slots):
+    """
+    Pack one-hot slot rows back into bitmasks (inverse of unpack_availability).
+
+    Args:
+        slots (ndarray): (n, 18) availability block of feature vectors
+
+    Returns:
+        ndarray: uint32 bitmasks
+    """
+    weights = np.left_shift(1, np.arange(len(AVAILABILITY_SLOTS)), dtype=np.int64)
+    return ((np.asarray(slots) > 0) @ weights).astype(np.uint32)
+
+
+def unpack_availability(masks):
+    """
+    Expand availability bitmasks into one-hot slot rows (vectorized encode_availability).
+
+    Args:
+        masks (ndarray): Integer bitmasks, one per student
+
+    Returns:
+        ndarray: (len(masks), 18) float32 matrix
+    """
+    bits = np.arange(len(AVAILABILITY_SLOTS), dtype=np.uint32)
+    return ((np.asarray(masks, dtype=np.uint32)[:, None] >> bits) & 1).astype(DTYPE)
+
+
+# Set bits of every byte value, for numpy builds without np.bitwise_count
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(masks):
+    """
+    Number of set bits of every bitmask (vectorized).
+
+    Args:
+        masks (ndarray): Integer bitmasks of any shape
+
+    Returns:
+        ndarray: uint8 bit counts, same shape as masks
+    """
+    masks = np.asarray(masks, dtype=np.uint32)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(masks)
+    # Sum the counts of the 4 bytes of each mask
+    return _BYTE_POPCOUNT[masks[..., None].view(np.uint8)].sum(axis=-1, dtype=np.uint8)
+
+
+def overlap_matrix(masks, other=None):
+    """
+    Number of shared availability slots between every pair of bitmasks,
+    as one broadcast AND + popcount instead of a Python double loop.
+
+    Args:
+        masks (ndarray): Bitmasks (n,)
+        other (ndarray, optional): Bitmasks (m,), defaults to masks (pairwise n x n)
+
+    Returns:
+        ndarray: (n, m) uint8 matrix of shared slot counts
+    """
+    masks = np.asarray(masks, dtype=np.uint32)
+    other = masks if other is None else np.asarray(other, dtype=np.uint32)
+    return popcount(masks[:, None] & other[None, :])
+
+
+def common_slots(masks, labels, n_groups):
+    """
+    Slots every member of a group is available in (AND of the members' masks).
+
+    Args:
+        masks (ndarray): Bitmask of each student
+        labels (ndarray): Group index (0-based) of each student
+        n_groups (int): Number of groups
+
+    Returns:
+        ndarray: uint32 bitmask per group (0 = the group has no common slot;
+                 groups without members keep every slot)
+    """
+    masks = np.asarray(masks, dtype=np.uint32)
+    labels = np.asarray(labels)
+    common = np.full(n_groups, (1 << len(AVAILABILITY_SLOTS)) - 1, dtype=np.uint32)
+    if len(masks) == 0:
+        return common
+    order = np.argsort(labels, kind="stable")
+    sorted_labels = labels[order]
+    starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+    common[sorted_labels[starts]] = np.bitwise_and.reduceat(masks[order], starts)
+    return common
+
+
+def encode_hours(hours_per_week):
+    """
+    Encode the hours-per-week answer as an ordinal code (0 if unknown).
+
+    Args:
+        hours_per_week (str): e.g. "10-15" (surrounding JSON quotes are ignored)
+
+    Returns:
+        int: Code from HOURS_MAP
+    """
+    if hours_per_week is None:
+        return 0
+    return HOURS_MAP.get(hours_per_week.strip('"'), 0)
+
+
+def encode_student(skills, availability, hours_per_week, model=None):
+    """
+    Build the class-independent part of a student's feature vector.
+
+    Args:
+        skills (list): Skill phrases
+        availability (dict): Day -> list of periods
+        hours_per_week (str): Hours-per-week answer
+        model (KeyedVectors, optional): Word vectors, defaults to the shared model
+
+    Returns:
+        ndarray: float32 vector of size VECTOR_SIZE
+    """
+    return encode_students([skills], [availability], [hours_per_week], model)[0]
+
+
+def encode_students(skill_lists, availabilities, hours, model=None):
+    """
+    Build the feature vectors of many students at once (see encode_student);
+    their skill phrases are embedded in one average_embeddings call.
+
+    Args:
+        skill_lists (list): Skill phrases of each student
+        availabilities (list): Availability dict of each student
+        hours (list): Hours-per-week answer of each student
+        model (KeyedVectors, optional): Word vectors, defaults to the shared model
+
+    Returns:
+        ndarray: (len(skill_lists), VECTOR_SIZE) float32 matrix
+    """
+    if model is None:
+        model = embeddings.get_model()
+
+    vectors = np.empty((len(skill_lists), VECTOR_SIZE), dtype=DTYPE)
+    vectors[:, :EMBEDDING_SIZE] = average_embeddings(skill_lists, model)
+    for i, (availability, hours_per_week) in enumerate(zip(availabilities, hours)):
+        vectors[i, EMBEDDING_SIZE:-1] = encode_availability(availability)
+        vectors[i, -1] = encode_hours(hours_per_week)
+    return vectors
+
+
+def to_bytes(vector):
+    """Serialize a feature vector for the student_features.vector column."""
+    return np.asarray(vector, dtype=DTYPE).tobytes()
+
+
+def from_blobs(blobs):
+    """
+    Decode many stored vectors into one matrix with a single np.frombuffer.
+
+    Args:
+        blobs (list): Raw bytes from student_features.vector
+
+    Returns:
+        ndarray: (len(blobs), VECTOR_SIZE) float32 matrix
+    """
+    return np.frombuffer(b"".join(blobs), dtype=DTYPE).reshape(len(blobs), VECTOR_SIZE)
+
+
+def save_features(db, student_id, vector):
+    """
+    Store (or replace) a student's precomputed feature vector.
+
+    Args:
+        db: Database cursor
+        student_id (int): The student's user ID
+        vector (ndarray): Output of encode_student
+    """
+    db.execute("""
+        INSERT INTO student_features (student_id, model_version, vector)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE model_version = VALUES(model_version), vector = VALUES(vector)
+    """, (student_id, FEATURE_VERSION, to_bytes(vector)))
+
+
+def save_features_many(db, student_ids, vectors):
+    """
+    Store (or replace) the feature vectors of many students with one executemany.
+
+    Args:
+        db: Database cursor
+        student_ids (list): The students' user IDs
+        vectors (ndarray): Matching rows of encode_students
+    """
+    db.executemany("""
+        INSERT INTO student_features (student_id, model_version, vector)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE model_version = VALUES(model_version), vector = VALUES(vector)
+    """, [(student_id, FEATURE_VERSION, to_bytes(vector)) for student_id, vector in zip(student_ids, vectors)])
+
+
+def refresh_stale_features(db, group_code):
+    """
+    Recompute feature vectors that are missing or were built with an old version,
+    and fill in availability bitmasks of forms stored before that column existed.
+
+    Args:
+        db: Database cursor
+        group_code (str): Only students of this group are refreshed
+
+    Returns:
+        int: Number of vectors recomputed
+    """
+    db.execute("""
+        SELECT f.student_id, f.skills, f.availability, f.hours_per_week
+        FROM student_form f
+        JOIN student_group g
+            ON g.student_id = f.student_id
+        LEFT JOIN student_features sf
+            ON sf.student_id = f.student_id
+        WHERE g.group_code = %s
+            AND f.extraction_status = 'done'
+            AND (sf.model_version IS NULL OR sf.model_version <> %s)
+    """, (group_code, FEATURE_VERSION))
+    stale = db.fetchall()
+
+    for row in stale:
+        vector = encode_student(json.loads(row['skills']),
+                                json.loads(row['availability']),
+                                json.loads(row['hours_per_week']))
+        save_features(db, row['student_id'], vector)
+
+    if stale:
+        print(f"Recomputed {len(stale)} stale feature vectors for {group_code}")
+
+    db.execute("""
+        SELECT f.student_id, f.availability
+        FROM student_form f
+        JOIN student_group g
+            ON g.student_id = f.student_id
+        WHERE g.group_code = %s
+            AND f.availability_mask IS NULL
+    """, (group_code,))
+    unmasked = db.fetchall()
+    if unmasked:
+        db.executemany("UPDATE student_form SET availability_mask = %s WHERE student_id = %s",
+                       [(availability_mask(json.loads(row['availability'])), row['student_id'])
+                        for row in unmasked])
+        print(f"Filled {len(unmasked)} availability bitmasks for {group_code}")
+    return len(stale)
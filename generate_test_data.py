@@ -1,44 +1,407 @@
 # Import dotenv to load environment variables from .env file
 from dotenv import load_dotenv
+import argparse
+import json
 import os
+import random
 import sys
-# Import Flask app instance and test data generation function
-from app import app, insert_test_data
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 # Load environment variables from .env file (database password, secret key, etc.)
 load_dotenv()
 
-if __name__ == "__main__":
+# ===================================
+# Test data generation pipeline
+# ===================================
+# Creates one class of fake students. Generation and storage overlap:
+#
+#   - a thread pool generates students in chunks (per student three LLM
+#     calls for availability, skills and interests text, then one batched
+#     extraction call per chunk, then the feature vectors); with --offline
+#     the answers are synthesized from the rule-based vocabulary instead,
+#     so no model is needed and 100k students take minutes
+#   - the main thread is the only writer: finished students are collected
+#     and stored --batch-size at a time with executemany, one transaction
+#     per batch, so a crash never leaves half a student behind
+#
+# The class is recorded in a checkpoint file as soon as it exists. Running
+# the same command again resumes it: the students already committed are
+# counted in the database and only the rest are generated. The file is
+# removed once the class is complete (--fresh ignores it).
+# ===================================
+
+HOURS = ["5-10", "10-15", "15-20", "20+"]
+
+# Students stored per transaction
+WRITE_BATCH_SIZE = 500
+
+CHECKPOINT_PATH = "test_data.checkpoint.json"
+
+# Per worker thread: Faker isn't thread-safe
+_local = threading.local()
+
+
+def _faker():
+    faker = getattr(_local, "faker", None)
+    if faker is None:
+        from faker import Faker
+        faker = _local.faker = Faker()
+    return faker
+
+
+def _offline_answers(rng, skill_phrases, interest_phrases):
+    """Synthesized availability and skill/interest answers of one student (no LLM)."""
+    import features
+
+    skills = rng.sample(skill_phrases, rng.randint(2, 6))
+    interests = rng.sample(interest_phrases, rng.randint(1, 4))
+    availability = {day: [] for day in features.AVAILABILITY_DAYS}
+    for _ in range(rng.randint(2, 5)):
+        day = rng.choice(features.AVAILABILITY_DAYS)
+        period = rng.choice(features.AVAILABILITY_PERIODS)
+        if period not in availability[day]:
+            availability[day].append(period)
+    return {
+        "availability": availability,
+        "skills_text": ", ".join(skills),
+        "interests_text": ", ".join(interests),
+        "skills": skills,
+        "interests": interests,
+    }
+
+
+def generate_chunk(size, offline=False, extraction_batch=None, seed=None):
+    """
+    Generate complete students (runs on the pool threads).
+
+    Args:
+        size (int): Number of students
+        offline (bool): Synthesize the answers instead of asking the LLM
+        extraction_batch (int, optional): Students per AI extraction prompt
+        seed (optional): Seed of the names and offline answers
+
+    Returns:
+        list: One dict per student with names, hours_per_week, availability,
+              raw answers, extracted skills/interests and the feature vector
+    """
+    import ai_micro
+    import features
+    import lexicon
+
+    rng = random.Random(seed)
+    skill_phrases = list(lexicon.VOCABULARY)
+    interest_phrases = [field.lower() for field in ai_micro.interest_fields]
+    fake = _faker()
+    if seed is not None:
+        fake.seed_instance(seed)
+
+    students = []
+    for _ in range(size):
+        student = {
+            "firstname": fake.first_name(),
+            "lastname": fake.last_name(),
+            "hours_per_week": rng.choice(HOURS),
+        }
+        if offline:
+            student.update(_offline_answers(rng, skill_phrases, interest_phrases))
+        else:
+            student.update({
+                "availability": ai_micro.time_ai(),
+                "skills_text": ai_micro.skills_ai(),
+                "interests_text": ai_micro.interests_ai(),
+            })
+        students.append(student)
+
+    if not offline:
+        # Skills and interests of the whole chunk in few LLM calls
+        extracted = ai_micro.get_ai_json_batch(
+            [(student["skills_text"], student["interests_text"]) for student in students],
+            extraction_batch or ai_micro.BATCH_SIZE)
+        for student, data in zip(students, extracted):
+            student["skills"] = data["skills"]
+            student["interests"] = data["interests"]
+
+    # Precompute the feature vectors (one embedding lookup for the chunk)
+    vectors = features.encode_students([student["skills"] for student in students],
+                                       [student["availability"] for student in students],
+                                       [student["hours_per_week"] for student in students])
+    for student, vector in zip(students, vectors):
+        student["vector"] = vector
+    return students
+
+
+def create_class(conn, total_students, min_students_per_group, max_students_per_group):
+    """
+    Create the fake teacher and their class in one transaction.
+
+    Args:
+        conn (MySQLConnection): Database connection
+        total_students (int): Number of students of the class
+        min_students_per_group (int): Minimum students per group
+        max_students_per_group (int): Maximum students per group
+
+    Returns:
+        tuple: (group_code, teacher_id)
+    """
+    import group_store
+
+    fake = _faker()
+    cursor = conn.cursor()
+    conn.start_transaction()
+    try:
+        group_code = group_store.new_group_code(cursor)
+        cursor.execute("INSERT INTO users (user_firstname, user_lastname, user_type) VALUES (%s, %s, %s)",
+                       (fake.first_name(), fake.last_name(), 1))
+        teacher_id = cursor.lastrowid
+        cursor.execute("INSERT INTO teacher_group (teacher_id, total_students, group_code, min_students_per_group, max_students_per_group) VALUES (%s, %s, %s, %s, %s)",
+                       (teacher_id, total_students, group_code, min_students_per_group, max_students_per_group))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return group_code, teacher_id
+
+
+def count_students(conn, group_code):
+    """Students of a class already stored."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM student_group WHERE group_code = %s", (group_code,))
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+def write_students(conn, group_code, students):
+    """
+    Store students in one transaction: an executemany per table.
+
+    The users INSERT is a single multi-row statement, whose auto-increment
+    IDs are consecutive (in steps of auto_increment_increment) starting at
+    lastrowid.
+
+    Args:
+        conn (MySQLConnection): Database connection
+        group_code (str): The group code for this class
+        students (list): Output of generate_chunk
+
+    Returns:
+        list: The new students' user IDs
+    """
+    import features
+
+    cursor = conn.cursor()
+    conn.start_transaction()
+    try:
+        cursor.execute("SELECT @@auto_increment_increment")
+        step = cursor.fetchone()[0]
+
+        # Insert students into users table (user_type=0 for student)
+        cursor.executemany("INSERT INTO users (user_firstname, user_lastname, user_type) VALUES (%s, %s, %s)",
+                           [(student["firstname"], student["lastname"], 0) for student in students])
+        student_ids = [cursor.lastrowid + i * step for i in range(len(students))]
+
+        # Add the students to the group
+        cursor.executemany("INSERT INTO student_group (student_id, group_code) VALUES (%s, %s)",
+                           [(student_id, group_code) for student_id in student_ids])
+
+        # Their form data
+        cursor.executemany(
+            "INSERT INTO student_form (student_id, skills, interests, availability, availability_mask, hours_per_week, raw_skills, raw_interests) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+            [(student_id, json.dumps(student["skills"]), json.dumps(student["interests"]),
+              json.dumps(student["availability"]), features.availability_mask(student["availability"]),
+              json.dumps(student["hours_per_week"]), student["skills_text"], student["interests_text"])
+             for student_id, student in zip(student_ids, students)])
+
+        # And their precomputed feature vectors
+        features.save_features_many(cursor, student_ids, [student["vector"] for student in students])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return student_ids
+
+
+def load_checkpoint(path):
+    """The checkpointed class, or None."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, checkpoint):
+    """Write the checkpoint atomically (a crash never leaves half a file)."""
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def run_pipeline(conn, group_code, remaining, concurrency, batch_size, chunk_size, offline,
+                 extraction_batch=None, seed=None, on_batch=None):
     """
-    Script to generate test data for the MetroCollab application.
-    
+    Generate `remaining` students on a thread pool and store them batch by batch.
+    At most 2 * concurrency chunks are generated ahead of the writer.
+
+    Args:
+        conn (MySQLConnection): Database connection (used by this thread only)
+        group_code (str): The group code for this class
+        remaining (int): Students to add
+        concurrency (int): Generation threads
+        batch_size (int): Students per write transaction
+        chunk_size (int): Students per generation task
+        offline (bool): Synthesize answers instead of asking the LLM
+        extraction_batch (int, optional): Students per AI extraction prompt
+        seed (int, optional): Base seed; chunk i uses f"{seed}:{i}" (offline data is reproducible)
+        on_batch (callable, optional): Called with the number of students stored after every batch
+
+    Returns:
+        int: Students stored
+
+    Raises:
+        Exception: The first failure of a generation task or a write; the
+            students generated before it are still stored
+    """
+    stored = 0
+    ready = []
+
+    def flush(count):
+        nonlocal stored, ready
+        batch, ready = ready[:count], ready[count:]
+        write_students(conn, group_code, batch)
+        stored += len(batch)
+        if on_batch is not None:
+            on_batch(stored)
+
+    submitted = chunk = 0
+    in_flight = set()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        try:
+            while submitted < remaining or in_flight:
+                # Keep the pool busy, but don't run far ahead of the writer
+                while submitted < remaining and len(in_flight) < 2 * concurrency:
+                    size = min(chunk_size, remaining - submitted)
+                    chunk_seed = f"{seed}:{chunk}" if seed is not None else None
+                    in_flight.add(pool.submit(generate_chunk, size, offline, extraction_batch, chunk_seed))
+                    submitted += size
+                    chunk += 1
+
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ready.extend(future.result())
+                while len(ready) >= batch_size:
+                    flush(batch_size)
+        except BaseException:
+            for future in in_flight:
+                future.cancel()
+            # Keep what was generated before the failure
+            if ready:
+                flush(len(ready))
+            raise
+        if ready:
+            flush(len(ready))
+    return stored
+
+
+def main():
+    """
+    Generate test data for the MetroCollab application.
+
     Usage:
-        python script_name.py [num_students] [min_group_size] [max_group_size]
-    
-    Arguments (all optional):
-        students (int): Number of students to create (default: 10)
-        min_students (int): Minimum students per group (default: 2)
-        max_students (int): Maximum students per group (default: 4)
-    
+        python generate_test_data.py [students] [min_students] [max_students] [extraction_batch]
+                                     [--concurrency 4] [--batch-size 500] [--offline] [--seed N]
+                                     [--checkpoint FILE] [--fresh]
+
     Example:
-        python script_name.py 20 3 5
+        python generate_test_data.py 20 3 5
         Creates 20 students with group sizes between 3-5
-    
+
     The script will:
-    1. Create one fake teacher with a unique group code
-    2. Generate specified number of fake students
-    3. Assign AI-generated skills, interests, and availability to each student
-    4. Output the teacher page URL for easy access
-    """
-
-    students = int(sys.argv[1]) if len(sys.argv) > 1 else 10
-    min_students = int(sys.argv[2]) if len(sys.argv) > 2 else 2
-    max_students = int(sys.argv[3]) if len(sys.argv) > 3 else 4
-    
-    with app.app_context():
-        group_code, teacher_id = insert_test_data(students, min_students, max_students)
-        print(f"✓ Created {students} students")
-        print(f"✓ Group code: {group_code}")
-        print(f"✓ Teacher ID: {teacher_id}")
-        # Print direct URL to teacher dashboard for easy access during testin
-        print(f"✓ Teacher page: http://127.0.0.1:5000/teacher/{teacher_id}/{group_code}")
+    1. Create one fake teacher with a unique group code (or resume the checkpointed one)
+    2. Generate the students on a thread pool
+    3. Assign AI-generated (or, offline, synthesized) skills, interests and availability to each student
+    4. Store them in batches and output the teacher page URL for easy access
+
+    Returns:
+        int: Exit code (1 if generation stopped early)
+    """
+    parser = argparse.ArgumentParser(description="Generate a class of fake students")
+    parser.add_argument("students", type=int, nargs="?", default=10, help="Number of students (default: 10)")
+    parser.add_argument("min_students", type=int, nargs="?", default=2, help="Minimum students per group")
+    parser.add_argument("max_students", type=int, nargs="?", default=4, help="Maximum students per group")
+    parser.add_argument("extraction_batch", type=int, nargs="?",
+                        help="Students per AI extraction prompt (default: ai_micro.BATCH_SIZE)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Threads generating students")
+    parser.add_argument("--batch-size", type=int, default=WRITE_BATCH_SIZE, help="Students per write transaction")
+    parser.add_argument("--offline", action="store_true", help="Synthesize answers without Ollama")
+    parser.add_argument("--seed", type=int, help="Seed of names and offline answers")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="Checkpoint file used to resume")
+    parser.add_argument("--fresh", action="store_true", help="Ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    concurrency = max(1, args.concurrency)
+    # Every generation thread makes one LLM call at a time; let the backend allow that many
+    os.environ.setdefault("LLM_MAX_CONCURRENCY", str(concurrency))
+
+    import ai_micro
+    import db_pool
+    import embeddings
+
+    conn = db_pool.connect()
+    checkpoint = None if args.fresh else load_checkpoint(args.checkpoint)
+    if checkpoint is not None:
+        done = count_students(conn, checkpoint["group_code"])
+        print(f"Resuming class {checkpoint['group_code']}: {done}/{checkpoint['students']} students already stored")
+    else:
+        group_code, teacher_id = create_class(conn, args.students, args.min_students, args.max_students)
+        checkpoint = {"group_code": group_code, "teacher_id": teacher_id, "students": args.students,
+                      "offline": args.offline, "seed": args.seed}
+        save_checkpoint(args.checkpoint, checkpoint)
+        done = 0
+
+    group_code, teacher_id, total = checkpoint["group_code"], checkpoint["teacher_id"], checkpoint["students"]
+    offline, seed = checkpoint["offline"], checkpoint["seed"]
+    # Resumed offline runs continue the seed sequence instead of repeating the first chunks
+    if seed is not None:
+        seed = seed + done
+
+    # Load the model once here instead of racing in every thread
+    embeddings.get_model()
+
+    remaining = total - done
+    chunk_size = args.batch_size if offline else (args.extraction_batch or ai_micro.BATCH_SIZE)
+    start = time.perf_counter()
+
+    def progress(stored):
+        elapsed = time.perf_counter() - start
+        print(f"[{done + stored}/{total}] students stored ({stored / elapsed if elapsed else 0:.0f}/s)")
+
+    status = 0
+    try:
+        run_pipeline(conn, group_code, remaining, concurrency, max(1, args.batch_size), chunk_size, offline,
+                     args.extraction_batch, seed, on_batch=progress)
+    except Exception as e:
+        print(f"Generation stopped: {type(e).__name__}: {e}")
+        print(f"Run the same command again to resume from {args.checkpoint}")
+        status = 1
+    finally:
+        conn.close()
+
+    if status == 0:
+        os.remove(args.checkpoint)
+        print(f"✓ Created {total} students")
+    print(f"✓ Group code: {group_code}")
+    print(f"✓ Teacher ID: {teacher_id}")
+    # Print direct URL to teacher dashboard for easy access during testing
+    print(f"✓ Teacher page: http://127.0.0.1:5000/teacher/{teacher_id}/{group_code}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+import json
+import secrets
+import string
+
+import numpy as np
+
+import features   # feature layout version of stored runs
+from cohort import Cohort   # columnar student data
+
+# ===================================
+# Loading classes and storing generated groups
+# ===================================
+
+# Assignments sent per UPDATE statement (2 parameters each)
+WRITE_CHUNK_SIZE = 1000
+
+# Student rows fetched per round trip when loading a class
+FETCH_CHUNK_SIZE = 1000
+
+
+def new_group_code(db, length=4):
+    """
+    Generate a group code that no class uses yet (uppercase letters and digits).
+
+    Args:
+        db: Database cursor
+        length (int): Characters in the code
+
+    Returns:
+        str: Unused group code
+    """
+    characters = string.ascii_uppercase + string.digits
+    # Keep generating until we find a unique code
+    while True:
+        code = ''.join(secrets.choice(characters) for _ in range(length))
+        db.execute("SELECT 1 FROM teacher_group WHERE group_code = %s", (code,))
+        if not db.fetchone():
+            return code
+
+
+def fetch_class(conn, group_code, chunk_size=FETCH_CHUNK_SIZE):
+    """
+    Load a class's group settings and the students to cluster.
+    Only students whose AI extraction is done are returned, together with
+    their precomputed feature vector (NULL if it was never computed).
+    Student rows are streamed from an unbuffered cursor and decoded straight
+    into preallocated columns, without building a dict per student.
+
+    Args:
+        conn (MySQLConnection): Database connection
+        group_code (str): The group code for this class
+        chunk_size (int): Rows fetched per round trip
+
+    Returns:
+        tuple: (teacher_group row or None, Cohort for sort_groups)
+    """
+    db = conn.cursor(dictionary=True)
+    try:
+        db.execute("SELECT * FROM teacher_group WHERE group_code = %s", (group_code,))
+        group = db.fetchone()
+        if group is None:
+            return None, Cohort(0)
+
+        db.execute("""
+            SELECT COUNT(*) AS students
+            FROM student_group g
+            JOIN student_form f
+                ON f.student_id = g.student_id
+            WHERE g.group_code = %s
+                AND f.extraction_status = 'done'
+        """, (group_code,))
+        cohort = Cohort(db.fetchone()['students'])
+    finally:
+        db.close()
+
+    # Plain tuples in column order, read chunk by chunk as the server sends them
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute('''
+            SELECT 
+                u.id,
+                f.skills,
+                f.interests,
+                f.availability,
+                f.hours_per_week,
+                sf.vector AS feature_vector,
+                sf.model_version AS feature_version,
+                f.availability_mask
+            FROM 
+                users AS u
+            JOIN 
+                student_form AS f 
+                ON u.id = f.student_id
+            JOIN 
+                student_group g
+                ON g.student_id = u.id
+            LEFT JOIN
+                student_features AS sf
+                ON sf.student_id = u.id
+            WHERE g.group_code = %s
+                AND f.extraction_status = 'done'
+        ''', (group_code,))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                cohort.append(*row)
+    finally:
+        cursor.close()
+    return group, cohort
+
+
+def write_assignments(conn, group_code, groups, chunk_size=WRITE_CHUNK_SIZE, run=None):
+    """
+    Store the group number of every student of a class in one transaction.
+    Rows are matched on (student_id, group_code), so the student's rows in
+    other classes are left alone. Students of the class that are not in
+    `groups` get their group number cleared. Each chunk of assignments is
+    a single UPDATE joined against a derived table of (student, group) pairs.
+
+    Args:
+        conn (MySQLConnection): Database connection
+        group_code (str): The group code for this class
+        groups (dict): Group number -> list of student IDs (output of sort_groups)
+        chunk_size (int): Assignments per UPDATE statement
+        run (dict, optional): sort_groups report; its centers, interest vocabulary
+            and target sizes are stored in the same transaction (see save_run)
+
+    Returns:
+        int: Number of statements executed (excluding transaction control)
+    """
+    pairs = [(student_id, group_num)
+             for group_num, student_ids in groups.items()
+             for student_id in student_ids]
+
+    statements = 0
+    cursor = conn.cursor()
+    conn.start_transaction()
+    try:
+        cursor.execute("UPDATE student_group SET group_number = NULL WHERE group_code = %s", (group_code,))
+        statements += 1
+
+        statements += update_groups(cursor, group_code, pairs, chunk_size)
+
+        if run is not None:
+            save_run(cursor, group_code, run)
+            statements += 1
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return statements
+
+
+def update_groups(cursor, group_code, pairs, chunk_size=WRITE_CHUNK_SIZE):
+    """
+    Set the group number of the given students only (no transaction control,
+    so it can be part of a larger transaction).
+
+    Args:
+        cursor: Database cursor
+        group_code (str): The group code for this class
+        pairs (list): (student ID, group number) tuples
+        chunk_size (int): Assignments per UPDATE statement
+
+    Returns:
+        int: Number of statements executed
+    """
+    statements = 0
+    for start in range(0, len(pairs), chunk_size):
+        chunk = pairs[start:start + chunk_size]
+        rows = " UNION ALL ".join(["SELECT %s AS student_id, %s AS group_number"] + ["SELECT %s, %s"] * (len(chunk) - 1))
+        params = [value for pair in chunk for value in pair]
+        params.append(group_code)
+
+        cursor.execute(f"""
+            UPDATE student_group sg
+            JOIN ({rows}) AS a
+                ON a.student_id = sg.student_id
+            SET sg.group_number = a.group_number
+            WHERE sg.group_code = %s
+        """, params)
+        statements += 1
+    return statements
+
+
+def save_run(cursor, group_code, run):
+    """
+    Store the state of the last full run of a class, so late students can be
+    placed without clustering again (see incremental.py).
+
+    Args:
+        cursor: Database cursor
+        group_code (str): The group code for this class
+        run (dict): sort_groups report with centers, interest_vocabulary and target_sizes
+    """
+    centers = np.asarray(run['centers'], dtype=features.DTYPE)
+    cursor.execute("""
+        INSERT INTO group_run (group_code, feature_version, n_groups, n_features, centers,
+                               interest_vocabulary, target_sizes)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            feature_version = VALUES(feature_version),
+            n_groups = VALUES(n_groups),
+            n_features = VALUES(n_features),
+            centers = VALUES(centers),
+            interest_vocabulary = VALUES(interest_vocabulary),
+            target_sizes = VALUES(target_sizes)
+    """, (group_code, features.FEATURE_VERSION, centers.shape[0], centers.shape[1], centers.tobytes(),
+          json.dumps(list(run['interest_vocabulary'])), json.dumps([int(size) for size in run['target_sizes']])))
+
+
+def load_run(db, group_code):
+    """
+    Load the state of the last full run of a class.
+
+    Args:
+        db: Database cursor (dictionary=True)
+        group_code (str): The group code for this class
+
+    Returns:
+        dict: feature_version, centers (n_groups x n_features float32 matrix),
+              interest_vocabulary, target_sizes and the class's min/max group
+              size, or None if the class was never generated
+    """
+    db.execute("""
+        SELECT r.*, t.min_students_per_group, t.max_students_per_group
+        FROM group_run r
+        JOIN teacher_group t
+            ON t.group_code = r.group_code
+        WHERE r.group_code = %s
+    """, (group_code,))
+    row = db.fetchone()
+    if row is None:
+        return None
+
+    return {
+        "feature_version": row['feature_version'],
+        "centers": np.frombuffer(row['centers'], dtype=features.DTYPE).reshape(row['n_groups'], row['n_features']),
+        "interest_vocabulary": json.loads(row['interest_vocabulary']),
+        "target_sizes": json.loads(row['target_sizes']),
+        "min_size": row['min_students_per_group'],
+        "max_size": row['max_students_per_group'],
+    }
+
+
+def fetch_members(db, group_code, lock=False):
+    """
+    Current group number, interests and stored feature vector of every
+    extracted student of a class.
+
+    Args:
+        db: Database cursor (dictionary=True)
+        group_code (str): The group code for this class
+        lock (bool): Lock the class's student_group rows until the transaction
+            ends (SELECT ... FOR UPDATE), so concurrent placements can't overfill a group
+
+    Returns:
+        list: Rows with student_id, group_number (None if not placed yet),
+              interests, feature_vector and feature_version
+    """
+    db.execute(f"""
+        SELECT g.student_id, g.group_number, f.interests,
+               sf.vector AS feature_vector, sf.model_version AS feature_version
+        FROM student_group g
+        JOIN student_form f
+            ON f.student_id = g.student_id
+        LEFT JOIN student_features sf
+            ON sf.student_id = g.student_id
+        WHERE g.group_code = %s
+            AND f.extraction_status = 'done'
+        {"FOR UPDATE" if lock else ""}
+    """, (group_code,))
+    return db.fetchall()
+
+
+def fetch_vectors(conn, group_code, since=None):
+    """
+    Current stored feature vectors of a class's extracted students, for the
+    similarity index (see similarity.py).
+
+    Args:
+        conn (MySQLConnection): Database connection
+        group_code (str): The group code for this class
+        since (datetime, optional): Only vectors updated at or after this time
+
+    Returns:
+        tuple: (student IDs, (n, VECTOR_SIZE) float32 matrix, latest updated_at or None)
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT sf.student_id, sf.vector, sf.updated_at
+            FROM student_group g
+            JOIN student_form f
+                ON f.student_id = g.student_id
+            JOIN student_features sf
+                ON sf.student_id = g.student_id
+            WHERE g.group_code = %s
+                AND f.extraction_status = 'done'
+                AND sf.model_version = %s
+                {"AND sf.updated_at >= %s" if since is not None else ""}
+        """, (group_code, features.FEATURE_VERSION) + ((since,) if since is not None else ()))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    ids = [row[0] for row in rows]
+    latest = max((row[2] for row in rows), default=None)
+    return ids, features.from_blobs([row[1] for row in rows]), latest
@@ -0,0 +1,187 @@
+import json
+import time
+
+import numpy as np
+
+import assignment   # vectorized distances
+import features     # feature layout of stored vectors
+import group_store  # stored runs and targeted group updates
+
+# ===================================
+# Incremental placement of late students
+# ===================================
+# A full run (sort_alg.sort_groups) stores its cluster centers, interest
+# vocabulary and target sizes in group_run. A student whose form is done
+# after that is placed against those centers instead of re-clustering:
+#
+#   1. join the nearest group that still has room (< max group size), or
+#   2. a bounded repair: join one of the REPAIR_GROUPS nearest full groups
+#      and move the one member of it who is cheapest to move into a group
+#      with room, if that costs less than option 1.
+#
+# Only the newcomer's row (and the moved member's row) in student_group is
+# updated. When no group has room, or the stored run no longer matches
+# the feature layout, the caller falls back to a full run.
+# ===================================
+
+# Nearest full groups considered for the one-move repair
+REPAIR_GROUPS = 3
+
+NEWCOMER = -1
+
+
+def class_vectors(rows, vocabulary):
+    """
+    Rebuild students' rows of the clustering feature matrix from their stored
+    vectors, with interests one-hot encoded over a run's vocabulary
+    (interests the run didn't know are ignored, as they have no center weight).
+
+    Args:
+        rows (list): Rows with feature_vector (bytes) and interests (JSON string)
+        vocabulary (list): Interest vocabulary of the run
+
+    Returns:
+        ndarray: (len(rows), VECTOR_SIZE + len(vocabulary)) float32 matrix
+    """
+    index = {interest: i for i, interest in enumerate(vocabulary)}
+    matrix = np.zeros((len(rows), features.VECTOR_SIZE + len(vocabulary)), dtype=features.DTYPE)
+    if not rows:
+        return matrix
+
+    matrix[:, :features.VECTOR_SIZE] = features.from_blobs([row['feature_vector'] for row in rows])
+    for i, row in enumerate(rows):
+        for interest in json.loads(row['interests']):
+            column = index.get(interest)
+            if column is not None:
+                matrix[i, features.VECTOR_SIZE + column] = 1.0
+    return matrix
+
+
+def plan_placement(new_vector, centers, member_vectors, member_groups, group_sizes, max_size,
+                   repair_groups=REPAIR_GROUPS):
+    """
+    Choose where a newcomer goes, optionally moving one existing member.
+
+    Args:
+        new_vector (ndarray): Newcomer's feature row
+        centers (ndarray): (n_groups, n_features) centers of the last run
+        member_vectors (ndarray): Feature rows of members that may be moved
+        member_groups (ndarray): Group index (0-based) of each of those members
+        group_sizes (ndarray): Current size of every group (all members)
+        max_size (int): Maximum students per group
+
+    Returns:
+        list: (member index or NEWCOMER, group index) moves, or None if no group has room
+    """
+    has_room = np.asarray(group_sizes) < max_size
+    if not has_room.any():
+        return None
+
+    new_distances = assignment.distance_matrix(new_vector[None, :], centers)[0]
+    open_groups = np.flatnonzero(has_room)
+    best_open = open_groups[np.argmin(new_distances[open_groups])]
+    plan, best_cost = [(NEWCOMER, best_open)], new_distances[best_open]
+
+    # Full groups that would suit the newcomer better than the best open one
+    closer_full = [group for group in np.argsort(new_distances)
+                   if not has_room[group] and new_distances[group] < best_cost][:repair_groups]
+    if not closer_full or len(member_vectors) == 0:
+        return plan
+
+    candidates = np.flatnonzero(np.isin(member_groups, closer_full))
+    if len(candidates) == 0:
+        return plan
+
+    distances = assignment.distance_matrix(member_vectors[candidates], centers)
+    current = distances[np.arange(len(candidates)), member_groups[candidates]]
+    # Extra distance of moving each candidate to each open group
+    move_costs = distances[:, open_groups] - current[:, None]
+    best_moves = np.argmin(move_costs, axis=1)
+    costs = new_distances[member_groups[candidates]] + move_costs[np.arange(len(candidates)), best_moves]
+
+    best = np.argmin(costs)
+    if costs[best] < best_cost:
+        member = candidates[best]
+        plan = [(NEWCOMER, member_groups[member]), (member, open_groups[best_moves[best]])]
+    return plan
+
+
+def place_student(conn, group_code, student_id):
+    """
+    Place a late student into the stored groups of a class in one transaction.
+    The class's student_group rows are locked while the placement is decided,
+    so concurrent placements can't overfill a group.
+
+    Args:
+        conn (MySQLConnection): Database connection
+        group_code (str): The group code for this class
+        student_id (int): The late student's user ID
+
+    Returns:
+        dict: status ("placed", "repaired", "fallback", "not_generated",
+              "not_ready" or "already_placed"), moves as (student ID, group
+              number) pairs, the reason for a fallback and the time taken
+    """
+    start = time.perf_counter()
+    result = {"status": None, "moves": [], "reason": None}
+    cursor = conn.cursor(dictionary=True)
+    conn.start_transaction()
+    try:
+        result["status"], result["moves"], result["reason"] = _place(cursor, group_code, student_id)
+        if result["moves"]:
+            group_store.update_groups(cursor, group_code, result["moves"])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    result["seconds"] = time.perf_counter() - start
+    line = f"Late student {student_id} in {group_code}: {result['status']} in {result['seconds'] * 1000:.1f}ms"
+    if result["reason"]:
+        line += f" ({result['reason']})"
+    print(line)
+    return result
+
+
+def _place(cursor, group_code, student_id):
+    """Decide the placement; returns (status, moves, fallback reason)."""
+    run = group_store.load_run(cursor, group_code)
+    if run is None:
+        return "not_generated", [], None
+
+    centers = run["centers"]
+    vocabulary = run["interest_vocabulary"]
+    if run["feature_version"] != features.FEATURE_VERSION \
+            or centers.shape[1] != features.VECTOR_SIZE + len(vocabulary):
+        return "fallback", [], "stored run uses an older feature layout"
+
+    members = group_store.fetch_members(cursor, group_code, lock=True)
+    newcomer = next((row for row in members if row['student_id'] == student_id), None)
+    if newcomer is None:
+        return "not_ready", [], None
+    if newcomer['group_number'] is not None:
+        return "already_placed", [], None
+    if newcomer['feature_version'] != features.FEATURE_VERSION:
+        return "fallback", [], "newcomer has no current feature vector"
+
+    n_groups = len(centers)
+    placed = [row for row in members if row['group_number'] is not None]
+    if any(not 1 <= row['group_number'] <= n_groups for row in placed):
+        return "fallback", [], "stored groups don't match the stored run"
+
+    group_sizes = np.bincount([row['group_number'] - 1 for row in placed], minlength=n_groups)
+    # Only members with a current vector can be moved by the repair
+    movable = [row for row in placed if row['feature_version'] == features.FEATURE_VERSION]
+    plan = plan_placement(
+        class_vectors([newcomer], vocabulary)[0], centers,
+        class_vectors(movable, vocabulary),
+        np.array([row['group_number'] - 1 for row in movable], dtype=int),
+        group_sizes, run["max_size"])
+    if plan is None:
+        return "fallback", [], f"all {n_groups} groups are full"
+
+    moves = [(student_id if member == NEWCOMER else movable[member]['student_id'], int(group) + 1)
+             for member, group in plan]
+    return ("repaired" if len(moves) > 1 else "placed"), moves, None
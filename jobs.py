@@ -0,0 +1,169 @@
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+import db_pool
+
+# ===================================
+# Background jobs
+# ===================================
+# Long-running work (group generation) runs on a small, bounded thread pool
+# instead of inside the request. Every job has a key (e.g. the group code):
+# submitting a key that already has a queued/running job returns that job
+# instead of starting a second run.
+#
+# Job state lives in the generation_job table (one row per key, holding its
+# latest job), not in the process: with several app processes the status
+# poll can land on any of them, and two clicks that reach different
+# processes are coalesced through the row. The job itself runs on the pool
+# of the process that claimed the row. regenerate_groups.py claims classes
+# through the same rows, so a bulk run and a teacher's click never write
+# the same class at once.
+# ===================================
+
+MAX_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+
+# A queued/running job whose row hasn't been updated for this long is taken
+# to be lost (its process died) and the key can be claimed again
+STALE_AFTER = int(os.environ.get("JOB_STALE_AFTER", 900))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="job")
+
+_COLUMNS = "id, job_key AS `key`, status, stage, progress, error, created_at, finished_at"
+
+
+def submit(key, func, *args):
+    """
+    Queue a job, or return the existing one if the key is already queued/running.
+    func is called as func(set_progress, *args) where set_progress(stage, progress)
+    records the current stage name and a 0-1 progress value.
+
+    Args:
+        key (str): Coalescing key, e.g. the group code
+        func (callable): Work to run in the background
+        *args: Extra arguments for func
+
+    Returns:
+        dict: Snapshot of the job (see get)
+    """
+    job, claimed = claim(key)
+    if claimed:
+        _executor.submit(_run, job["id"], key, func, args)
+    return job
+
+
+def claim(key):
+    """
+    Start a new job for a key unless it already has a queued/running one.
+    Also used by work that runs outside this pool (e.g. regenerate_groups.py),
+    which then reports through set_progress / finish itself.
+
+    Args:
+        key (str): Coalescing key, e.g. the group code
+
+    Returns:
+        tuple: (job snapshot, True if this call claimed the key); when the key
+               was busy the snapshot is the job that holds it
+    """
+    job_id = uuid.uuid4().hex
+    conn = db_pool.checkout()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        # First job for this key, or take over the row when its last job has
+        # finished (or was lost); both statements are atomic on the row
+        cursor.execute("""
+            INSERT IGNORE INTO generation_job (job_key, id, status, stage, progress)
+            VALUES (%s, %s, 'queued', 'queued', 0)
+        """, (key, job_id))
+        claimed = cursor.rowcount == 1
+        if not claimed:
+            cursor.execute("""
+                UPDATE generation_job
+                SET id = %s, status = 'queued', stage = 'queued', progress = 0, error = NULL,
+                    created_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP, finished_at = NULL
+                WHERE job_key = %s
+                    AND (status IN ('done', 'failed') OR updated_at < NOW() - INTERVAL %s SECOND)
+            """, (job_id, key, STALE_AFTER))
+            claimed = cursor.rowcount == 1
+
+        cursor.execute(f"SELECT {_COLUMNS} FROM generation_job WHERE job_key = %s", (key,))
+        job = cursor.fetchone()
+    finally:
+        db_pool.release(conn)
+    return job, claimed
+
+
+def get(job_id):
+    """
+    Get a snapshot of a job.
+
+    Args:
+        job_id (str): ID returned by submit
+
+    Returns:
+        dict: Job fields (id, key, status, stage, progress, error, ...), or None if unknown
+              (including a finished job whose key has since started a newer one)
+    """
+    conn = db_pool.checkout()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"SELECT {_COLUMNS} FROM generation_job WHERE id = %s", (job_id,))
+        return cursor.fetchone()
+    finally:
+        db_pool.release(conn)
+
+
+def set_progress(job_id, stage, progress):
+    """
+    Record the current stage of a claimed job (marks it running).
+
+    Args:
+        job_id (str): ID of the claimed job
+        stage (str): Stage name shown while polling
+        progress (float): 0-1
+    """
+    _update(job_id, "status = 'running', stage = %s, progress = %s",
+            (stage, round(min(max(progress, 0.0), 1.0), 3)))
+
+
+def finish(job_id, error=None):
+    """
+    Record the outcome of a claimed job, which frees its key.
+
+    Args:
+        job_id (str): ID of the claimed job
+        error (str, optional): Error message if the job failed
+    """
+    if error is None:
+        _update(job_id, "status = 'done', stage = 'done', progress = 1, finished_at = CURRENT_TIMESTAMP")
+    else:
+        _update(job_id, "status = 'failed', error = %s, finished_at = CURRENT_TIMESTAMP", (error,))
+
+
+def _update(job_id, sql, params=()):
+    """Update the row of a job (no-op if the key has moved on to another job)."""
+    conn = db_pool.checkout()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"UPDATE generation_job SET {sql}, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                       tuple(params) + (job_id,))
+    finally:
+        db_pool.release(conn)
+
+
+def _run(job_id, key, func, args):
+    """Execute a job on the pool and record its outcome."""
+    try:
+        _update(job_id, "status = 'running'")
+        func(lambda stage, progress: set_progress(job_id, stage, progress), *args)
+    except Exception as e:
+        print(f"Job {job_id} ({key}) failed: {e}")
+        try:
+            finish(job_id, error=str(e))
+        except mysql.connector.Error as db_error:
+            # The row goes stale and the key can be claimed again after STALE_AFTER
+            print(f"Could not record the failure of job {job_id}: {db_error}")
+    else:
+        finish(job_id)
@@ -0,0 +1,188 @@
+import re
+
+# ===================================
+# Rule-based skill/interest extraction
+# ===================================
+# Most answers are plain lists like "python, sql, react". Those are matched
+# here against a curated vocabulary instead of asking the LLM:
+#
+#   - answers are split into tokens and scanned with a word trie, taking the
+#     longest vocabulary phrase at every position ("machine learning" beats
+#     "machine"); aliases map to one spelling ("js" -> "javascript")
+#   - hobbies from HOBBIES are dropped, mirroring the prompt's rules 3 and 6
+#   - filler words ("i", "know", "some", "and", ...) are ignored
+#
+# Every other token is leftover free text. An answer with any leftover (or
+# too little of it recognised) is not confident and goes to the LLM, so the
+# rules only ever answer inputs they fully understand.
+# ===================================
+
+# Canonical spelling -> extra spellings that mean the same thing
+VOCABULARY = {
+    # Languages
+    "python": ["py", "python3"], "java": [], "javascript": ["js", "ecmascript"],
+    "typescript": ["ts"], "c": [], "c++": ["cpp"], "c#": ["csharp", "c sharp"], "golang": [],
+    "rust": [], "kotlin": [], "swift": [], "php": [], "ruby": [], "r": [], "matlab": [],
+    "scala": [], "dart": [], "sql": [], "bash": ["shell scripting"], "html": ["html5"],
+    "css": ["css3"], "assembly": [],
+    # Frameworks and libraries
+    "react": ["reactjs", "react.js"], "angular": ["angularjs"], "vue": ["vue.js", "vuejs"],
+    "node.js": ["node", "nodejs"], "express": ["express.js"], "django": [], "flask": [],
+    "fastapi": [], "spring": ["spring boot"], ".net": ["dotnet"], "flutter": [],
+    "react native": [], "tensorflow": [], "pytorch": ["torch"], "keras": [],
+    "scikit-learn": ["sklearn", "scikit learn"], "pandas": [], "numpy": [], "opencv": [],
+    "unity": [], "unreal engine": ["unreal"], "tailwind": ["tailwind css"], "bootstrap": [],
+    "jquery": [],
+    # Tools and platforms
+    "git": [], "github": [], "docker": [], "kubernetes": ["k8s"], "linux": [],
+    "aws": ["amazon web services"], "azure": [], "google cloud": ["gcp"], "firebase": [],
+    "mysql": [], "postgresql": ["postgres"], "mongodb": ["mongo"], "sqlite": [], "redis": [],
+    "excel": [], "figma": [], "jira": [], "jenkins": [], "terraform": [], "arduino": [],
+    "raspberry pi": [], "tableau": [], "power bi": [],
+    # Subjects and capabilities
+    "web development": ["web dev"], "frontend development": ["frontend", "front-end", "front end"],
+    "backend development": ["backend", "back-end", "back end"],
+    "full stack development": ["full stack", "full-stack", "fullstack"],
+    "mobile app development": ["mobile development", "app development"],
+    "game development": ["game dev", "gamedev"], "game design": [],
+    "machine learning": ["ml"], "deep learning": [], "artificial intelligence": ["ai"],
+    "data science": [], "data analysis": ["data analytics"], "data visualization": [],
+    "data engineering": [], "statistics": [], "computer vision": [],
+    "natural language processing": ["nlp"], "cybersecurity": ["cyber security", "security"],
+    "networking": ["computer networks"], "cloud computing": ["cloud"], "devops": ["devops practices"],
+    "databases": ["database design", "database management"], "algorithms": [],
+    "data structures": [], "software engineering": [], "software testing": ["testing", "unit testing"],
+    "ui design": ["ui"], "ux design": ["ux", "ui/ux", "ui ux"], "embedded systems": [],
+    "robotics": [], "internet of things": ["iot"], "virtual reality": ["vr"],
+    "augmented reality": ["ar"], "blockchain": ["blockchain technology"],
+    "open source": ["open source projects"], "operating systems": [], "compilers": [],
+    "distributed systems": [], "mathematics": ["math", "maths"], "physics": [],
+    "electronics": [], "3d modeling": ["3d modelling"], "project management": [],
+}
+
+# Personal hobbies unrelated to projects (dropped, like the prompt's rule 3)
+HOBBIES = {
+    "hiking", "cooking", "baking", "sports", "football", "soccer", "basketball", "tennis",
+    "running", "swimming", "cycling", "gym", "fitness", "yoga", "reading", "books", "music",
+    "singing", "dancing", "travel", "traveling", "travelling", "photography", "painting",
+    "drawing", "movies", "films", "netflix", "anime", "fishing", "camping", "gardening",
+    "chess", "video games", "playing video games", "gaming", "volleyball", "skiing", "climbing",
+}
+
+# Words that carry no skill or interest of their own
+FILLER_WORDS = {
+    "i", "im", "i'm", "am", "a", "an", "the", "and", "or", "&", "/", "+", "with", "in", "of",
+    "for", "to", "on", "my", "me", "some", "basic", "basics", "good", "great", "strong",
+    "solid", "advanced", "intermediate", "beginner", "experience", "experienced", "knowledge",
+    "know", "familiar", "skills", "skill", "also", "like", "love", "enjoy", "interested",
+    "interest", "interests", "passionate", "about", "programming", "coding", "using", "etc",
+    "have", "can", "use", "used", "bit", "little", "lot", "lots", "very", "really", "mostly",
+    "language", "languages", "framework", "frameworks", "tools", "level", "stuff",
+}
+
+# Share of content tokens that must be recognised for the rules to answer
+MIN_CONFIDENCE = 1.0
+
+_TOKEN = re.compile(r"[a-z0-9+#./&'\-]+")
+_END = "$"
+
+
+def _build_trie():
+    """Word trie of every vocabulary spelling and hobby -> (kind, canonical phrase)."""
+    trie = {}
+
+    def insert(phrase, value):
+        node = trie
+        for word in phrase.split():
+            node = node.setdefault(word, {})
+        node[_END] = value
+
+    for canonical, aliases in VOCABULARY.items():
+        for spelling in [canonical] + aliases:
+            insert(spelling, ("term", canonical))
+    for hobby in HOBBIES:
+        insert(hobby, ("hobby", hobby))
+    return trie
+
+
+_TRIE = _build_trie()
+
+
+def tokenize(text):
+    """
+    Split an answer into lowercase tokens (keeps c++, c#, node.js, ui/ux).
+
+    Args:
+        text (str): Free-text answer
+
+    Returns:
+        list: Tokens
+    """
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        # Sentence punctuation, but keep a leading dot (.net)
+        token = token.rstrip(".-'").lstrip("-'")
+        if token:
+            tokens.append(token)
+    return tokens
+
+
+def match(text):
+    """
+    Find vocabulary phrases in an answer (longest match first).
+
+    Args:
+        text (str): Free-text answer
+
+    Returns:
+        tuple: (terms in first-seen order without duplicates, number of content
+                tokens, number of them recognised as a term or hobby, leftover tokens)
+    """
+    tokens = tokenize(text)
+    terms, leftover = [], []
+    content = recognised = 0
+    i = 0
+    while i < len(tokens):
+        # Longest vocabulary phrase starting at token i
+        node, best, best_end = _TRIE, None, i
+        for j in range(i, len(tokens)):
+            node = node.get(tokens[j])
+            if node is None:
+                break
+            if _END in node:
+                best, best_end = node[_END], j + 1
+        if best is not None:
+            kind, phrase = best
+            if kind == "term" and phrase not in terms:
+                terms.append(phrase)
+            content += best_end - i
+            recognised += best_end - i
+            i = best_end
+            continue
+
+        if tokens[i] not in FILLER_WORDS:
+            content += 1
+            leftover.append(tokens[i])
+        i += 1
+    return terms, content, recognised, leftover
+
+
+def extract(skills_text, interests_text, min_confidence=MIN_CONFIDENCE):
+    """
+    Extract skills and interests without the LLM, if the answers are fully understood.
+
+    Args:
+        skills_text (str): Skills answer
+        interests_text (str): Interests answer
+        min_confidence (float): Share of content tokens that must be recognised
+
+    Returns:
+        dict: {"skills": [...], "interests": [...]}, or None if the LLM is needed
+    """
+    result = {}
+    for field, text in (("skills", skills_text), ("interests", interests_text)):
+        terms, content, recognised, _ = match(text or "")
+        if content and recognised / content < min_confidence:
+            return None
+        result[field] = terms
+    return result
@@ -0,0 +1,449 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+
+import metrics   # LLM call timings for /metrics
+
+# ===================================
+# LLM backend
+# ===================================
+# Every ai_micro call goes through one backend object instead of the
+# module-level ollama.chat, so a submission spike can't flood Ollama:
+#
+#   - at most MAX_CONCURRENCY requests are in flight per process; a caller
+#     that can't get a slot before its deadline fails with BackendBusy
+#   - every call has a deadline (CALL_TIMEOUT seconds) covering queueing,
+#     retries and streaming
+#   - answers that fail to parse (malformed JSON) and transport errors are
+#     retried up to RETRIES times with jittered exponential backoff
+#   - each host has a circuit breaker: after BREAKER_THRESHOLD consecutive
+#     failures it is skipped for BREAKER_COOLDOWN seconds, then one trial
+#     call decides whether it is closed again. With every host open, calls
+#     fail fast with BackendUnavailable instead of waiting on a dead server
+#   - requests go to the host with the fewest calls in flight
+#     (OLLAMA_HOSTS=http://a:11434,http://b:11434)
+#   - every request asks Ollama to keep the model loaded for KEEP_ALIVE, so
+#     a quiet spell between submissions doesn't unload it (Ollama's default
+#     is 5 minutes) and the next call doesn't pay for loading it again
+#
+# LLM_BACKEND=fake swaps Ollama for FakeBackend, a deterministic in-process
+# model for tests and benchmarks.
+# ===================================
+
+MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", 4))
+CALL_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", 120))     # seconds per call, retries included
+RETRIES = int(os.environ.get("LLM_RETRIES", 2))
+BACKOFF = float(os.environ.get("LLM_BACKOFF", 0.5))          # seconds before the first retry
+BREAKER_THRESHOLD = int(os.environ.get("LLM_BREAKER_THRESHOLD", 5))
+BREAKER_COOLDOWN = float(os.environ.get("LLM_BREAKER_COOLDOWN", 30))
+KEEP_ALIVE = os.environ.get("LLM_KEEP_ALIVE", "30m")                # Ollama duration, "-1" keeps it forever
+
+
+class LLMError(Exception):
+    """An LLM call failed after its retries."""
+
+
+class BackendBusy(LLMError):
+    """No request slot became free before the call's deadline."""
+
+
+class BackendUnavailable(LLMError):
+    """Every host's circuit breaker is open."""
+
+
+class DeadlineExceeded(LLMError):
+    """The call ran out of time."""
+
+
+class _Host:
+    """One model server with its circuit breaker state."""
+
+    def __init__(self, name, client=None):
+        self.name = name
+        self.client = client
+        self.in_flight = 0
+        self.failures = 0          # consecutive
+        self.open_until = 0.0      # breaker open while now < open_until
+        self.trial = False         # a half-open trial call is running
+        self.last_pick = 0         # ties on in_flight go to the least recently picked host
+
+    def state(self, now):
+        if self.failures < BREAKER_THRESHOLD:
+            return "closed"
+        return "open" if now < self.open_until or self.trial else "half_open"
+
+
+class Backend:
+    """
+    Concurrency limit, deadlines, retries, circuit breakers and host
+    selection around a model server. Subclasses implement _send.
+    """
+
+    def __init__(self, hosts, max_concurrency=MAX_CONCURRENCY, timeout=CALL_TIMEOUT, retries=RETRIES,
+                 backoff=BACKOFF, seed=None):
+        """
+        Args:
+            hosts (list): _Host objects to balance over
+            max_concurrency (int): Requests in flight at once
+            timeout (float): Default deadline of a call in seconds
+            retries (int): Extra attempts after a failed one
+            backoff (float): Base delay before a retry in seconds
+            seed (int, optional): Seed of the retry jitter
+        """
+        self.hosts = hosts
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._picks = 0
+        self._stats = {
+            "calls": 0,
+            "failed": 0,
+            "retries": 0,
+            "malformed": 0,      # answers the parser rejected
+            "rejected_busy": 0,
+            "rejected_open": 0,
+            "in_flight": 0,
+        }
+
+    def _send(self, host, model, messages, stream, options, format):
+        """
+        Send one request.
+
+        Returns:
+            str, or an iterator of text pieces if stream is set
+        """
+        raise NotImplementedError
+
+    def _pick_host(self):
+        """Host with a closed (or trial-ready) breaker and the fewest calls in flight."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [host for host in self.hosts if host.state(now) != "open"]
+            if not candidates:
+                return None
+            host = min(candidates, key=lambda h: (h.in_flight, h.last_pick))
+            if host.state(now) == "half_open":
+                host.trial = True
+            self._picks += 1
+            host.last_pick = self._picks
+            host.in_flight += 1
+            self._stats["in_flight"] += 1
+            return host
+
+    def _finish(self, host, ok):
+        """Record the outcome of a request on its host's breaker."""
+        with self._lock:
+            host.in_flight -= 1
+            self._stats["in_flight"] -= 1
+            trial, host.trial = host.trial, False
+            if ok:
+                host.failures = 0
+                return
+            host.failures += 1
+            if host.failures >= BREAKER_THRESHOLD:
+                # Opened just now, or a half-open trial failed: (re)start the cooldown
+                host.open_until = time.monotonic() + BREAKER_COOLDOWN
+                if trial or host.failures == BREAKER_THRESHOLD:
+                    print(f"LLM host {host.name} failing, circuit open for {BREAKER_COOLDOWN:.0f}s")
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def complete(self, call, model, messages, parse=None, read_stream=None, options=None, format=None,
+                 timeout=None):
+        """
+        Run a chat request and return its (parsed) answer.
+
+        Args:
+            call (str): Name of the calling function (metric label)
+            model (str): Model name
+            messages (list): Chat messages
+            parse (callable, optional): Turns the answer text into the result;
+                a ValueError (e.g. json.JSONDecodeError) marks the answer as
+                malformed and the call is retried
+            read_stream (callable, optional): Streams the answer instead; called
+                with an iterator of text pieces, returns the text to parse
+                (it may stop reading early)
+            options (dict, optional): Model options (temperature, ...)
+            format (dict, optional): JSON schema the answer is constrained to
+            timeout (float, optional): Deadline in seconds (default: the backend's)
+
+        Returns:
+            The parsed answer, or the answer text without parse
+
+        Raises:
+            BackendBusy: No request slot became free in time
+            BackendUnavailable: Every host's circuit breaker is open
+            DeadlineExceeded: The deadline passed
+            LLMError: Every attempt failed
+        """
+        deadline = time.monotonic() + (timeout or self.timeout)
+        self._count("calls")
+        last_error = None
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._count("retries")
+                metrics.inc("metrocollab_llm_retries_total", call=call)
+                # Exponential backoff, jittered so retries of a spike don't line up
+                delay = self.backoff * 2 ** (attempt - 1) * self._random.uniform(0.5, 1.5)
+                if time.monotonic() + delay >= deadline:
+                    break
+                time.sleep(delay)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._slots.acquire(timeout=remaining):
+                self._count("rejected_busy")
+                self._count("failed")
+                raise BackendBusy(f"{call}: no free LLM slot within the deadline")
+            try:
+                host = self._pick_host()
+                if host is None:
+                    self._count("rejected_open")
+                    self._count("failed")
+                    raise BackendUnavailable(f"{call}: every LLM host is failing")
+
+                ok = False
+                try:
+                    with metrics.timer("metrocollab_llm_call_duration_seconds", call=call):
+                        text = self._request(host, model, messages, read_stream, options, format, deadline)
+                    ok = True
+                except DeadlineExceeded:
+                    self._count("failed")
+                    raise
+                except Exception as e:
+                    last_error = e
+                    print(f"{call}: LLM request to {host.name} failed ({type(e).__name__}: {e})")
+                    continue
+                finally:
+                    self._finish(host, ok)
+            finally:
+                self._slots.release()
+
+            if parse is None:
+                return text
+            try:
+                return parse(text)
+            except ValueError as e:
+                # The server is fine, the answer isn't: ask again
+                last_error = e
+                self._count("malformed")
+                print(f"{call}: malformed LLM answer (attempt {attempt + 1}): {e}")
+
+        self._count("failed")
+        if time.monotonic() >= deadline:
+            raise DeadlineExceeded(f"{call}: no valid answer before the deadline") from last_error
+        raise LLMError(f"{call}: no valid answer after {self.retries + 1} attempts") from last_error
+
+    def _request(self, host, model, messages, read_stream, options, format, deadline):
+        """One attempt against one host, within the deadline."""
+        if read_stream is None:
+            text = self._send(host, model, messages, False, options, format)
+            if time.monotonic() > deadline:
+                raise DeadlineExceeded("answer arrived after the deadline")
+            return text
+
+        pieces = self._send(host, model, messages, True, options, format)
+
+        def timed(pieces):
+            for piece in pieces:
+                if time.monotonic() > deadline:
+                    raise DeadlineExceeded("stream still running at the deadline")
+                yield piece
+
+        try:
+            return read_stream(timed(pieces))
+        finally:
+            # Stops reading the rest of the completion
+            close = getattr(pieces, "close", None)
+            if close is not None:
+                close()
+
+    def stats(self):
+        """
+        Counters of the backend and the breaker state of every host.
+
+        Returns:
+            dict: calls, failed, retries, malformed, rejected_busy, rejected_open,
+                  in_flight and per-host state / in-flight / consecutive failures
+        """
+        now = time.monotonic()
+        with self._lock:
+            result = dict(self._stats)
+            result["hosts"] = {host.name: {"state": host.state(now), "in_flight": host.in_flight,
+                                           "failures": host.failures}
+                               for host in self.hosts}
+        return result
+
+
+class OllamaBackend(Backend):
+    """Ollama servers through the ollama client, one client per host."""
+
+    def __init__(self, hosts=None, **kwargs):
+        """
+        Args:
+            hosts (list, optional): Server URLs (default: OLLAMA_HOSTS, comma-separated,
+                or the ollama client's own default / OLLAMA_HOST)
+            **kwargs: See Backend
+        """
+        from ollama import Client
+
+        if hosts is None:
+            hosts = [host.strip() for host in os.environ.get("OLLAMA_HOSTS", "").split(",") if host.strip()]
+        timeout = kwargs.get("timeout", CALL_TIMEOUT)
+        # The HTTP timeout is a backstop; the call deadline is enforced by Backend
+        clients = [_Host(host, Client(host=host, timeout=timeout)) for host in hosts] or \
+            [_Host(os.environ.get("OLLAMA_HOST", "default"), Client(timeout=timeout))]
+        super().__init__(clients, **kwargs)
+
+    def _send(self, host, model, messages, stream, options, format):
+        response = host.client.chat(model=model, messages=messages, stream=stream, options=options,
+                                    format=format, keep_alive=_keep_alive(KEEP_ALIVE))
+        if stream:
+            return _OllamaStream(response)
+        return response.message.content
+
+
+def _keep_alive(value):
+    """Ollama keep_alive: a duration string ("30m") as is, plain numbers as seconds."""
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+class _OllamaStream:
+    """Text pieces of a streamed Ollama answer, closable like the underlying generator."""
+
+    def __init__(self, response):
+        self._response = response
+
+    def __iter__(self):
+        for chunk in self._response:
+            yield chunk.message.content or ""
+
+    def close(self):
+        close = getattr(self._response, "close", None)
+        if close is not None:
+            close()
+
+
+class FakeBackend(Backend):
+    """
+    Deterministic in-process model for tests and benchmarks. Extraction
+    prompts are answered with the lexicon matches of the student's text
+    (lexicon.py), availability prompts with a seeded random week, and
+    anything else with a fixed sentence.
+    """
+
+    def __init__(self, latency=0.0, malformed_rate=0.0, failure_rate=0.0, hosts=("fake",), seed=0,
+                 server_parallel=None, **kwargs):
+        """
+        Args:
+            latency (float): Seconds every request takes
+            malformed_rate (float): Share of answers that are cut-off JSON
+            failure_rate (float): Share of requests that raise ConnectionError
+            hosts (tuple): Names of the fake hosts
+            seed (int): Seed of the answers and injected faults
+            server_parallel (int, optional): Requests each fake host works on at once
+                (like OLLAMA_NUM_PARALLEL); the rest queue on the "server"
+            **kwargs: See Backend
+        """
+        super().__init__([_Host(name) for name in hosts], seed=seed, **kwargs)
+        self.latency = latency
+        self._server_slots = {name: threading.Semaphore(server_parallel) for name in hosts} \
+            if server_parallel else None
+        self.malformed_rate = malformed_rate
+        self.failure_rate = failure_rate
+        self.requests = []
+        self._faults = random.Random(seed)
+
+    def _send(self, host, model, messages, stream, options, format):
+        prompt = messages[-1]["content"]
+        with self._lock:
+            self.requests.append((host.name, model))
+            fail = self._faults.random() < self.failure_rate
+            malformed = self._faults.random() < self.malformed_rate
+            week_seed = self._faults.random()
+        if self._server_slots is not None:
+            with self._server_slots[host.name]:
+                time.sleep(self.latency)
+        elif self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise ConnectionError(f"fake host {host.name} refused the request")
+
+        text = _fake_answer(prompt, week_seed)
+        if malformed:
+            text = text[:len(text) // 2]
+        if stream:
+            return iter(re.findall(r"\s+|[^\s]+", text))
+        return text
+
+
+_FAKE_SINGLE = re.compile(r"Student skills input: (.*)\n\s*Student interests input: (.*)")
+_FAKE_BATCH = re.compile(r"Student (\d+):\n\s*Skills input: (.*)\n\s*Interests input: (.*)")
+
+
+def _fake_answer(prompt, week_seed):
+    """Answer text of FakeBackend for a prompt."""
+    import lexicon
+
+    batch = _FAKE_BATCH.findall(prompt)
+    if batch:
+        return json.dumps([{"student": int(number), "skills": lexicon.match(skills)[0],
+                            "interests": lexicon.match(interests)[0]}
+                           for number, skills, interests in batch])
+    single = _FAKE_SINGLE.search(prompt)
+    if single:
+        return json.dumps({"skills": lexicon.match(single.group(1))[0],
+                           "interests": lexicon.match(single.group(2))[0]})
+    if "weekly availability" in prompt:
+        rng = random.Random(week_seed)
+        week = {day: [] for day in ("mon", "tue", "wed", "thu", "fri", "weekend")}
+        for _ in range(rng.randint(2, 5)):
+            day = rng.choice(list(week))
+            period = rng.choice(["morning", "afternoon", "evening"])
+            if period not in week[day]:
+                week[day].append(period)
+        return json.dumps(week)
+    return "I enjoy python, sql and web development projects, and I want to learn machine learning."
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """
+    The process-wide backend (created on first use from LLM_BACKEND: "ollama" or "fake").
+
+    Returns:
+        Backend: Shared backend
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                kind = os.environ.get("LLM_BACKEND", "ollama")
+                _backend = FakeBackend() if kind == "fake" else OllamaBackend()
+    return _backend
+
+
+def set_backend(backend):
+    """
+    Replace the process-wide backend (tests, benchmarks).
+
+    Args:
+        backend (Backend): New backend, or None to recreate it from the environment on next use
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -0,0 +1,215 @@
+import bisect
+import contextlib
+import os
+import threading
+import time
+
+# ===================================
+# Metrics (Prometheus text format)
+# ===================================
+# Counters and histograms kept in process memory and rendered by the
+# /metrics route. Everything is switched off unless METRICS_ENABLED is
+# set: the helpers below return immediately and app.py doesn't install
+# any hooks, so a disabled build pays nothing beyond a flag check.
+# ===================================
+
+ENABLED = os.environ.get("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+
+# Latency buckets in seconds (from a cheap query up to a slow LLM call / big clustering run)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# name -> (type, help text)
+METRICS = {
+    "metrocollab_http_request_duration_seconds": ("histogram", "Flask request latency by route"),
+    "metrocollab_http_requests_total": ("counter", "Flask requests by route and status"),
+    "metrocollab_db_query_duration_seconds": ("histogram", "Database execute calls made through get_db"),
+    "metrocollab_llm_call_duration_seconds": ("histogram", "Ollama calls made by ai_micro"),
+    "metrocollab_llm_retries_total": ("counter", "Retried LLM calls (malformed answer or failed request)"),
+    "metrocollab_sort_stage_duration_seconds": ("histogram", "Stages of sort_groups"),
+    "metrocollab_model_load_duration_seconds": ("histogram", "GloVe model loads"),
+}
+
+_lock = threading.Lock()
+_counters = {}      # (name, labels) -> value
+_histograms = {}    # (name, labels) -> [bucket counts..., +Inf count, sum]
+_collected = {}     # name -> (type, help text, callable returning {labels: value})
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    """
+    Increase a counter.
+
+    Args:
+        name (str): Metric name (see METRICS)
+        amount (float): Increment
+        **labels: Label values
+    """
+    if not ENABLED:
+        return
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    """
+    Record a value (usually a duration in seconds) in a histogram.
+
+    Args:
+        name (str): Metric name (see METRICS)
+        value (float): Observed value
+        **labels: Label values
+    """
+    if not ENABLED:
+        return
+    key = (name, _label_key(labels))
+    index = bisect.bisect_left(BUCKETS, value)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        histogram[index] += 1
+        histogram[-1] += value
+
+
+@contextlib.contextmanager
+def _timed(name, labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def timer(name, **labels):
+    """
+    Context manager that records the duration of its block in a histogram.
+
+    Args:
+        name (str): Metric name (see METRICS)
+        **labels: Label values
+
+    Returns:
+        Context manager (a no-op when metrics are disabled)
+    """
+    if not ENABLED:
+        return contextlib.nullcontext()
+    return _timed(name, labels)
+
+
+def register_gauge(name, help_text, collect):
+    """
+    Register a gauge whose values are read when /metrics is rendered.
+
+    Args:
+        name (str): Metric name
+        help_text (str): HELP line
+        collect (callable): Returns {label dict as tuple of pairs: value}, or a plain number
+    """
+    with _lock:
+        _collected[name] = ("gauge", help_text, collect)
+
+
+def register_counter(name, help_text, collect):
+    """
+    Register a counter kept elsewhere (e.g. a module's stats()) whose values
+    are read when /metrics is rendered. Use it for totals that only go up,
+    so Prometheus rate()/increase() work on them.
+
+    Args:
+        name (str): Metric name, ending in _total
+        help_text (str): HELP line
+        collect (callable): Returns {label dict as tuple of pairs: value}, or a plain number
+    """
+    with _lock:
+        _collected[name] = ("counter", help_text, collect)
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = []
+    for key, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def render():
+    """
+    Render all metrics in the Prometheus text exposition format.
+
+    Returns:
+        str: Metrics text
+    """
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(values) for key, values in _histograms.items()}
+        collected = dict(_collected)
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+        else:
+            for (metric, labels), values in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS, values):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                cumulative += values[len(BUCKETS)]
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {values[-1]}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+    for name, (kind, help_text, collect) in collected.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        values = collect()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in values.items():
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+class TimedCursor:
+    """
+    Wraps a database cursor and times execute/executemany calls.
+    Everything else is passed through to the wrapped cursor.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        with timer("metrocollab_db_query_duration_seconds", statement=_statement_kind(operation)):
+            return self._cursor.execute(operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        with timer("metrocollab_db_query_duration_seconds", statement=_statement_kind(operation)):
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+def _statement_kind(operation):
+    """First keyword of a SQL statement (SELECT, INSERT, ...), used as a label."""
+    words = operation.split(None, 1)
+    return words[0].upper() if words else ""
@@ -0,0 +1,219 @@
+import collections
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+import embeddings   # model name of the shared GloVe vectors
+
+# ===================================
+# Cache of skill phrase embeddings
+# ===================================
+# A phrase's embedding is the mean GloVe vector of its known words. Classes
+# reuse a small set of phrases ("python", "web development", ...), so each
+# phrase is embedded once per model and kept:
+#
+#   - in an in-process LRU of MEMORY_ENTRIES phrases, and
+#   - in a small SQLite file keyed on (model version, phrase), so other
+#     processes and later runs don't recompute it either.
+#
+# Phrases no cache knows are embedded together: their words are looked up
+# in key_to_index and gathered from the model's vector array in one fancy
+# index. Phrases without a known word are cached too (as "no vector").
+# ===================================
+
+CACHE_PATH = os.environ.get(
+    "PHRASE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "phrase_cache.sqlite3"),
+)
+MEMORY_ENTRIES = int(os.environ.get("PHRASE_CACHE_MEMORY_ENTRIES", 50000))
+
+# Phrases per SELECT ... IN (...) (stays below SQLite's parameter limit)
+LOOKUP_CHUNK_SIZE = 500
+
+_lock = threading.Lock()
+_local = threading.local()
+_memory = collections.OrderedDict()     # (model version, phrase) -> float32 vector or None
+_stats = {
+    "memory_hits": 0,
+    "disk_hits": 0,
+    "misses": 0,
+    "compute_seconds": 0.0,   # spent embedding missed phrases
+    "seconds_saved": 0.0,     # estimated: hits x average cost of a miss
+}
+
+
+def normalize(phrase):
+    """Cache key of a phrase: lowercase, single spaces (the embedding ignores the rest)."""
+    return " ".join(phrase.lower().split())
+
+
+def model_version(model):
+    """
+    Name the cached vectors of a model are stored under.
+    Models other than the shared GloVe vectors (e.g. the benchmarks' stub)
+    set a cache_version attribute so their vectors never mix with GloVe's.
+
+    Args:
+        model (KeyedVectors): Word vectors
+
+    Returns:
+        str: Model version
+    """
+    return getattr(model, "cache_version", None) or embeddings.MODEL_NAME
+
+
+def _connection():
+    """SQLite connection for the current thread (created on first use)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(CACHE_PATH, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS phrase_vectors (
+                model_version TEXT NOT NULL,
+                phrase TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model_version, phrase)
+            )
+        """)
+        _local.conn = conn
+    return conn
+
+
+def _remember(key, vector):
+    """Put an entry in the in-memory LRU (caller holds _lock)."""
+    _memory[key] = vector
+    _memory.move_to_end(key)
+    while len(_memory) > MEMORY_ENTRIES:
+        _memory.popitem(last=False)
+
+
+def _embed(phrases, model):
+    """
+    Embed phrases from the model in one gather.
+
+    Args:
+        phrases (list): Normalized phrases
+        model (KeyedVectors): Word vectors
+
+    Returns:
+        list: float32 vector per phrase (None if none of its words are known)
+    """
+    phrase_ids, word_ids = [], []
+    for i, phrase in enumerate(phrases):
+        for word in phrase.split():
+            index = model.key_to_index.get(word)
+            if index is not None:
+                phrase_ids.append(i)
+                word_ids.append(index)
+
+    sums = np.zeros((len(phrases), model.vector_size), dtype=np.float32)
+    if word_ids:
+        phrase_ids = np.asarray(phrase_ids)
+        np.add.at(sums, phrase_ids, np.asarray(model.vectors[np.asarray(word_ids)], dtype=np.float32))
+    counts = np.bincount(np.asarray(phrase_ids, dtype=int), minlength=len(phrases))
+    means = sums / np.maximum(counts, 1).astype(np.float32)[:, None]
+    return [means[i] if counts[i] else None for i in range(len(phrases))]
+
+
+def lookup(phrases, model, normalized=False):
+    """
+    Embeddings of many phrases: memory first, then the SQLite table, then
+    the model for whatever is left (which is then stored in both).
+
+    Args:
+        phrases (iterable): Skill phrases
+        model (KeyedVectors): Word vectors
+        normalized (bool): The phrases already went through normalize()
+
+    Returns:
+        tuple: (dict normalized phrase -> float32 vector or None,
+                dict of this lookup's memory_hits, disk_hits, misses, seconds
+                and estimated seconds_saved)
+    """
+    start = time.perf_counter()
+    version = model_version(model)
+    wanted = list(dict.fromkeys(phrases if normalized else (normalize(phrase) for phrase in phrases)))
+    found, missing = {}, []
+
+    with _lock:
+        for phrase in wanted:
+            key = (version, phrase)
+            if key in _memory:
+                _memory.move_to_end(key)
+                found[phrase] = _memory[key]
+            else:
+                missing.append(phrase)
+    memory_hits = len(found)
+
+    if missing:
+        conn = _connection()
+        for chunk_start in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+            chunk = missing[chunk_start:chunk_start + LOOKUP_CHUNK_SIZE]
+            rows = conn.execute(
+                f"SELECT phrase, vector FROM phrase_vectors WHERE model_version = ? "
+                f"AND phrase IN ({', '.join('?' * len(chunk))})",
+                [version] + chunk,
+            ).fetchall()
+            for phrase, blob in rows:
+                if not blob:
+                    found[phrase] = None
+                elif len(blob) == 4 * model.vector_size:
+                    found[phrase] = np.frombuffer(blob, dtype=np.float32)
+                # Anything else was written by a different model: recompute it
+    disk_hits = len(found) - memory_hits
+
+    computed = [phrase for phrase in missing if phrase not in found]
+    compute_seconds = 0.0
+    if computed:
+        stage = time.perf_counter()
+        vectors = _embed(computed, model)
+        compute_seconds = time.perf_counter() - stage
+        found.update(zip(computed, vectors))
+        conn = _connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO phrase_vectors (model_version, phrase, vector) VALUES (?, ?, ?)",
+                [(version, phrase, vector.tobytes() if vector is not None else b"")
+                 for phrase, vector in zip(computed, vectors)],
+            )
+
+    with _lock:
+        for phrase in missing:
+            _remember((version, phrase), found[phrase])
+        _stats["memory_hits"] += memory_hits
+        _stats["disk_hits"] += disk_hits
+        _stats["misses"] += len(computed)
+        _stats["compute_seconds"] += compute_seconds
+        # What the hits would have cost at the average cost of a miss so far
+        miss_cost = _stats["compute_seconds"] / _stats["misses"] if _stats["misses"] else 0.0
+        saved = (memory_hits + disk_hits) * miss_cost
+        _stats["seconds_saved"] += saved
+
+    return found, {
+        "phrases": len(wanted),
+        "memory_hits": memory_hits,
+        "disk_hits": disk_hits,
+        "misses": len(computed),
+        "seconds": time.perf_counter() - start,
+        "seconds_saved": saved,
+    }
+
+
+def stats():
+    """
+    Hit/miss counters of the cache since the process started.
+
+    Returns:
+        dict: memory_hits, disk_hits, misses, hit_rate, compute_seconds,
+              seconds_saved and memory_entries
+    """
+    with _lock:
+        result = dict(_stats)
+        result["memory_entries"] = len(_memory)
+    lookups = result["memory_hits"] + result["disk_hits"] + result["misses"]
+    result["hit_rate"] = round((result["memory_hits"] + result["disk_hits"]) / lookups, 4) if lookups else None
+    return result
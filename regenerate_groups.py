@@ -0,0 +1,256 @@
+# Import dotenv to load environment variables from .env file
+from dotenv import load_dotenv
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Load environment variables from .env file (database password, etc.)
+load_dotenv()
+
+# ===================================
+# Bulk group regeneration
+# ===================================
+# Regenerates the groups of many classes in one command, e.g. at the start
+# of a term. Group codes are selected with filters and handed to a pool of
+# worker processes. The parent makes sure the native GloVe copy exists
+# before the workers start; each worker then memory-maps that same file,
+# so they all read the same page-cache pages instead of loading their own
+# copy (see embeddings.py). Each worker keeps its own database connection, runs
+# sort_groups per class and writes the result back in one transaction.
+# A failing class is reported and the others carry on; a class that is
+# already being generated (e.g. from the teacher dashboard) is skipped.
+# ===================================
+
+# Set in each worker process by _init_worker
+_db = None
+_conn = None
+
+
+def select_group_codes(db, codes=None, teacher_id=None, pattern=None, ungrouped_only=False):
+    """
+    Select the classes to regenerate.
+
+    Args:
+        db: Database cursor (dictionary=True)
+        codes (list, optional): Only these group codes
+        teacher_id (int, optional): Only classes of this teacher
+        pattern (str, optional): SQL LIKE pattern on the group code
+        ungrouped_only (bool): Only classes where no student has a group yet
+
+    Returns:
+        list: Group codes, largest classes first (so they don't end up last in the pool)
+    """
+    conditions, params = [], []
+    if codes:
+        conditions.append(f"t.group_code IN ({', '.join(['%s'] * len(codes))})")
+        params.extend(codes)
+    if teacher_id is not None:
+        conditions.append("t.teacher_id = %s")
+        params.append(teacher_id)
+    if pattern:
+        conditions.append("t.group_code LIKE %s")
+        params.append(pattern)
+    if ungrouped_only:
+        conditions.append("""NOT EXISTS (
+            SELECT 1 FROM student_group g
+            WHERE g.group_code = t.group_code AND g.group_number IS NOT NULL
+        )""")
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    db.execute(f"""
+        SELECT t.group_code, COUNT(g.student_id) AS students
+        FROM teacher_group t
+        LEFT JOIN student_group g
+            ON g.group_code = t.group_code
+        {where}
+        GROUP BY t.group_code
+        ORDER BY students DESC
+    """, params)
+    return [row['group_code'] for row in db.fetchall()]
+
+
+def _init_worker():
+    """Map the shared model and open this worker's database connection."""
+    global _db, _conn
+    import db_pool
+    import embeddings
+
+    embeddings.get_model()
+    _conn = db_pool.connect()
+    _db = _conn.cursor(dictionary=True)
+
+
+def regenerate_class(group_code, assignment_method="auto", dry_run=False, engine=None):
+    """
+    Regenerate the groups of one class (runs in a worker process).
+    Errors are caught and returned so one bad class doesn't stop the run.
+    The class is claimed through its generation_job row first (see jobs.py);
+    a class whose groups are being generated from the dashboard is skipped.
+
+    Args:
+        group_code (str): The group code for this class
+        assignment_method (str): "auto", "exact" or "greedy" (see assignment.py)
+        dry_run (bool): Compute the groups but don't store them
+        engine (str, optional): Clustering engine overriding the class's setting (see clustering.py)
+
+    Returns:
+        dict: group_code, status ("ok", "skipped" or "failed"), students, groups,
+              seconds, per-stage timings and the error message if it failed
+    """
+    import clustering
+    import features
+    import group_store
+    import jobs
+    import sort_alg
+
+    result = {"group_code": group_code, "status": "ok", "students": 0, "groups": 0,
+              "seconds": 0.0, "timings": {}, "error": None, "pid": os.getpid()}
+    start = time.perf_counter()
+    job = None
+    try:
+        if not dry_run:
+            # Same claim as the dashboard's Generate button: never write a
+            # class that another run is clustering at the same time
+            job, claimed = jobs.claim(group_code)
+            if not claimed:
+                result["status"] = "skipped"
+                result["error"] = f"generation job {job['id']} is {job['status']}"
+                job = None
+                return result
+            jobs.set_progress(job["id"], "loading", 0.0)
+
+        stage = time.perf_counter()
+        features.refresh_stale_features(_db, group_code)
+        group, data = group_store.fetch_class(_conn, group_code)
+        result["timings"]["load"] = round(time.perf_counter() - stage, 4)
+
+        result["students"] = len(data)
+        if group is None or not data:
+            result["status"] = "skipped"
+            result["error"] = "no such class" if group is None else "no extracted students"
+            return result
+
+        engine_options = clustering.options_from_row(group)
+        if engine:
+            engine_options["engine"] = engine
+
+        report = {}
+        sorted_groups = sort_alg.sort_groups(
+            group["min_students_per_group"], group["max_students_per_group"], data,
+            assignment_method=assignment_method, report=report, engine_options=engine_options)
+        result["groups"] = len(sorted_groups)
+        result["engine"] = report["clustering"]["engine"]
+        result["inertia"] = round(report["clustering"]["inertia"], 4)
+        result["timings"].update({name: round(value, 4) for name, value in report["timings"].items()})
+
+        if not dry_run:
+            stage = time.perf_counter()
+            group_store.write_assignments(_conn, group_code, sorted_groups, run=report)
+            result["timings"]["write"] = round(time.perf_counter() - stage, 4)
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        result["seconds"] = round(time.perf_counter() - start, 4)
+        if job is not None:
+            # Free the class for the next run
+            try:
+                jobs.finish(job["id"], error=result["error"] if result["status"] == "failed" else None)
+            except Exception as e:
+                print(f"Could not record the outcome for {group_code}: {e}")
+    return result
+
+
+def main():
+    """
+    Regenerate groups for every selected class.
+
+    Usage:
+        python regenerate_groups.py [--all | --codes A1B2 C3D4 | --teacher 12 | --like 'A%']
+                                    [--ungrouped] [--workers N] [--assignment auto] [--engine auto]
+                                    [--dry-run] [--output results.json]
+
+    Returns:
+        int: Exit code (1 if any class failed)
+    """
+    parser = argparse.ArgumentParser(description="Regenerate groups for many classes in parallel")
+    parser.add_argument("--all", action="store_true", help="Select every class")
+    parser.add_argument("--codes", nargs="+", help="Group codes to regenerate")
+    parser.add_argument("--teacher", type=int, help="Only classes of this teacher ID")
+    parser.add_argument("--like", help="SQL LIKE pattern on the group code")
+    parser.add_argument("--ungrouped", action="store_true", help="Only classes without groups yet")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: number of CPU cores)")
+    parser.add_argument("--assignment", default="auto", choices=["auto", "exact", "greedy"])
+    parser.add_argument("--engine", choices=["auto", "kmeans", "kmeans++", "minibatch"],
+                        help="Clustering engine for every class (default: each class's own setting)")
+    parser.add_argument("--dry-run", action="store_true", help="Compute groups without storing them")
+    parser.add_argument("--output", help="Write per-class results as JSON to this file")
+    args = parser.parse_args()
+
+    if not (args.all or args.codes or args.teacher is not None or args.like or args.ungrouped):
+        parser.error("select classes with --all, --codes, --teacher, --like or --ungrouped")
+
+    workers = max(1, args.workers)
+    if workers > 1:
+        # One process per core: keep numpy/sklearn from starting a thread per core in each of them
+        for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ.setdefault(var, "1")
+
+    import db_pool
+    import embeddings
+
+    conn = db_pool.connect()
+    db = conn.cursor(dictionary=True)
+    codes = select_group_codes(db, args.codes, args.teacher, args.like, args.ungrouped)
+    db.close()
+    conn.close()
+
+    if not codes:
+        print("No classes selected")
+        return 0
+    print(f"Regenerating {len(codes)} classes with {workers} workers")
+
+    # Download/convert the model once here instead of racing in every worker
+    embeddings.get_model()
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(regenerate_class, code, args.assignment, args.dry_run, args.engine): code
+                   for code in codes}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. out of memory)
+                result = {"group_code": futures[future], "status": "failed", "students": 0,
+                          "groups": 0, "seconds": 0.0, "timings": {},
+                          "error": f"{type(e).__name__}: {e}", "pid": None}
+            results.append(result)
+
+            line = (f"[{len(results)}/{len(codes)}] {result['group_code']}: {result['status']}, "
+                    f"{result['students']} students -> {result['groups']} groups in {result['seconds']:.2f}s")
+            if result["error"]:
+                line += f" ({result['error']})"
+            print(line)
+    elapsed = time.perf_counter() - start
+
+    failed = [r for r in results if r["status"] == "failed"]
+    done = [r for r in results if r["status"] == "ok"]
+    busy = sum(r["seconds"] for r in results)
+    print(f"Done in {elapsed:.2f}s: {len(done)} regenerated, "
+          f"{len(results) - len(done) - len(failed)} skipped, {len(failed)} failed "
+          f"({busy:.2f}s of class time, {busy / elapsed if elapsed else 0:.1f}x parallel speedup)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"workers": workers, "seconds": round(elapsed, 4), "classes": results}, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -32,6 +32,10 @@ CREATE TABLE teacher_group
     min_students_per_group INT NOT NULL,
     max_students_per_group INT NOT NULL,
     group_code TEXT UNIQUE,
+    clustering_engine VARCHAR(10) NOT NULL DEFAULT 'auto',  -- auto / kmeans / kmeans++ / minibatch
+    clustering_n_init INT NULL,                             -- NULL = engine default
+    clustering_batch_size INT NULL,                         -- MiniBatchKMeans only
+    clustering_threads INT NULL,                            -- NULL = all cores
     FOREIGN KEY (teacher_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
@@ -107,8 +111,64 @@ CREATE TABLE student_form
     skills JSON CHECK (JSON_VALID(skills)),           
     interests JSON CHECK (JSON_VALID(interests)),    
     availability JSON CHECK (JSON_VALID(availability)),
+    availability_mask INT UNSIGNED NULL,               -- 18-bit slot bitmask of availability (see features.py)
     hours_per_week JSON CHECK (JSON_VALID(hours_per_week)),
+    raw_skills TEXT,                                   -- free text as typed by the student
+    raw_interests TEXT,
+    extraction_status VARCHAR(10) NOT NULL DEFAULT 'done',  -- pending / extracting / done / failed (AI extraction)
+    extraction_started_at TIMESTAMP NULL,              -- when a worker claimed the form for extraction
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     INDEX(student_id),
+    INDEX(extraction_status),
     FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE
 );
+
+-- ===================================
+-- Student Features Table
+-- ===================================
+-- Precomputed float32 feature vector per student (skill embedding,
+-- availability slots, hours code), tagged with the model/layout version
+CREATE TABLE student_features
+(
+    student_id INT PRIMARY KEY,
+    model_version VARCHAR(64) NOT NULL,
+    vector BLOB NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- ===================================
+-- Group Run Table
+-- ===================================
+-- State of the last full group generation of a class (float32 cluster
+-- centers, interest vocabulary, target sizes), used to place students
+-- who submit after the groups were generated without re-clustering
+CREATE TABLE group_run
+(
+    group_code VARCHAR(10) PRIMARY KEY,
+    feature_version VARCHAR(64) NOT NULL,
+    n_groups INT NOT NULL,
+    n_features INT NOT NULL,
+    centers MEDIUMBLOB NOT NULL,
+    interest_vocabulary JSON CHECK (JSON_VALID(interest_vocabulary)),
+    target_sizes JSON CHECK (JSON_VALID(target_sizes)),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- ===================================
+-- Generation Job Table
+-- ===================================
+-- Latest background group generation job per class (see jobs.py), shared
+-- by all app processes so any of them can answer a status poll
+CREATE TABLE generation_job
+(
+    job_key VARCHAR(64) PRIMARY KEY,                -- coalescing key (the group code)
+    id CHAR(32) NOT NULL UNIQUE,
+    status VARCHAR(10) NOT NULL,                    -- queued / running / done / failed
+    stage VARCHAR(32) NOT NULL,
+    progress FLOAT NOT NULL DEFAULT 0,              -- 0-1
+    error TEXT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  -- last progress report
+    finished_at TIMESTAMP NULL
+);
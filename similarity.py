@@ -0,0 +1,185 @@
+import collections
+import os
+import threading
+import time
+
+import numpy as np
+
+import features      # feature layout of stored vectors
+import group_store   # stored feature vectors of a class
+
+# ===================================
+# "Find teammates like me" similarity index
+# ===================================
+# One in-memory index per class, built from the stored feature vectors
+# (skill embedding, availability, hours; see features.py) that sort_groups
+# clusters on. Interests are left out: their one-hot columns depend on the
+# vocabulary of a whole run.
+#
+# Rows are L2-normalized float32, so the cosine similarity of a batch of
+# query students to the whole class is one matrix product. The index is
+# brought up to date on use: at most every REFRESH_INTERVAL seconds it
+# fetches only the vectors updated since its last sync (new or re-extracted
+# forms) and upserts them. After REBUILD_INTERVAL seconds it is rebuilt
+# from scratch, which also drops students who left the class.
+# ===================================
+
+REFRESH_INTERVAL = float(os.environ.get("SIMILARITY_REFRESH_INTERVAL", 2.0))   # seconds
+REBUILD_INTERVAL = float(os.environ.get("SIMILARITY_REBUILD_INTERVAL", 600.0))  # seconds
+MAX_INDEXES = int(os.environ.get("SIMILARITY_MAX_INDEXES", 64))   # classes kept in memory
+
+DEFAULT_K = 5
+MAX_K = 50
+
+_lock = threading.Lock()
+_indexes = collections.OrderedDict()    # group_code -> VectorIndex
+
+
+class VectorIndex:
+    """Normalized feature vectors of one class, addressable by student ID."""
+
+    def __init__(self, capacity=256):
+        """
+        Args:
+            capacity (int): Expected number of students (arrays grow if exceeded)
+        """
+        capacity = max(1, capacity)
+        self.size = 0
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._matrix = np.zeros((capacity, features.VECTOR_SIZE), dtype=features.DTYPE)
+        self._row_of = {}
+        self.lock = threading.Lock()
+        self.built_at = time.monotonic()
+        self.checked_at = self.built_at
+        self.synced_to = None   # latest student_features.updated_at seen
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, student_id):
+        return student_id in self._row_of
+
+    def upsert(self, student_ids, vectors):
+        """
+        Add students, or replace the vectors of students already indexed.
+
+        Args:
+            student_ids (list): User IDs
+            vectors (ndarray): (len(student_ids), VECTOR_SIZE) feature vectors
+        """
+        vectors = np.asarray(vectors, dtype=features.DTYPE)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        normalized = vectors / np.where(norms > 0, norms, 1)
+
+        rows = np.empty(len(student_ids), dtype=np.int64)
+        for i, student_id in enumerate(student_ids):
+            row = self._row_of.get(student_id)
+            if row is None:
+                if self.size == len(self._ids):
+                    capacity = 2 * len(self._ids)
+                    self._ids = np.resize(self._ids, capacity)
+                    self._matrix = np.resize(self._matrix, (capacity, features.VECTOR_SIZE))
+                row = self._row_of[student_id] = self.size
+                self._ids[row] = student_id
+                self.size += 1
+            rows[i] = row
+        self._matrix[rows] = normalized
+
+    def query(self, student_ids, k=DEFAULT_K):
+        """
+        Most similar students of every query student, in one matrix product.
+
+        Args:
+            student_ids (list): User IDs of indexed students
+            k (int): Results per student (the student themselves is left out)
+
+        Returns:
+            list: Per query student, a list of (student ID, cosine similarity), best first
+
+        Raises:
+            KeyError: If a student is not in the index
+        """
+        rows = np.array([self._row_of[student_id] for student_id in student_ids], dtype=np.int64)
+        k = min(k, self.size - 1)
+        if k <= 0 or len(rows) == 0:
+            return [[] for _ in rows]
+
+        matrix = self._matrix[:self.size]
+        scores = matrix[rows] @ matrix.T
+        scores[np.arange(len(rows)), rows] = -np.inf
+        # Top k per row without sorting the whole class, then sort just those
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        ids = self._ids[top]
+        return [list(zip(ids[i].tolist(), top_scores[i].tolist())) for i in range(len(rows))]
+
+
+def _refresh(conn, group_code, index):
+    """Upsert the vectors updated since the last sync (caller holds index.lock)."""
+    ids, vectors, latest = group_store.fetch_vectors(conn, group_code, since=index.synced_to)
+    if ids:
+        index.upsert(ids, vectors)
+        index.synced_to = max(latest, index.synced_to) if index.synced_to else latest
+    index.checked_at = time.monotonic()
+    return len(ids)
+
+
+def get_index(conn, group_code):
+    """
+    The up-to-date index of a class, built on first use.
+
+    Args:
+        conn (MySQLConnection): Database connection
+        group_code (str): The group code for this class
+
+    Returns:
+        VectorIndex: Index of the class's extracted students
+    """
+    now = time.monotonic()
+    with _lock:
+        index = _indexes.get(group_code)
+        if index is None or now - index.built_at > REBUILD_INTERVAL:
+            index = _indexes[group_code] = VectorIndex()
+            index.checked_at = float("-inf")
+        _indexes.move_to_end(group_code)
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+
+    with index.lock:
+        if now - index.checked_at >= REFRESH_INTERVAL:
+            start = time.perf_counter()
+            built = index.synced_to is None
+            updated = _refresh(conn, group_code, index)
+            if updated:
+                print(f"Similarity index {group_code}: {'built with' if built else 'updated'} "
+                      f"{updated} students in {(time.perf_counter() - start) * 1000:.1f}ms")
+    return index
+
+
+def similar_students(conn, group_code, student_ids, k=DEFAULT_K):
+    """
+    Top-k most similar classmates of each given student.
+
+    Args:
+        conn (MySQLConnection): Database connection
+        group_code (str): The group code for this class
+        student_ids (list): User IDs to find teammates for
+        k (int): Results per student (at most MAX_K)
+
+    Returns:
+        dict: Student ID -> list of (student ID, cosine similarity), best first
+
+    Raises:
+        KeyError: If a student has no current feature vector in this class
+    """
+    index = get_index(conn, group_code)
+    with index.lock:
+        missing = [student_id for student_id in student_ids if student_id not in index]
+        if missing:
+            raise KeyError(missing)
+        results = index.query(student_ids, min(k, MAX_K))
+    return dict(zip(student_ids, results))
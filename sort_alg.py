@@ -1,66 +1,118 @@
-import json
+import time
 import numpy as np
-from sklearn.preprocessing import MultiLabelBinarizer
-from sklearn.cluster import KMeans
-import gensim.downloader as api
+from scipy import sparse
 
-def sort_groups(min_group, max_group, users_data):
-    
-    users = users_data  
-    
-    # Parse the inner JSON
-    for rec in users:
-        rec['skills'] = json.loads(rec['skills'])
-        rec['interests'] = json.loads(rec['interests'])
-        rec['availability'] = json.loads(rec['availability'])
-        rec['hours_per_week'] = rec['hours_per_week'].strip('"')
-    
-    # flatten availability into "day_period" strings
-    def flatten_availability(avail_dict):
-        slots = []
-        for day, periods in avail_dict.items():
-            for period in periods:
-                slots.append(f"{day}_{period}")
-        return slots
-    
-    avail_lists = [flatten_availability(rec['availability']) for rec in users]
-    
-    # Load pre-trained GloVe embedding
-    print("Loading GloVe model (this might take a minute)...")
-    w2v_model = api.load("glove-wiki-gigaword-100")
-    
-    # Helper to compute average embedding
-    def average_embedding(words, model):
-        vecs = []
-        for w in words:
-            parts = w.lower().split()
-            part_vecs = [model[word] for word in parts if word in model]
-            if part_vecs:
-                vecs.append(np.mean(part_vecs, axis=0))
-        if vecs:
-            return np.mean(vecs, axis=0)
-        else:
-            return np.zeros(model.vector_size)
-    
-    # skill embeddings for each user
-    skill_embeddings = np.array([average_embedding(rec['skills'], w2v_model) for rec in users])
-    
-    # interests and availability
-    mlb_interests = MultiLabelBinarizer()
-    interests_encoded = mlb_interests.fit_transform([rec['interests'] for rec in users])
-    
-    mlb_avail = MultiLabelBinarizer()
-    avail_encoded = mlb_avail.fit_transform(avail_lists)
-    
-    # hours per week
-    hours_map = {"5-10": 1, "10-15": 2, "15-20": 3, "20+": 4}
-    hours_encoded = np.array([hours_map.get(rec['hours_per_week'], 0) for rec in users]).reshape(-1, 1)
-    
-    #  combine all features
-    features = np.hstack([skill_embeddings, interests_encoded, avail_encoded, hours_encoded])
+import embeddings   # shared, memory-mapped GloVe model
+import assignment   # size-constrained assignment engine
+import clustering   # clustering engines (kmeans / kmeans++ / minibatch)
+from cohort import Cohort   # columnar student data
+import features     # precomputed student feature vectors
+import metrics      # stage timings for /metrics
+
+# Feature matrices up to this size (as dense float64) are clustered dense,
+# where BLAS is fastest; larger ones stay sparse float32, so memory grows with
+# the non-zeros instead of students x interest vocabulary
+DENSE_MAX_BYTES = 64 * 2**20
+
+# Extra assignment cost (in median distances) of placing a student in a group
+# whose meeting slot they are not available in; 0 turns the penalty off
+AVAILABILITY_WEIGHT = 1.0
+
+def meeting_slots(centers):
+    """
+    Most available slot of each cluster, as a bitmask (one bit per group).
+
+    Args:
+        centers (ndarray): (n_groups, n_features) cluster centers
+
+    Returns:
+        ndarray: uint32 bitmask per group
+    """
+    slots = np.argmax(centers[:, features.EMBEDDING_SIZE:features.VECTOR_SIZE - 1], axis=1)
+    return np.left_shift(1, slots).astype(np.uint32)
+
+def sort_groups(min_group, max_group, users_data, assignment_method="auto", report=None, progress=None, model=None,
+                engine_options=None, availability_weight=AVAILABILITY_WEIGHT):
+    """
+    Sort students into balanced groups.
+
+    Args:
+        min_group (int): Minimum students per group
+        max_group (int): Maximum students per group
+        users_data (Cohort or list): Columnar student data (see group_store.fetch_class), or
+            student records (id, skills, interests, availability, hours_per_week)
+        assignment_method (str): "auto", "exact" or "greedy" (see assignment.py)
+        report (dict, optional): Filled with run statistics when given
+            (assignment, clustering and phrase cache stats, per-stage timings in seconds, number of groups)
+            and the state needed to place late students (centers, interest
+            vocabulary, target sizes; see incremental.py)
+        progress (callable, optional): Called as progress(stage, fraction) as the run advances
+        model (KeyedVectors, optional): Word vectors, defaults to the shared GloVe model
+        engine_options (dict, optional): Clustering engine and its settings (engine, n_init,
+            batch_size, threads; see clustering.py), defaults to the "auto" engine
+        availability_weight (float): Penalty for placing a student in a group whose
+            meeting slot they can't attend (see AVAILABILITY_WEIGHT)
+
+    Returns:
+        dict: Group number -> list of user IDs
+    """
+
+    def set_progress(stage, fraction):
+        if progress is not None:
+            progress(stage, fraction)
+    
+    set_progress("features", 0.0)
+    
+    # Time spent in each stage (see lap), reported through `report`
+    timings = {}
+    clock = time.perf_counter()
+    
+    def lap(stage):
+        nonlocal clock
+        now = time.perf_counter()
+        timings[stage] = now - clock
+        clock = now
+    
+    # Columnar student data (see cohort.py); plain dicts are converted once
+    cohort = users_data if isinstance(users_data, Cohort) else Cohort.from_records(users_data)
+    
+    # Skill embedding, availability and hours are precomputed at submission
+    # time (see features.py); only rows with a missing/outdated vector are encoded here
+    stale = np.flatnonzero(~cohort.fresh)
+    lap("parse")
+    
+    student_vectors = cohort.vectors
+    embedding_report = {}
+    if len(stale):
+        # Shared pre-trained GloVe embedding (loaded once per process); every
+        # distinct phrase is looked up once, through the phrase cache
+        w2v_model = model if model is not None else embeddings.get_model()
+        student_vectors[stale, :features.EMBEDDING_SIZE] = features.average_embeddings(
+            [cohort.skills[i] for i in stale], w2v_model, report=embedding_report)
+        print(f"Phrase cache: {embedding_report['phrases']} phrases, "
+              f"{embedding_report['memory_hits'] + embedding_report['disk_hits']} hits, "
+              f"{embedding_report['misses']} embedded, ~{embedding_report['seconds_saved'] * 1000:.1f}ms saved")
+    lap("embedding")
+    
+    if len(stale):
+        student_vectors[stale, features.EMBEDDING_SIZE:-1] = features.unpack_availability(cohort.availability[stale])
+        student_vectors[stale, -1] = cohort.hours[stale]
+    
+    # interests (vocabulary depends on the whole class, so encoded per run)
+    # Kept sparse: the vocabulary grows with the class, a dense block would be n x vocabulary
+    interests_encoded = cohort.interest_matrix()
+    
+    #  combine all features into one float32 CSR matrix
+    feature_matrix = sparse.hstack([sparse.csr_matrix(student_vectors), interests_encoded],
+                                   format="csr", dtype=features.DTYPE)
+    # Clustering and assignment work on the sparse matrix directly; only
+    # small matrices are made dense (see DENSE_MAX_BYTES)
+    if feature_matrix.shape[0] * feature_matrix.shape[1] * 8 <= DENSE_MAX_BYTES:
+        feature_matrix = feature_matrix.astype(np.float64).toarray()
+    lap("encoding")
     
     # Optimal number of groups
-    n_users = len(users)
+    n_users = len(cohort)
     MIN_SIZE = min_group 
     MAX_SIZE = max_group 
     
@@ -97,74 +149,59 @@ def sort_groups(min_group, max_group, users_data):
     
     n_groups, target_sizes = find_valid_group_configuration(n_users, MIN_SIZE, MAX_SIZE)
     print(f"Target configuration: {n_groups} groups with sizes {target_sizes}")
+    lap("config_search")
     
     # Starting clustering
-    kmeans = KMeans(n_clusters=n_groups, random_state=42, n_init=10)
-    initial_labels = kmeans.fit_predict(features)
-    centers = kmeans.cluster_centers_
-    
-    # balanced assignment algorithm
-    def balanced_assignment(features, centers, target_sizes):
-        """Assign users to groups while respecting size constraints."""
-        n_samples = len(features)
-        n_clusters = len(centers)
-        
-        # Euclidean distance from each student to each cluster center
-        distances = np.array([[np.linalg.norm(features[i] - centers[j]) 
-                            for j in range(n_clusters)] 
-                            for i in range(n_samples)])
-        
-        # Beginning assignments
-        assignments = np.full(n_samples, -1, dtype=int)
-        cluster_counts = np.zeros(n_clusters, dtype=int)
-        
-        # Create a list of (user_idx, cluster_idx, distance) for all pairs
-        all_assignments = []
-        for i in range(n_samples):
-            for j in range(n_clusters):
-                all_assignments.append((i, j, distances[i, j]))
-        
-        # Sort by distance (best matches first)
-        all_assignments.sort(key=lambda x: x[2])
-        
-        # Assign users greedily based on best matches
-        for user_idx, cluster_idx, distance in all_assignments:
-            # Check if user is already assigned
-            if assignments[user_idx] >= 0:
-                continue
-            
-            # Check if cluster has space
-            if cluster_counts[cluster_idx] < target_sizes[cluster_idx]:
-                assignments[user_idx] = cluster_idx
-                cluster_counts[cluster_idx] += 1
-        
-        # Verify all users are assigned (they should be i hope)
-        unassigned = np.where(assignments == -1)[0]
-        if len(unassigned) > 0:
-            print(f"Warning: {len(unassigned)} users unassigned, forcing assignment")
-            for user_idx in unassigned:
-                for cluster_idx in range(n_clusters):
-                    if cluster_counts[cluster_idx] < target_sizes[cluster_idx]:
-                        assignments[user_idx] = cluster_idx
-                        cluster_counts[cluster_idx] += 1
-                        break
-        
-        return assignments
-    
-    # apply balanced assignment
-    final_labels = balanced_assignment(features, centers, target_sizes)
-    
-    # assign to users and create groups
-    for rec, label in zip(users, final_labels):
-        rec['group'] = int(label) + 1  # Groups start at 1
+    set_progress("clustering", 0.3)
+    centers, initial_labels, clustering_report = clustering.cluster(
+        feature_matrix, n_groups, **(engine_options or {}))
+    print(f"Clustering ({clustering_report['engine']}, n_init={clustering_report['n_init']}): "
+          f"inertia {clustering_report['inertia']:.3f} in {clustering_report['runtime']:.3f}s")
+    lap("kmeans")
+    
+    set_progress("assignment", 0.8)
+    
+    # Students who can't make their group's meeting slot: one AND + popcount
+    # per (student, group) pair on the availability bitmasks
+    masks = cohort.availability
+    penalty = None
+    if availability_weight:
+        penalty = availability_weight * (features.overlap_matrix(masks, meeting_slots(centers)) == 0)
+    
+    # balanced assignment (vectorized distances, exact solver for normal class sizes)
+    final_labels, assignment_report = assignment.balanced_assignment(
+        feature_matrix, centers, target_sizes, method=assignment_method, penalty=penalty)
+    assignment_report['groups_without_common_slot'] = int(
+        np.count_nonzero(features.common_slots(masks, final_labels, n_groups) == 0))
+    print(f"Assignment ({assignment_report['method']}): total distance "
+          f"{assignment_report['total_distance']:.3f} in {assignment_report['runtime']:.3f}s, "
+          f"{assignment_report['groups_without_common_slot']}/{n_groups} groups without a common slot")
+    lap("assignment")
     
     # Create groups dictionary with user IDs
     groups = {}
-    for rec in users:
-        group_num = rec['group']
+    for student_id, label in zip(cohort.ids.tolist(), final_labels.tolist()):
+        group_num = label + 1  # Groups start at 1
         if group_num not in groups:
             groups[group_num] = []
-        groups[group_num].append(rec['id'])  # Store user ID
+        groups[group_num].append(student_id)  # Store user ID
+    
+    lap("dict_build")
+    
+    if metrics.ENABLED:
+        for stage, seconds in timings.items():
+            metrics.observe("metrocollab_sort_stage_duration_seconds", seconds, stage=stage)
+    
+    if report is not None:
+        report['assignment'] = assignment_report
+        report['clustering'] = clustering_report
+        report['embedding_cache'] = embedding_report
+        report['timings'] = timings
+        report['n_groups'] = n_groups
+        # Center of group g is centers[g - 1]
+        report['centers'] = centers
+        report['interest_vocabulary'] = list(cohort.vocabulary)
+        report['target_sizes'] = target_sizes
     
     #print("\nGroup assignments:")
     #print(groups)
@@ -97,6 +97,10 @@ document.addEventListener('keydown', (e) => {
 });
 
 
+// How often the loading screen asks for the extraction progress, and for how long
+const PROGRESS_POLL_INTERVAL_MS = 1000;
+const PROGRESS_TIMEOUT_MS = 300000;
+
 document.addEventListener('DOMContentLoaded', function() {
     const form = document.getElementById('skillForm');
     console.log(form)
@@ -135,20 +139,56 @@ document.addEventListener('DOMContentLoaded', function() {
             })
 
             .then(data => {
-                setTimeout(() => {
-                    //window.location.href = '/thank-you';
-                    loadingScreen.innerHTML = `
-                        <div style="text-align: center;">
-                            <div style="font-size: 60px; margin-bottom: 20px;">✅</div>
-                            <div style="font-size: 24px; font-weight: 600; color: #22c55e; margin-bottom: 10px;">
-                                Success!
-                            </div>
-                            <button onclick="window.location.href='/'" style="margin-top: 20px; width: auto; padding: 10px 30px;">
-                                To the main page
-                            </button>
-                        </div>
-                    `;
-                }, 2000);
+                // Poll the AI extraction of the answers until it finishes
+                const loadingText = loadingScreen.querySelector('.loading-text');
+                const deadline = Date.now() + PROGRESS_TIMEOUT_MS;
+
+                function poll() {
+                    fetch(data.progress_url)
+                    .then(response => {
+                        if (!response.ok) {
+                            throw new Error(`Progress request failed (${response.status})`);
+                        }
+                        return response.json();
+                    })
+                    .then(state => {
+                        if (state.stage === 'done') {
+                            //window.location.href = '/thank-you';
+                            loadingScreen.innerHTML = `
+                                <div style="text-align: center;">
+                                    <div style="font-size: 60px; margin-bottom: 20px;">✅</div>
+                                    <div style="font-size: 24px; font-weight: 600; color: #22c55e; margin-bottom: 10px;">
+                                        Success!
+                                    </div>
+                                    <button onclick="window.location.href='/'" style="margin-top: 20px; width: auto; padding: 10px 30px;">
+                                        To the main page
+                                    </button>
+                                </div>
+                            `;
+                            return;
+                        }
+                        if (state.stage === 'failed') {
+                            showError('We could not analyze your answers. Please try again.');
+                            return;
+                        }
+                        if (Date.now() > deadline) {
+                            showError('Your form was saved but is still being processed. Please check back later.');
+                            return;
+                        }
+
+                        if (state.stage === 'queued') {
+                            loadingText.textContent = 'Waiting for the AI to pick up your form...';
+                        } else {
+                            loadingText.textContent = `Analyzing your skills and interests... (${state.received} characters)`;
+                        }
+                        setTimeout(poll, PROGRESS_POLL_INTERVAL_MS);
+                    })
+                    .catch(error => {
+                        console.error('Error:', error);
+                        showError('Your form was saved but we lost track of it. Please check back later.');
+                    });
+                }
+                poll();
             })
 
             .catch(error => {
@@ -157,4 +197,20 @@ document.addEventListener('DOMContentLoaded', function() {
             });
         });
     }
-});
\ No newline at end of file
+});
+
+
+function showError(message) {
+    const loadingScreen = document.getElementById('loadingScreen');
+    loadingScreen.innerHTML = `
+        <div style="text-align: center;">
+            <div style="font-size: 60px; margin-bottom: 20px;">⚠️</div>
+            <div style="font-size: 18px; font-weight: 600; color: #ef4444; margin-bottom: 10px;">
+                ${message}
+            </div>
+            <button onclick="window.location.reload()" style="margin-top: 20px; width: auto; padding: 10px 30px;">
+                Back to the form
+            </button>
+        </div>
+    `;
+}